@@ -0,0 +1,98 @@
+"""Compaction of tool results within an agent turn."""
+
+from typing import Any
+
+from nanobot.config.schema import ToolCompactionConfig, ToolResultPolicy
+
+
+class ToolResultCompactor:
+    """
+    Shrinks tool results the model has already seen.
+    
+    Every LLM call in a turn resends all earlier messages, so a large tool
+    result would otherwise be paid for on every remaining iteration. Once
+    a result is older than the `keep_recent` most recent rounds, it is
+    replaced according to its tool's policy: cut down to its head and tail
+    ("truncate"), or replaced by a short preview plus a handle that the
+    expand_result tool can read back in full ("handle").
+    
+    A compactor lives for one turn; full results behind handles are kept
+    only until the turn ends.
+    """
+    
+    def __init__(self, config: ToolCompactionConfig | None = None):
+        self.config = config or ToolCompactionConfig()
+        self.stash: dict[str, str] = {}  # handle -> full result
+        self._seen: set[str] = set()  # tool_call_ids already compacted or left alone
+    
+    def policy(self, tool_name: str) -> ToolResultPolicy:
+        """Get the compaction policy for a tool."""
+        return self.config.per_tool.get(tool_name, self.config.default)
+    
+    def compact(self, messages: list[dict[str, Any]]) -> int:
+        """
+        Compact older tool results in place.
+        
+        Args:
+            messages: The turn's message list.
+        
+        Returns:
+            Number of characters removed.
+        """
+        if not self.config.enabled:
+            return 0
+        
+        rounds = [
+            i for i, m in enumerate(messages)
+            if m.get("role") == "assistant" and m.get("tool_calls")
+        ]
+        keep = self.config.keep_recent
+        if len(rounds) <= keep:
+            return 0
+        cutoff = rounds[len(rounds) - keep] if keep > 0 else len(messages)
+        
+        saved = 0
+        for i in range(cutoff):
+            msg = messages[i]
+            call_id = msg.get("tool_call_id")
+            if msg.get("role") != "tool" or not call_id or call_id in self._seen:
+                continue
+            self._seen.add(call_id)
+            content = msg.get("content")
+            if not isinstance(content, str):
+                continue
+            compacted = self._compact_one(call_id, msg.get("name", ""), content)
+            if compacted is not None:
+                messages[i] = {**msg, "content": compacted}
+                saved += len(content) - len(compacted)
+        return saved
+    
+    def _compact_one(self, call_id: str, tool_name: str, content: str) -> str | None:
+        policy = self.policy(tool_name)
+        if policy.mode == "keep" or len(content) <= policy.max_chars:
+            return None
+        
+        head = content[:policy.head_chars]
+        tail = content[-policy.tail_chars:] if policy.tail_chars > 0 else ""
+        omitted = len(content) - len(head) - len(tail)
+        if omitted <= 0:
+            return None
+        
+        if policy.mode == "handle":
+            self.stash[call_id] = content
+            return (
+                f"{head}\n\n[... {len(content) - len(head)} of {len(content)} characters omitted. "
+                f'Call expand_result with handle="{call_id}" to read the full output.]'
+            )
+        return f"{head}\n\n[... {omitted} characters omitted ...]\n\n{tail}"
+    
+    def expand(self, handle: str, offset: int = 0, limit: int = 20000) -> str:
+        """Read back (a page of) a result that was replaced by a handle."""
+        content = self.stash.get(handle)
+        if content is None:
+            return f"Error: Unknown result handle '{handle}'"
+        page = content[offset:offset + limit]
+        end = offset + len(page)
+        if end < len(content):
+            page += f"\n\n[Showing characters {offset}-{end} of {len(content)}; use offset={end} to continue.]"
+        return page
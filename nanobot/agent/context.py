@@ -2,11 +2,14 @@
 
 import base64
 import mimetypes
+from datetime import datetime
 from pathlib import Path
 from typing import Any
 
 from nanobot.agent.memory import MemoryStore
 from nanobot.agent.skills import SkillsLoader
+from nanobot.providers.base import PROMPT_CACHE_BREAK
+from nanobot.utils.filecache import FileCache
 
 
 class ContextBuilder:
@@ -15,21 +18,38 @@ class ContextBuilder:
     
     Assembles bootstrap files, memory, skills, and conversation history
     into a coherent prompt for the LLM.
+    
+    All file reads go through a shared FileCache, so building the prompt
+    for a turn does no disk I/O unless a file changed; only the trailing
+    volatile section is recomputed every call.
     """
     
     BOOTSTRAP_FILES = ["AGENTS.md", "SOUL.md", "USER.md", "TOOLS.md", "IDENTITY.md"]
     
-    def __init__(self, workspace: Path):
+    def __init__(self, workspace: Path, files: FileCache | None = None):
         self.workspace = workspace
-        self.memory = MemoryStore(workspace)
-        self.skills = SkillsLoader(workspace)
+        self.files = files or FileCache()
+        self.memory = MemoryStore(workspace, files=self.files)
+        self.skills = SkillsLoader(workspace, files=self.files)
+        self._identity: str | None = None
     
-    def build_system_prompt(self, skill_names: list[str] | None = None) -> str:
+    def build_system_prompt(
+        self,
+        skill_names: list[str] | None = None,
+        digest: str | None = None,
+    ) -> str:
         """
         Build the system prompt from bootstrap files, memory, and skills.
         
+        Sections are ordered from least to most volatile so the prompt keeps
+        a byte-identical prefix across turns, which lets providers reuse
+        their prompt cache. Anything that changes per turn (the current
+        time, today's notes) goes into a trailing section after
+        PROMPT_CACHE_BREAK.
+        
         Args:
             skill_names: Optional list of skills to include.
+            digest: Optional summary of conversation history that no longer fits.
         
         Returns:
             Complete system prompt.
@@ -44,11 +64,6 @@ class ContextBuilder:
         if bootstrap:
             parts.append(bootstrap)
         
-        # Memory context
-        memory = self.memory.get_memory_context()
-        if memory:
-            parts.append(f"# Memory\n\n{memory}")
-        
         # Skills - progressive loading
         # 1. Always-loaded skills: include full content
         always_skills = self.skills.get_always_skills()
@@ -67,12 +82,35 @@ Skills with available="false" need dependencies installed first - you can try in
 
 {skills_summary}""")
         
-        return "\n\n---\n\n".join(parts)
+        # Long-term memory changes rarely, so it still belongs to the prefix
+        long_term = self.memory.read_long_term()
+        if long_term:
+            parts.append(f"# Memory\n\n## Long-term Memory\n{long_term}")
+        
+        stable = "\n\n---\n\n".join(parts)
+        return f"{stable}{PROMPT_CACHE_BREAK}{self._build_volatile_context(digest)}"
+    
+    def _build_volatile_context(self, digest: str | None = None) -> str:
+        """Build the trailing section with per-turn data (time, today's notes, digest)."""
+        now = datetime.now().strftime("%Y-%m-%d %H:%M (%A)")
+        section = f"# Current Context\n\n## Current Time\n{now}"
+        
+        if digest:
+            section += f"\n\n## Earlier Conversation (summary)\n{digest}"
+        
+        today = self.memory.read_today()
+        if today:
+            section += f"\n\n## Today's Notes\n{today}"
+        return section
     
     def _get_identity(self) -> str:
         """Get the core identity section."""
-        from datetime import datetime
-        now = datetime.now().strftime("%Y-%m-%d %H:%M (%A)")
+        if self._identity is None:
+            self._identity = self._build_identity()
+        return self._identity
+    
+    def _build_identity(self) -> str:
+        """Build the identity section (constant for a workspace)."""
         workspace_path = str(self.workspace.expanduser().resolve())
         
         return f"""# yiqunbot 🐈
@@ -84,9 +122,6 @@ You are yiqunbot, a helpful AI assistant. You have access to tools that allow yo
 - Send messages to users on chat channels
 - Spawn subagents for complex background tasks
 
-## Current Time
-{now}
-
 ## Workspace
 Your workspace is at: {workspace_path}
 - Memory files: {workspace_path}/memory/MEMORY.md
@@ -105,9 +140,8 @@ When remembering something, write to {workspace_path}/memory/MEMORY.md"""
         parts = []
         
         for filename in self.BOOTSTRAP_FILES:
-            file_path = self.workspace / filename
-            if file_path.exists():
-                content = file_path.read_text(encoding="utf-8")
+            content = self.files.read_text(self.workspace / filename)
+            if content is not None:
                 parts.append(f"## {filename}\n\n{content}")
         
         return "\n\n".join(parts) if parts else ""
@@ -118,6 +152,7 @@ When remembering something, write to {workspace_path}/memory/MEMORY.md"""
         current_message: str,
         skill_names: list[str] | None = None,
         media: list[str] | None = None,
+        digest: str | None = None,
     ) -> list[dict[str, Any]]:
         """
         Build the complete message list for an LLM call.
@@ -127,6 +162,7 @@ When remembering something, write to {workspace_path}/memory/MEMORY.md"""
             current_message: The new user message.
             skill_names: Optional skills to include.
             media: Optional list of local file paths for images/media.
+            digest: Optional summary of conversation history that no longer fits.
 
         Returns:
             List of messages including system prompt.
@@ -134,7 +170,7 @@ When remembering something, write to {workspace_path}/memory/MEMORY.md"""
         messages = []
 
         # System prompt
-        system_prompt = self.build_system_prompt(skill_names)
+        system_prompt = self.build_system_prompt(skill_names, digest=digest)
         messages.append({"role": "system", "content": system_prompt})
 
         # History
@@ -0,0 +1,170 @@
+"""Token-budgeted conversation history."""
+
+from typing import Any
+
+from loguru import logger
+
+from nanobot.agent.tokens import Tokenizer, count_message_tokens
+from nanobot.providers.base import LLMProvider
+from nanobot.session.manager import DIGEST_KEY, Session
+
+_DIGEST_PROMPT = """You maintain a running summary of a conversation between a user and an AI assistant.
+Merge the earlier summary (if any) with the new messages into one updated summary.
+Keep facts, decisions, names, open tasks and user preferences; drop small talk.
+Write plain prose or terse bullet points, at most a few paragraphs."""
+
+# Longest excerpt of a single message sent to the summarizer.
+_DIGEST_MESSAGE_CHARS = 4000
+
+
+class HistoryWindow:
+    """
+    Fits session history into a model's context window.
+    
+    The prompt budget is the model's context window minus room for the
+    reply (`max_tokens`), the system prompt, tool definitions and the
+    current message. History is filled from newest to oldest until the
+    budget is reached.
+    
+    When history overflows, the oldest messages are folded into a rolling
+    digest stored in the session metadata (``history_digest``), and only
+    the newest `keep_ratio` of the budget is kept verbatim. The next
+    summarization happens only once that headroom fills up again, so it
+    costs one extra LLM call every so often rather than on every turn.
+    """
+    
+    def __init__(
+        self,
+        provider: LLMProvider,
+        model: str,
+        tokenizer: Tokenizer,
+        context_window: int,
+        max_tokens: int = 4096,
+        digest: bool = True,
+        digest_max_tokens: int = 1024,
+        keep_ratio: float = 0.5,
+        safety_ratio: float = 0.05,
+    ):
+        self.provider = provider
+        self.model = model
+        self.tokenizer = tokenizer
+        self.context_window = context_window
+        self.max_tokens = max_tokens
+        self.digest = digest
+        self.digest_max_tokens = digest_max_tokens
+        self.keep_ratio = keep_ratio
+        self.safety_ratio = safety_ratio
+    
+    def budget(self, reserved: int) -> int:
+        """Tokens left for history once `reserved` prompt tokens are accounted for."""
+        budget = self.context_window - self.max_tokens - reserved
+        budget -= int(self.context_window * self.safety_ratio)
+        if self.digest:
+            budget -= self.digest_max_tokens  # Room for the digest to grow
+        return max(0, budget)
+    
+    def get_digest(self, session: Session) -> str | None:
+        """Get the summary of history that no longer fits, if there is one."""
+        digest = session.metadata.get(DIGEST_KEY)
+        return digest.get("summary") if digest else None
+    
+    async def select(self, session: Session, reserved: int) -> list[dict[str, Any]]:
+        """
+        Choose the history to send with a turn.
+        
+        Args:
+            session: The session.
+            reserved: Prompt tokens already taken (system prompt, tools, current message).
+        
+        Returns:
+            Messages in LLM format (role and content), oldest first.
+        """
+        budget = self.budget(reserved)
+        digest = session.metadata.get(DIGEST_KEY) or {}
+        until = digest.get("until")
+        candidates = [
+            {"role": m["role"], "content": m["content"], "timestamp": m.get("timestamp")}
+            for m in session.messages
+            if not until or (m.get("timestamp") or "") > until
+        ]
+        costs = [count_message_tokens(m, self.tokenizer) for m in candidates]
+        
+        if sum(costs) > budget and self.digest:
+            target = int(budget * self.keep_ratio)
+            start = self._fit_start(costs, target)
+            # Never split messages that share a timestamp across the cut.
+            while 0 < start < len(candidates) and (
+                candidates[start]["timestamp"] == candidates[start - 1]["timestamp"]
+            ):
+                start += 1
+            if start and candidates[start - 1]["timestamp"]:
+                summary, folded = await self._summarize(digest.get("summary"), candidates[:start])
+                if summary and folded:
+                    session.metadata[DIGEST_KEY] = {
+                        "summary": summary,
+                        "until": candidates[folded - 1]["timestamp"],
+                    }
+                    candidates, costs = candidates[folded:], costs[folded:]
+        
+        start = self._fit_start(costs, budget)
+        return [{"role": m["role"], "content": m["content"]} for m in candidates[start:]]
+    
+    @staticmethod
+    def _fit_start(costs: list[int], budget: int) -> int:
+        """Index of the oldest message such that it and everything newer fit the budget."""
+        total = 0
+        for i in range(len(costs) - 1, -1, -1):
+            total += costs[i]
+            if total > budget:
+                return i + 1
+        return 0
+    
+    async def _summarize(
+        self,
+        previous: str | None,
+        messages: list[dict[str, Any]],
+    ) -> tuple[str | None, int]:
+        """
+        Fold messages (oldest first) into the digest.
+        
+        Returns:
+            (new summary or None if summarization failed, messages folded in).
+        """
+        header = f"Earlier summary:\n{previous}\n\nNew messages:" if previous else ""
+        # The summarization request gets the whole window, minus room for its reply.
+        budget = self.context_window - self.digest_max_tokens
+        budget -= int(self.context_window * self.safety_ratio)
+        used = self.tokenizer(_DIGEST_PROMPT) + self.tokenizer(header)
+        lines: list[str] = []
+        for m in messages:
+            content = m["content"] if isinstance(m["content"], str) else "[non-text content]"
+            if len(content) > _DIGEST_MESSAGE_CHARS:
+                half = _DIGEST_MESSAGE_CHARS // 2
+                content = f"{content[:half]}\n[...]\n{content[-half:]}"
+            line = f"{m['role']}: {content}"
+            used += self.tokenizer(line)
+            if used > budget and lines:
+                break
+            lines.append(line)
+        folded = len(lines)
+        # Keep messages sharing a timestamp together (see select()).
+        while 0 < folded < len(messages) and (
+            messages[folded]["timestamp"] == messages[folded - 1]["timestamp"]
+        ):
+            folded -= 1
+        if not folded:
+            return None, 0
+        
+        response = await self.provider.chat(
+            messages=[
+                {"role": "system", "content": _DIGEST_PROMPT},
+                {"role": "user", "content": "\n\n".join(filter(None, [header, *lines[:folded]]))},
+            ],
+            model=self.model,
+            max_tokens=self.digest_max_tokens,
+            temperature=0.2,
+        )
+        if response.finish_reason == "error" or not response.content:
+            logger.warning(f"History summarization failed: {response.content}")
+            return None, 0
+        return response.content.strip(), folded
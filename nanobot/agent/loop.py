@@ -2,23 +2,36 @@
 
 import asyncio
 import json
+import time
+import uuid
 from pathlib import Path
 from typing import Any
 
 from loguru import logger
 
-from nanobot.bus.events import InboundMessage, OutboundMessage
-from nanobot.bus.queue import MessageBus
-from nanobot.providers.base import LLMProvider
+from nanobot.bus.events import InboundMessage, OutboundDelta, OutboundMessage
+from nanobot.bus.queue import MessageBus, message_priority
+from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+from nanobot.providers.scheduler import llm_priority
+from nanobot.agent.compaction import ToolResultCompactor
 from nanobot.agent.context import ContextBuilder
+from nanobot.agent.history import HistoryWindow
+from nanobot.agent.tokens import context_window as model_context_window
+from nanobot.agent.tokens import count_message_tokens, count_tools_tokens, get_tokenizer
 from nanobot.agent.tools.registry import ToolRegistry
 from nanobot.agent.tools.filesystem import ReadFileTool, WriteFileTool, EditFileTool, ListDirTool
 from nanobot.agent.tools.shell import ExecTool
 from nanobot.agent.tools.web import WebSearchTool, WebFetchTool
 from nanobot.agent.tools.message import MessageTool
 from nanobot.agent.tools.spawn import SpawnTool
+from nanobot.agent.tools.subagents import SubagentsTool
+from nanobot.agent.tools.expand import ExpandResultTool
 from nanobot.agent.subagent import SubagentManager
-from nanobot.session.manager import SessionManager
+from nanobot.config.schema import SessionsConfig, SubagentsConfig, ToolCompactionConfig
+from nanobot.session.manager import Session, SessionManager
+from nanobot.utils.http import HttpClientPool
+
+LLM_ERROR_REPLY = "Sorry, I can't reach the language model right now. Please try again in a moment."
 
 
 class AgentLoop:
@@ -42,6 +55,18 @@ class AgentLoop:
         max_iterations: int = 20,
         brave_api_key: str | None = None,
         exec_config: "ExecToolConfig | None" = None,
+        max_concurrent_sessions: int = 4,
+        http: HttpClientPool | None = None,
+        shutdown_grace_s: float = 30.0,
+        session_config: SessionsConfig | None = None,
+        sessions: SessionManager | None = None,
+        max_tokens: int = 4096,
+        context_window: int = 0,
+        tokenizer: str = "auto",
+        history_digest: bool = True,
+        compaction_config: ToolCompactionConfig | None = None,
+        subagents_config: SubagentsConfig | None = None,
+        subagents_state_dir: Path | None = None,
     ):
         from nanobot.config.schema import ExecToolConfig
         self.bus = bus
@@ -49,12 +74,27 @@ class AgentLoop:
         self.workspace = workspace
         self.model = model or provider.get_default_model()
         self.max_iterations = max_iterations
+        self.max_tokens = max_tokens
+        self.max_concurrent_sessions = max(1, max_concurrent_sessions)
+        self.shutdown_grace_s = shutdown_grace_s
         self.brave_api_key = brave_api_key
         self.exec_config = exec_config or ExecToolConfig()
+        self.compaction_config = compaction_config or ToolCompactionConfig()
+        self.http = http
         
         self.context = ContextBuilder(workspace)
-        self.sessions = SessionManager(workspace)
+        self.sessions = sessions or SessionManager(workspace, session_config)
+        self.history = HistoryWindow(
+            provider=provider,
+            model=self.model,
+            tokenizer=get_tokenizer(tokenizer),
+            context_window=context_window or model_context_window(self.model),
+            max_tokens=max_tokens,
+            digest=history_digest,
+        )
         self.tools = ToolRegistry()
+        # One cap on running shell commands for the agent and its subagents together
+        self.exec_slots = asyncio.Semaphore(self.exec_config.max_concurrent)
         self.subagents = SubagentManager(
             provider=provider,
             workspace=workspace,
@@ -62,9 +102,17 @@ class AgentLoop:
             model=self.model,
             brave_api_key=brave_api_key,
             exec_config=self.exec_config,
+            http=http,
+            compaction_config=self.compaction_config,
+            config=subagents_config,
+            state_dir=subagents_state_dir,
+            exec_slots=self.exec_slots,
         )
         
         self._running = False
+        self._session_slots = asyncio.Semaphore(self.max_concurrent_sessions)
+        self._workers: dict[str, asyncio.Task[None]] = {}
+        self._tools_token_count: tuple[list[dict[str, Any]], int] | None = None
         self._register_default_tools()
     
     def _register_default_tools(self) -> None:
@@ -80,11 +128,20 @@ class AgentLoop:
             working_dir=str(self.workspace),
             timeout=self.exec_config.timeout,
             restrict_to_workspace=self.exec_config.restrict_to_workspace,
+            max_output_chars=self.exec_config.max_output_chars,
+            max_output_bytes=self.exec_config.max_output_bytes,
+            persistent_shell=self.exec_config.persistent_shell,
+            shell_idle_s=self.exec_config.shell_idle_s,
+            cpu_limit_s=self.exec_config.cpu_limit_s,
+            memory_limit_mb=self.exec_config.memory_limit_mb,
+            open_files_limit=self.exec_config.open_files_limit,
+            process_limit=self.exec_config.process_limit,
+            slots=self.exec_slots,
         ))
         
         # Web tools
-        self.tools.register(WebSearchTool(api_key=self.brave_api_key))
-        self.tools.register(WebFetchTool())
+        self.tools.register(WebSearchTool(api_key=self.brave_api_key, http=self.http))
+        self.tools.register(WebFetchTool(http=self.http))
         
         # Message tool
         message_tool = MessageTool(send_callback=self.bus.publish_outbound)
@@ -93,47 +150,147 @@ class AgentLoop:
         # Spawn tool (for subagents)
         spawn_tool = SpawnTool(manager=self.subagents)
         self.tools.register(spawn_tool)
+        self.tools.register(SubagentsTool(manager=self.subagents))
+        
+        # Expand tool (reads back tool results compacted earlier in the turn)
+        if self.compaction_config.enabled:
+            self.tools.register(ExpandResultTool())
     
     async def run(self) -> None:
-        """Run the agent loop, processing messages from the bus."""
+        """
+        Run the agent loop, processing messages from the bus.
+        
+        Messages for different sessions are processed concurrently (up to
+        `max_concurrent_sessions` at a time); messages within a session are
+        processed strictly in arrival order.
+        
+        A message is only taken off the bus once a session slot is free and
+        its session is idle, so everything else waits in the bus, where the
+        size limit, overflow policy, priorities and channel fairness apply.
+        """
         self._running = True
-        logger.info("Agent loop started")
+        logger.info(f"Agent loop started (max {self.max_concurrent_sessions} concurrent sessions)")
+        compactor = asyncio.create_task(self._maintain_sessions())
         
-        while self._running:
-            try:
-                # Wait for next message
-                msg = await asyncio.wait_for(
-                    self.bus.consume_inbound(),
-                    timeout=1.0
-                )
-                
-                # Process it
+        try:
+            while self._running:
+                await self._session_slots.acquire()
                 try:
-                    response = await self._process_message(msg)
-                    if response:
-                        await self.bus.publish_outbound(response)
-                except Exception as e:
-                    logger.error(f"Error processing message: {e}")
-                    # Send error response
-                    await self.bus.publish_outbound(OutboundMessage(
-                        channel=msg.channel,
-                        chat_id=msg.chat_id,
-                        content=f"Sorry, I encountered an error: {str(e)}"
-                    ))
-            except asyncio.TimeoutError:
+                    # Wait for next message of an idle session
+                    msg = await asyncio.wait_for(
+                        self.bus.consume_inbound(accept=self._is_idle),
+                        timeout=1.0
+                    )
+                except asyncio.TimeoutError:
+                    self._session_slots.release()
+                    continue
+                except BaseException:
+                    self._session_slots.release()
+                    raise
+                self._dispatch(msg)
+        finally:
+            self._running = False
+            compactor.cancel()
+            await self._drain_workers()
+            exec_tool = self.tools.get("exec")
+            if isinstance(exec_tool, ExecTool):
+                await exec_tool.close_all()
+    
+    async def _maintain_sessions(self) -> None:
+        """Periodically sync deferred writes and compact session files in a worker thread."""
+        config = self.sessions.config
+        interval = config.compact_interval_s
+        if config.fsync == "interval":
+            interval = min(interval, max(config.fsync_interval_s, 0.1))
+        next_compaction = time.monotonic() + config.compact_interval_s
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.sessions.flush)
+            except Exception as e:
+                logger.warning(f"Session flush failed: {e}")
+            if time.monotonic() < next_compaction:
                 continue
+            next_compaction = time.monotonic() + config.compact_interval_s
+            try:
+                await asyncio.to_thread(self.sessions.compact_pending)
+            except Exception as e:
+                logger.warning(f"Session compaction failed: {e}")
+    
+    async def _drain_workers(self) -> None:
+        """Let in-flight turns finish (up to the grace period), then cancel the rest."""
+        workers = list(self._workers.values())
+        if not workers:
+            return
+        logger.info(f"Waiting for {len(workers)} in-flight session(s) to finish")
+        _, pending = await asyncio.wait(workers, timeout=self.shutdown_grace_s)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    
+    def _dispatch(self, msg: InboundMessage) -> None:
+        """Start a worker for a message (the caller holds a session slot for it)."""
+        key = self._dispatch_key(msg)
+        self._workers[key] = asyncio.create_task(self._run_session(key, msg))
+    
+    def _is_idle(self, msg: InboundMessage) -> bool:
+        """Check if a message's session has no turn in flight."""
+        return self._dispatch_key(msg) not in self._workers
+    
+    @staticmethod
+    def _dispatch_key(msg: InboundMessage) -> str:
+        """Session key used for ordering (system announces join their origin session)."""
+        if msg.channel == "system" and ":" in msg.chat_id:
+            return msg.chat_id
+        return msg.session_key
+    
+    async def _run_session(self, key: str, msg: InboundMessage) -> None:
+        """Process one message, then free its slot and session for the next."""
+        try:
+            await self._handle_message(msg)
+        finally:
+            self._workers.pop(key, None)
+            self._session_slots.release()
+            # The session is idle again: its next queued message may now be taken.
+            await self.bus.notify_inbound()
+    
+    async def _handle_message(self, msg: InboundMessage) -> None:
+        """Process a message and publish the response (or an error reply)."""
+        try:
+            with llm_priority(message_priority(msg)):
+                response = await self._process_message(msg)
+            if response:
+                await self.bus.publish_outbound(response)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error processing message: {e}")
+            # Send error response
+            await self.bus.publish_outbound(OutboundMessage(
+                channel=msg.channel,
+                chat_id=msg.chat_id,
+                content=f"Sorry, I encountered an error: {str(e)}"
+            ))
+    
+    @property
+    def active_sessions(self) -> int:
+        """Number of sessions with a turn in flight."""
+        return len(self._workers)
     
     def stop(self) -> None:
         """Stop the agent loop."""
         self._running = False
         logger.info("Agent loop stopping")
     
-    async def _process_message(self, msg: InboundMessage) -> OutboundMessage | None:
+    async def _process_message(
+        self, msg: InboundMessage, with_history: bool = True
+    ) -> OutboundMessage | None:
         """
         Process a single inbound message.
         
         Args:
             msg: The inbound message to process.
+            with_history: Whether the prompt includes the session's history.
         
         Returns:
             The response message, or None if no response needed.
@@ -157,26 +314,41 @@ class AgentLoop:
         if isinstance(spawn_tool, SpawnTool):
             spawn_tool.set_context(msg.channel, msg.chat_id)
         
-        # Build initial messages (use get_history for LLM-formatted messages)
-        messages = self.context.build_messages(
-            history=session.get_history(),
-            current_message=msg.content,
-            media=msg.media if msg.media else None,
+        subagents_tool = self.tools.get("subagents")
+        if isinstance(subagents_tool, SubagentsTool):
+            subagents_tool.set_context(msg.channel, msg.chat_id)
+        
+        exec_tool = self.tools.get("exec")
+        if isinstance(exec_tool, ExecTool):
+            exec_tool.set_context(msg.session_key)
+        
+        compactor = ToolResultCompactor(self.compaction_config)
+        expand_tool = self.tools.get("expand_result")
+        if isinstance(expand_tool, ExpandResultTool):
+            expand_tool.set_context(compactor)
+        
+        # Build initial messages (history is fitted to the token budget)
+        messages = await self._build_messages(
+            session, msg.content, media=msg.media if msg.media else None,
+            with_history=with_history,
         )
         
         # Agent loop
         iteration = 0
         final_content = None
+        stream_ids: list[str] = []
         
         while iteration < self.max_iterations:
             iteration += 1
             
-            # Call LLM
-            response = await self.provider.chat(
-                messages=messages,
-                tools=self.tools.get_definitions(),
-                model=self.model
-            )
+            # Call LLM (streamed to the channel if it supports deltas)
+            response = await self._call_llm(messages, msg.channel, msg.chat_id, stream_ids)
+            
+            # Don't pass provider errors off as the answer
+            if response.finish_reason == "error":
+                logger.error(f"LLM call failed: {response.content}")
+                final_content = LLM_ERROR_REPLY
+                break
             
             # Handle tool calls
             if response.has_tool_calls:
@@ -196,14 +368,11 @@ class AgentLoop:
                     messages, response.content, tool_call_dicts
                 )
                 
-                # Execute tools
-                for tool_call in response.tool_calls:
-                    args_str = json.dumps(tool_call.arguments)
-                    logger.debug(f"Executing tool: {tool_call.name} with arguments: {args_str}")
-                    result = await self.tools.execute(tool_call.name, tool_call.arguments)
-                    messages = self.context.add_tool_result(
-                        messages, tool_call.id, tool_call.name, result
-                    )
+                # Execute tools (independent calls run concurrently)
+                messages = await self._execute_tool_calls(messages, response.tool_calls)
+                
+                # Shrink results the model has already seen before resending them
+                compactor.compact(messages)
             else:
                 # No tool calls, we're done
                 final_content = response.content
@@ -220,7 +389,8 @@ class AgentLoop:
         return OutboundMessage(
             channel=msg.channel,
             chat_id=msg.chat_id,
-            content=final_content
+            content=final_content,
+            metadata={"stream_ids": stream_ids} if stream_ids else {},
         )
     
     async def _process_system_message(self, msg: InboundMessage) -> OutboundMessage | None:
@@ -255,24 +425,36 @@ class AgentLoop:
         if isinstance(spawn_tool, SpawnTool):
             spawn_tool.set_context(origin_channel, origin_chat_id)
         
+        subagents_tool = self.tools.get("subagents")
+        if isinstance(subagents_tool, SubagentsTool):
+            subagents_tool.set_context(origin_channel, origin_chat_id)
+        
+        exec_tool = self.tools.get("exec")
+        if isinstance(exec_tool, ExecTool):
+            exec_tool.set_context(session_key)
+        
+        compactor = ToolResultCompactor(self.compaction_config)
+        expand_tool = self.tools.get("expand_result")
+        if isinstance(expand_tool, ExpandResultTool):
+            expand_tool.set_context(compactor)
+        
         # Build messages with the announce content
-        messages = self.context.build_messages(
-            history=session.get_history(),
-            current_message=msg.content
-        )
+        messages = await self._build_messages(session, msg.content)
         
         # Agent loop (limited for announce handling)
         iteration = 0
         final_content = None
+        stream_ids: list[str] = []
         
         while iteration < self.max_iterations:
             iteration += 1
             
-            response = await self.provider.chat(
-                messages=messages,
-                tools=self.tools.get_definitions(),
-                model=self.model
-            )
+            response = await self._call_llm(messages, origin_channel, origin_chat_id, stream_ids)
+            
+            if response.finish_reason == "error":
+                logger.error(f"LLM call failed: {response.content}")
+                final_content = LLM_ERROR_REPLY
+                break
             
             if response.has_tool_calls:
                 tool_call_dicts = [
@@ -290,13 +472,8 @@ class AgentLoop:
                     messages, response.content, tool_call_dicts
                 )
                 
-                for tool_call in response.tool_calls:
-                    args_str = json.dumps(tool_call.arguments)
-                    logger.debug(f"Executing tool: {tool_call.name} with arguments: {args_str}")
-                    result = await self.tools.execute(tool_call.name, tool_call.arguments)
-                    messages = self.context.add_tool_result(
-                        messages, tool_call.id, tool_call.name, result
-                    )
+                messages = await self._execute_tool_calls(messages, response.tool_calls)
+                compactor.compact(messages)
             else:
                 final_content = response.content
                 break
@@ -312,16 +489,128 @@ class AgentLoop:
         return OutboundMessage(
             channel=origin_channel,
             chat_id=origin_chat_id,
-            content=final_content
+            content=final_content,
+            metadata={"stream_ids": stream_ids} if stream_ids else {},
+        )
+    
+    async def _build_messages(
+        self,
+        session: Session,
+        current_message: str,
+        media: list[str] | None = None,
+        with_history: bool = True,
+    ) -> list[dict[str, Any]]:
+        """Build the messages for a turn with as much history as the token budget allows."""
+        if not with_history:
+            return self.context.build_messages(
+                history=[], current_message=current_message, media=media
+            )
+        tokenizer = self.history.tokenizer
+        base = self.context.build_messages(
+            history=[],
+            current_message=current_message,
+            media=media,
+            digest=self.history.get_digest(session),
+        )
+        reserved = sum(count_message_tokens(m, tokenizer) for m in base)
+        reserved += self._tools_tokens()
+        history = await self.history.select(session, reserved)
+        
+        # The digest may have just been updated; it has room reserved in the budget.
+        return self.context.build_messages(
+            history=history,
+            current_message=current_message,
+            media=media,
+            digest=self.history.get_digest(session),
         )
     
-    async def process_direct(self, content: str, session_key: str = "cli:direct") -> str:
+    def _tools_tokens(self) -> int:
+        """Tokens taken by the tool definitions (recounted only when the tools change)."""
+        definitions = self.tools.get_definitions()
+        if self._tools_token_count is None or self._tools_token_count[0] is not definitions:
+            tokens = count_tools_tokens(definitions, self.history.tokenizer)
+            self._tools_token_count = (definitions, tokens)
+        return self._tools_token_count[1]
+    
+    async def _call_llm(
+        self,
+        messages: list[dict[str, Any]],
+        channel: str,
+        chat_id: str,
+        stream_ids: list[str] | None = None,
+    ) -> LLMResponse:
+        """
+        Call the LLM for one iteration.
+        
+        If the destination channel consumes deltas, the response is streamed
+        and content is published to the bus as it arrives. The stream id is
+        appended to `stream_ids` so the final message can reference it.
+        """
+        if not self.bus.wants_deltas(channel):
+            return await self.provider.chat(
+                messages=messages,
+                tools=self.tools.get_definitions(),
+                model=self.model,
+                max_tokens=self.max_tokens,
+            )
+        
+        stream_id = uuid.uuid4().hex[:12]
+        if stream_ids is not None:
+            stream_ids.append(stream_id)
+        response: LLMResponse | None = None
+        async for chunk in self.provider.chat_stream(
+            messages=messages,
+            tools=self.tools.get_definitions(),
+            model=self.model,
+            max_tokens=self.max_tokens,
+        ):
+            if chunk.content:
+                await self.bus.publish_delta(OutboundDelta(
+                    channel=channel,
+                    chat_id=chat_id,
+                    content=chunk.content,
+                    stream_id=stream_id,
+                ))
+            if chunk.response is not None:
+                response = chunk.response
+        return response or LLMResponse(content=None)
+    
+    async def _execute_tool_calls(
+        self,
+        messages: list[dict[str, Any]],
+        tool_calls: list[ToolCallRequest],
+    ) -> list[dict[str, Any]]:
+        """Execute a turn's tool calls and append results in the original call order."""
+        for tool_call in tool_calls:
+            args_str = json.dumps(tool_call.arguments)
+            logger.debug(f"Executing tool: {tool_call.name} with arguments: {args_str}")
+        
+        results = await self.tools.execute_batch(
+            [(tc.name, tc.arguments) for tc in tool_calls]
+        )
+        for tool_call, result in zip(tool_calls, results):
+            messages = self.context.add_tool_result(
+                messages, tool_call.id, tool_call.name, result
+            )
+        return messages
+    
+    async def process_direct(
+        self,
+        content: str,
+        session_key: str = "cli:direct",
+        priority: int | None = None,
+        with_history: bool = True,
+    ) -> str:
         """
         Process a message directly (for CLI usage).
         
         Args:
             content: The message content.
             session_key: Session identifier (format: "channel:chat_id").
+            priority: Priority class of the turn's LLM calls (defaults to the channel's).
+            with_history: Whether the prompt includes the session's history.
+                Stateless cron jobs (and heartbeat) turn it off, so repeated
+                runs send the same request (and can hit the response cache).
         
         Returns:
             The agent's response.
@@ -333,6 +622,9 @@ class AgentLoop:
             channel, chat_id = "cli", session_key
 
         msg = InboundMessage(channel=channel, sender_id="user", chat_id=chat_id, content=content)
+        if priority is not None:
+            msg.metadata["priority"] = priority
         
-        response = await self._process_message(msg)
+        with llm_priority(message_priority(msg)):
+            response = await self._process_message(msg, with_history=with_history)
         return response.content if response else ""
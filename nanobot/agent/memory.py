@@ -3,6 +3,7 @@
 from pathlib import Path
 from datetime import datetime
 
+from nanobot.utils.filecache import FileCache
 from nanobot.utils.helpers import ensure_dir, today_date
 
 
@@ -13,10 +14,11 @@ class MemoryStore:
     Supports daily notes (memory/YYYY-MM-DD.md) and long-term memory (MEMORY.md).
     """
     
-    def __init__(self, workspace: Path):
+    def __init__(self, workspace: Path, files: FileCache | None = None):
         self.workspace = workspace
         self.memory_dir = ensure_dir(workspace / "memory")
         self.memory_file = self.memory_dir / "MEMORY.md"
+        self.files = files or FileCache()
     
     def get_today_file(self) -> Path:
         """Get path to today's memory file."""
@@ -24,10 +26,7 @@ class MemoryStore:
     
     def read_today(self) -> str:
         """Read today's memory notes."""
-        today_file = self.get_today_file()
-        if today_file.exists():
-            return today_file.read_text(encoding="utf-8")
-        return ""
+        return self.files.read_text(self.get_today_file()) or ""
     
     def append_today(self, content: str) -> None:
         """Append content to today's memory notes."""
@@ -42,16 +41,16 @@ class MemoryStore:
             content = header + content
         
         today_file.write_text(content, encoding="utf-8")
+        self.files.invalidate(today_file)
     
     def read_long_term(self) -> str:
         """Read long-term memory (MEMORY.md)."""
-        if self.memory_file.exists():
-            return self.memory_file.read_text(encoding="utf-8")
-        return ""
+        return self.files.read_text(self.memory_file) or ""
     
     def write_long_term(self, content: str) -> None:
         """Write to long-term memory (MEMORY.md)."""
         self.memory_file.write_text(content, encoding="utf-8")
+        self.files.invalidate(self.memory_file)
     
     def get_recent_memories(self, days: int = 7) -> str:
         """
@@ -3,9 +3,10 @@
 import json
 import os
 import re
-import shutil
 from pathlib import Path
 
+from nanobot.utils.filecache import FileCache
+
 # Default builtin skills directory (relative to this file)
 BUILTIN_SKILLS_DIR = Path(__file__).parent.parent / "skills"
 
@@ -16,12 +17,24 @@ class SkillsLoader:
     
     Skills are markdown files (SKILL.md) that teach the agent how to use
     specific tools or perform certain tasks.
+    
+    Directory listings, file contents, parsed frontmatter and binary
+    lookups are memoized and re-validated by mtime/size, so repeated calls
+    don't touch the disk unless something changed.
     """
     
-    def __init__(self, workspace: Path, builtin_skills_dir: Path | None = None):
+    def __init__(
+        self,
+        workspace: Path,
+        builtin_skills_dir: Path | None = None,
+        files: FileCache | None = None,
+    ):
         self.workspace = workspace
         self.workspace_skills = workspace / "skills"
         self.builtin_skills = builtin_skills_dir or BUILTIN_SKILLS_DIR
+        self.files = files or FileCache()
+        self._metadata: dict[str, tuple[str, dict | None]] = {}  # name -> (content, parsed)
+        self._nanobot_metadata: dict[str, dict] = {}  # raw JSON -> parsed
     
     def list_skills(self, filter_unavailable: bool = True) -> list[dict[str, str]]:
         """
@@ -36,20 +49,17 @@ class SkillsLoader:
         skills = []
         
         # Workspace skills (highest priority)
-        if self.workspace_skills.exists():
-            for skill_dir in self.workspace_skills.iterdir():
-                if skill_dir.is_dir():
-                    skill_file = skill_dir / "SKILL.md"
-                    if skill_file.exists():
-                        skills.append({"name": skill_dir.name, "path": str(skill_file), "source": "workspace"})
+        for skill_dir in self.files.list_dir(self.workspace_skills):
+            skill_file = skill_dir / "SKILL.md"
+            if self.files.read_text(skill_file) is not None:
+                skills.append({"name": skill_dir.name, "path": str(skill_file), "source": "workspace"})
         
         # Built-in skills
-        if self.builtin_skills and self.builtin_skills.exists():
-            for skill_dir in self.builtin_skills.iterdir():
-                if skill_dir.is_dir():
-                    skill_file = skill_dir / "SKILL.md"
-                    if skill_file.exists() and not any(s["name"] == skill_dir.name for s in skills):
-                        skills.append({"name": skill_dir.name, "path": str(skill_file), "source": "builtin"})
+        if self.builtin_skills:
+            for skill_dir in self.files.list_dir(self.builtin_skills):
+                skill_file = skill_dir / "SKILL.md"
+                if self.files.read_text(skill_file) is not None and not any(s["name"] == skill_dir.name for s in skills):
+                    skills.append({"name": skill_dir.name, "path": str(skill_file), "source": "builtin"})
         
         # Filter by requirements
         if filter_unavailable:
@@ -67,15 +77,13 @@ class SkillsLoader:
             Skill content or None if not found.
         """
         # Check workspace first
-        workspace_skill = self.workspace_skills / name / "SKILL.md"
-        if workspace_skill.exists():
-            return workspace_skill.read_text(encoding="utf-8")
+        content = self.files.read_text(self.workspace_skills / name / "SKILL.md")
+        if content is not None:
+            return content
         
         # Check built-in
         if self.builtin_skills:
-            builtin_skill = self.builtin_skills / name / "SKILL.md"
-            if builtin_skill.exists():
-                return builtin_skill.read_text(encoding="utf-8")
+            return self.files.read_text(self.builtin_skills / name / "SKILL.md")
         
         return None
     
@@ -144,7 +152,7 @@ class SkillsLoader:
         missing = []
         requires = skill_meta.get("requires", {})
         for b in requires.get("bins", []):
-            if not shutil.which(b):
+            if not self.files.which(b):
                 missing.append(f"CLI: {b}")
         for env in requires.get("env", []):
             if not os.environ.get(env):
@@ -168,17 +176,23 @@ class SkillsLoader:
     
     def _parse_nanobot_metadata(self, raw: str) -> dict:
         """Parse nanobot metadata JSON from frontmatter."""
+        cached = self._nanobot_metadata.get(raw)
+        if cached is not None:
+            return cached
         try:
             data = json.loads(raw)
-            return data.get("nanobot", {}) if isinstance(data, dict) else {}
+            parsed = data.get("nanobot", {}) if isinstance(data, dict) else {}
         except (json.JSONDecodeError, TypeError):
-            return {}
+            parsed = {}
+        if isinstance(raw, str):
+            self._nanobot_metadata[raw] = parsed
+        return parsed
     
     def _check_requirements(self, skill_meta: dict) -> bool:
         """Check if skill requirements are met (bins, env vars)."""
         requires = skill_meta.get("requires", {})
         for b in requires.get("bins", []):
-            if not shutil.which(b):
+            if not self.files.which(b):
                 return False
         for env in requires.get("env", []):
             if not os.environ.get(env):
@@ -214,6 +228,16 @@ class SkillsLoader:
         if not content:
             return None
         
+        cached = self._metadata.get(name)
+        if cached is not None and cached[0] is content:
+            return cached[1]
+        metadata = self._parse_frontmatter(content)
+        self._metadata[name] = (content, metadata)
+        return metadata
+    
+    @staticmethod
+    def _parse_frontmatter(content: str) -> dict | None:
+        """Parse simple YAML frontmatter into a dict."""
         if content.startswith("---"):
             match = re.match(r"^---\n(.*?)\n---", content, re.DOTALL)
             if match:
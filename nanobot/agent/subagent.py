@@ -2,19 +2,101 @@
 
 import asyncio
 import json
+import os
+import time
 import uuid
+from collections import deque
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
 from loguru import logger
 
-from nanobot.bus.events import InboundMessage
-from nanobot.bus.queue import MessageBus
+from nanobot.bus.events import InboundMessage, SubagentProgress
+from nanobot.bus.queue import MessageBus, PRIORITY_BACKGROUND
 from nanobot.providers.base import LLMProvider
+from nanobot.providers.scheduler import llm_priority
+from nanobot.agent.compaction import ToolResultCompactor
 from nanobot.agent.tools.registry import ToolRegistry
 from nanobot.agent.tools.filesystem import ReadFileTool, WriteFileTool, ListDirTool
 from nanobot.agent.tools.shell import ExecTool
 from nanobot.agent.tools.web import WebSearchTool, WebFetchTool
+from nanobot.agent.tools.expand import ExpandResultTool
+from nanobot.utils.http import HttpClientPool
+
+
+SUBAGENT_STATUSES = ("queued", "running", "done", "failed", "cancelled")
+
+# Finished runs (and closed groups) kept in memory for status queries.
+_MAX_FINISHED = 100
+
+# Result files kept on disk for the subagents tool's "result" action.
+_MAX_STORED_RESULTS = 500
+
+# Characters of results quoted in a group's announcement, split among its tasks.
+_GROUP_PREVIEW_CHARS = 8000
+
+
+@dataclass
+class SubagentRun:
+    """One spawned subagent task and its progress."""
+    id: str
+    label: str
+    task: str
+    origin: dict[str, str]
+    status: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    iterations: int = 0  # LLM rounds completed
+    last_tool: str | None = None
+    result: str | None = None
+    group_id: str | None = None
+    handle: asyncio.Task[None] | None = field(default=None, repr=False)
+    
+    @property
+    def origin_key(self) -> str:
+        return f"{self.origin['channel']}:{self.origin['chat_id']}"
+    
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+    
+    @property
+    def elapsed_s(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+    
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "label": self.label,
+            "origin": self.origin_key,
+            "status": self.status,
+            "iterations": self.iterations,
+            "elapsed_s": round(self.elapsed_s, 1),
+            "last_tool": self.last_tool,
+            "group": self.group_id,
+            "created_at": self.created_at,
+        }
+
+
+@dataclass
+class SubagentGroup:
+    """Subagents spawned together whose results are announced once."""
+    id: str
+    label: str
+    origin: dict[str, str]
+    task_ids: list[str]
+    quorum: int | None  # Successful results needed before announcing; None = wait for all
+    created_at: float = field(default_factory=time.time)
+    closed_at: float | None = None
+    timer: asyncio.TimerHandle | None = field(default=None, repr=False)
+    
+    @property
+    def origin_key(self) -> str:
+        return f"{self.origin['channel']}:{self.origin['chat_id']}"
 
 
 class SubagentManager:
@@ -24,6 +106,24 @@ class SubagentManager:
     Subagents are lightweight agent instances that run in the background
     to handle specific tasks. They share the same LLM provider but have
     isolated context and a focused system prompt.
+    
+    Spawned subagents go through a pool: at most `max_concurrent` run at
+    once overall and `max_per_origin` per chat, the rest wait in a queue
+    (served in spawn order) of up to `max_queued`. All subagents share one
+    prebuilt tool registry. While any are running, a monitor publishes
+    progress to the bus every `progress_interval_s`.
+    
+    Each finished subagent is announced to the main agent separately,
+    which costs it a turn. A group (spawn_group) is instead announced once,
+    when all its tasks have finished, when `quorum` of them have succeeded
+    or at its deadline, whichever comes first; unfinished tasks are then
+    cancelled. Announcements quote the results; the full text stays
+    available through get_result.
+    
+    With a `state_dir`, the monitor also writes the pool's status to
+    ``status.json`` there and cancels subagents whose ID appears as a file
+    in ``cancel/`` (this is how the CLI reaches a running gateway).
+    Results are kept in ``results/`` so they outlive the process.
     """
     
     def __init__(
@@ -34,15 +134,58 @@ class SubagentManager:
         model: str | None = None,
         brave_api_key: str | None = None,
         exec_config: "ExecToolConfig | None" = None,
+        http: HttpClientPool | None = None,
+        compaction_config: "ToolCompactionConfig | None" = None,
+        config: "SubagentsConfig | None" = None,
+        state_dir: Path | None = None,
+        exec_slots: asyncio.Semaphore | None = None,
     ):
-        from nanobot.config.schema import ExecToolConfig
+        from nanobot.config.schema import ExecToolConfig, SubagentsConfig, ToolCompactionConfig
         self.provider = provider
         self.workspace = workspace
         self.bus = bus
         self.model = model or provider.get_default_model()
         self.brave_api_key = brave_api_key
         self.exec_config = exec_config or ExecToolConfig()
-        self._running_tasks: dict[str, asyncio.Task[None]] = {}
+        self.compaction_config = compaction_config or ToolCompactionConfig()
+        self.config = config or SubagentsConfig()
+        self.state_dir = state_dir
+        self.http = http
+        self.exec_slots = exec_slots or asyncio.Semaphore(self.exec_config.max_concurrent)
+        self.tools = self._build_tools()
+        self._runs: dict[str, SubagentRun] = {}
+        self._groups: dict[str, SubagentGroup] = {}
+        self._queue: deque[str] = deque()  # IDs waiting for a slot, in spawn order
+        self._running_by_origin: dict[str, int] = {}
+        self._running_count = 0
+        self._monitor_task: asyncio.Task[None] | None = None
+        self._announcements: set[asyncio.Task[None]] = set()  # Held until published
+    
+    def _build_tools(self) -> ToolRegistry:
+        """Build the tools shared by all subagents (no message tool, no spawn tool)."""
+        tools = ToolRegistry()
+        tools.register(ReadFileTool())
+        tools.register(WriteFileTool())
+        tools.register(ListDirTool())
+        tools.register(ExecTool(
+            working_dir=str(self.workspace),
+            timeout=self.exec_config.timeout,
+            restrict_to_workspace=self.exec_config.restrict_to_workspace,
+            max_output_chars=self.exec_config.max_output_chars,
+            max_output_bytes=self.exec_config.max_output_bytes,
+            persistent_shell=self.exec_config.persistent_shell,
+            shell_idle_s=self.exec_config.shell_idle_s,
+            cpu_limit_s=self.exec_config.cpu_limit_s,
+            memory_limit_mb=self.exec_config.memory_limit_mb,
+            open_files_limit=self.exec_config.open_files_limit,
+            process_limit=self.exec_config.process_limit,
+            slots=self.exec_slots,
+        ))
+        tools.register(WebSearchTool(api_key=self.brave_api_key, http=self.http))
+        tools.register(WebFetchTool(http=self.http))
+        if self.compaction_config.enabled:
+            tools.register(ExpandResultTool())  # Its compactor is set per subagent task
+        return tools
     
     async def spawn(
         self,
@@ -61,51 +204,429 @@ class SubagentManager:
             origin_chat_id: The chat ID to announce results to.
         
         Returns:
-            Status message indicating the subagent was started.
+            Status message indicating the subagent was started or queued.
         """
-        task_id = str(uuid.uuid4())[:8]
-        display_label = label or task[:30] + ("..." if len(task) > 30 else "")
+        if len(self._queue) >= self.config.max_queued:
+            return (
+                f"Error: {len(self._queue)} subagents are already waiting to run. "
+                "Wait for some to finish (or cancel them) before spawning more."
+            )
         
-        origin = {
-            "channel": origin_channel,
-            "chat_id": origin_chat_id,
-        }
+        run = self._add_run(task, label, {"channel": origin_channel, "chat_id": origin_chat_id})
+        task_id, display_label = run.id, run.label
+        self._pump()
+        self._ensure_monitor()
         
-        # Create background task
-        bg_task = asyncio.create_task(
-            self._run_subagent(task_id, task, display_label, origin)
+        if run.status == "running":
+            logger.info(f"Spawned subagent [{task_id}]: {display_label}")
+            return f"Subagent [{display_label}] started (id: {task_id}). I'll notify you when it completes."
+        logger.info(f"Queued subagent [{task_id}]: {display_label}")
+        return (
+            f"Subagent [{display_label}] queued (id: {task_id}, {len(self._queue)} waiting). "
+            "It will start when a slot frees up, and I'll notify you when it completes."
         )
-        self._running_tasks[task_id] = bg_task
+    
+    async def spawn_group(
+        self,
+        tasks: list[str],
+        label: str | None = None,
+        quorum: int | None = None,
+        deadline_s: float | None = None,
+        origin_channel: str = "cli",
+        origin_chat_id: str = "direct",
+    ) -> str:
+        """
+        Spawn subagents for several tasks and announce their results together.
+        
+        Args:
+            tasks: The task descriptions, one subagent each.
+            label: Optional human-readable label for the group.
+            quorum: Announce once this many tasks have succeeded (default: all).
+            deadline_s: Announce after this many seconds at the latest.
+            origin_channel: The channel to announce results to.
+            origin_chat_id: The chat ID to announce results to.
+        
+        Returns:
+            Status message with the group ID.
+        """
+        if not tasks:
+            return "Error: no tasks given"
+        if len(self._queue) + len(tasks) > self.config.max_queued:
+            return (
+                f"Error: {len(tasks)} tasks don't fit in the subagent queue "
+                f"({len(self._queue)} of {self.config.max_queued} places taken). "
+                "Spawn fewer tasks, or wait for running subagents to finish."
+            )
         
-        # Cleanup when done
-        bg_task.add_done_callback(lambda _: self._running_tasks.pop(task_id, None))
+        group_id = str(uuid.uuid4())[:8]
+        origin = {"channel": origin_channel, "chat_id": origin_chat_id}
+        runs = [self._add_run(task, None, origin, group_id) for task in tasks]
+        group = SubagentGroup(
+            id=group_id,
+            label=label or f"{len(tasks)} tasks",
+            origin=origin,
+            task_ids=[run.id for run in runs],
+            quorum=quorum if quorum and quorum < len(tasks) else None,
+        )
+        self._groups[group_id] = group
+        if deadline_s:
+            group.timer = asyncio.get_running_loop().call_later(
+                deadline_s, self._close_group, group, f"deadline of {deadline_s:g}s reached"
+            )
+        self._pump()
+        self._ensure_monitor()
         
-        logger.info(f"Spawned subagent [{task_id}]: {display_label}")
-        return f"Subagent [{display_label}] started (id: {task_id}). I'll notify you when it completes."
+        logger.info(f"Spawned subagent group [{group_id}] of {len(tasks)}: {group.label}")
+        waiting_for = f"{group.quorum} have succeeded" if group.quorum else "all of them finish"
+        if deadline_s:
+            waiting_for += f" (or after {deadline_s:g}s)"
+        ids = ", ".join(group.task_ids)
+        return (
+            f"Subagent group [{group.label}] spawned (group id: {group_id}, task ids: {ids}). "
+            f"I'll report all results together once {waiting_for}."
+        )
     
-    async def _run_subagent(
+    def _add_run(
         self,
-        task_id: str,
         task: str,
-        label: str,
+        label: str | None,
         origin: dict[str, str],
-    ) -> None:
+        group_id: str | None = None,
+    ) -> SubagentRun:
+        task_id = str(uuid.uuid4())[:8]
+        run = SubagentRun(
+            id=task_id,
+            label=label or task[:30] + ("..." if len(task) > 30 else ""),
+            task=task,
+            origin=origin,
+            group_id=group_id,
+        )
+        self._runs[task_id] = run
+        self._queue.append(task_id)
+        return run
+    
+    def cancel(self, task_id: str, origin: str | None = None) -> bool:
+        """
+        Cancel a queued or running subagent, or a whole group.
+        
+        A cancelled group is not announced.
+        
+        Args:
+            task_id: The subagent or group ID.
+            origin: If given, only cancel it if it was spawned from this session.
+        
+        Returns:
+            True if it was cancelled.
+        """
+        group = self._groups.get(task_id)
+        if group is not None:
+            if group.closed_at is not None or (origin is not None and group.origin_key != origin):
+                return False
+            self._close_group(group, reason=None)
+            logger.info(f"Cancelled subagent group [{task_id}]")
+            return True
+        
+        run = self._runs.get(task_id)
+        if run is None or (origin is not None and run.origin_key != origin):
+            return False
+        if run.status == "queued":
+            self._queue.remove(task_id)
+            run.status = "cancelled"
+            run.finished_at = time.time()
+            self._check_group(run)
+        elif run.status == "running" and run.handle is not None:
+            run.handle.cancel()
+        else:
+            return False
+        logger.info(f"Cancelled subagent [{task_id}]")
+        return True
+    
+    def get_result(self, task_id: str, origin: str | None = None) -> str | None:
+        """
+        Full result of a finished subagent, or of every task in a group.
+        
+        Args:
+            task_id: The subagent or group ID.
+            origin: If given, only return results spawned from this session.
+        
+        Returns:
+            The result text, or None if there is none (yet).
+        """
+        group = self._groups.get(task_id)
+        if group is not None:
+            if origin is not None and group.origin_key != origin:
+                return None
+            parts = []
+            for i, member_id in enumerate(group.task_ids, 1):
+                run = self._runs.get(member_id)
+                result = self.get_result(member_id, origin)
+                status = run.status if run else "finished"
+                parts.append(f"## Task {i} [{member_id}] ({status})\n\n{result or '(no result)'}")
+            return "\n\n".join(parts)
+        
+        run = self._runs.get(task_id)
+        if run is not None:
+            if origin is not None and run.origin_key != origin:
+                return None
+            return run.result
+        data = self._load_result(task_id)
+        if data is None or (origin is not None and data.get("origin") != origin):
+            return None
+        return data.get("result")
+    
+    def list_runs(self, origin: str | None = None) -> list[SubagentRun]:
+        """List known subagents (optionally only one session's), newest first."""
+        runs = [r for r in self._runs.values() if origin is None or r.origin_key == origin]
+        return sorted(runs, key=lambda r: r.created_at, reverse=True)
+    
+    def status(self) -> dict[str, Any]:
+        """Pool occupancy and every known subagent."""
+        return {
+            "running": self._running_count,
+            "queued": len(self._queue),
+            "max_concurrent": self.config.max_concurrent,
+            "max_per_origin": self.config.max_per_origin,
+            "subagents": [r.to_dict() for r in self.list_runs()],
+        }
+    
+    def _pump(self) -> None:
+        """Start queued subagents while there are free slots."""
+        if not self._queue:
+            return
+        waiting: deque[str] = deque()
+        while self._queue:
+            task_id = self._queue.popleft()
+            run = self._runs[task_id]
+            if (
+                self._running_count < self.config.max_concurrent
+                and self._running_by_origin.get(run.origin_key, 0) < self.config.max_per_origin
+            ):
+                self._start(run)
+            else:
+                waiting.append(task_id)
+        self._queue = waiting
+    
+    def _start(self, run: SubagentRun) -> None:
+        run.status = "running"
+        run.started_at = time.time()
+        self._running_count += 1
+        self._running_by_origin[run.origin_key] = self._running_by_origin.get(run.origin_key, 0) + 1
+        # Its LLM calls queue behind interactive turns.
+        with llm_priority(PRIORITY_BACKGROUND):
+            run.handle = asyncio.create_task(self._run_subagent(run))
+        run.handle.add_done_callback(lambda _: self._finished(run))
+    
+    def _finished(self, run: SubagentRun) -> None:
+        if run.status == "running":
+            run.status = "cancelled"
+        run.finished_at = time.time()
+        self._store_result(run)
+        self._check_group(run)
+        run.handle = None
+        self._running_count -= 1
+        left = self._running_by_origin.get(run.origin_key, 1) - 1
+        if left > 0:
+            self._running_by_origin[run.origin_key] = left
+        else:
+            self._running_by_origin.pop(run.origin_key, None)
+        self._prune()
+        self._pump()
+    
+    def _prune(self) -> None:
+        # Members of an open group are kept: its announcement still needs them.
+        finished = [
+            r for r in self._runs.values()
+            if r.finished_at is not None and not self._in_open_group(r)
+        ]
+        for run in sorted(finished, key=lambda r: r.finished_at)[:-_MAX_FINISHED or None]:
+            del self._runs[run.id]
+        closed = [g for g in self._groups.values() if g.closed_at is not None]
+        for group in sorted(closed, key=lambda g: g.closed_at)[:-_MAX_FINISHED or None]:
+            del self._groups[group.id]
+    
+    def _in_open_group(self, run: SubagentRun) -> bool:
+        group = self._groups.get(run.group_id or "")
+        return group is not None and group.closed_at is None
+    
+    def _check_group(self, run: SubagentRun) -> None:
+        """Close a run's group once it has enough results (or can't get them)."""
+        group = self._groups.get(run.group_id or "")
+        if group is None or group.closed_at is not None:
+            return
+        members = [self._runs[i] for i in group.task_ids if i in self._runs]
+        succeeded = sum(1 for r in members if r.status == "done")
+        pending = sum(1 for r in members if not r.finished)
+        if not pending:
+            self._close_group(group, "all tasks finished")
+        elif group.quorum is None:
+            return
+        elif succeeded >= group.quorum:
+            self._close_group(group, f"{succeeded} of {len(members)} tasks succeeded")
+        elif succeeded + pending < group.quorum:
+            self._close_group(group, "too many tasks failed to reach the quorum")
+    
+    def _close_group(self, group: SubagentGroup, reason: str | None) -> None:
+        """
+        Announce a group's results and cancel its unfinished tasks.
+        
+        With no reason, the group was cancelled and is not announced.
+        """
+        if group.closed_at is not None:
+            return
+        group.closed_at = time.time()
+        if group.timer is not None:
+            group.timer.cancel()
+            group.timer = None
+        members = [self._runs[i] for i in group.task_ids if i in self._runs]
+        if reason is not None:
+            content = self._group_announcement(group, members, reason)
+            task = asyncio.create_task(self._publish_announcement(group.origin, content))
+            self._announcements.add(task)
+            task.add_done_callback(self._announcements.discard)
+            logger.info(f"Subagent group [{group.id}] closed: {reason}")
+        for run in members:
+            if not run.finished:
+                self.cancel(run.id)
+    
+    def _group_announcement(
+        self,
+        group: SubagentGroup,
+        members: list[SubagentRun],
+        reason: str,
+    ) -> str:
+        succeeded = sum(1 for r in members if r.status == "done")
+        preview = max(500, _GROUP_PREVIEW_CHARS // max(1, len(members)))
+        sections = []
+        truncated = False
+        for i, run in enumerate(members, 1):
+            if run.finished:
+                status = {"done": "completed", "failed": "failed", "cancelled": "cancelled"}[run.status]
+            else:
+                status = "not finished, cancelled"
+            section = f"### Task {i} [{run.id}]: {run.label} ({status})"
+            if run.result:
+                text = run.result
+                if len(text) > preview:
+                    text = text[:preview] + "\n[...]"
+                    truncated = True
+                section += f"\n{text}"
+            sections.append(section)
+        
+        content = (
+            f"[Subagent group '{group.label}' finished: {succeeded} of {len(members)} "
+            f"tasks completed successfully; {reason}]\n\n" + "\n\n".join(sections)
+        )
+        if truncated:
+            content += (
+                "\n\nSome results above are shortened. Read them in full with the subagents "
+                f"tool (action \"result\", task_id \"{group.id}\" or a task's ID) if needed."
+            )
+        content += (
+            "\n\nSummarize these results naturally for the user in one reply. "
+            "Do not mention technical details like \"subagent\" or task IDs."
+        )
+        return content
+    
+    def _results_dir(self) -> Path | None:
+        return self.state_dir / "results" if self.state_dir else None
+    
+    def _store_result(self, run: SubagentRun) -> None:
+        results_dir = self._results_dir()
+        if results_dir is None or run.result is None:
+            return
+        data = {
+            "id": run.id,
+            "label": run.label,
+            "origin": run.origin_key,
+            "group": run.group_id,
+            "status": run.status,
+            "result": run.result,
+            "finished_at": run.finished_at,
+        }
+        try:
+            results_dir.mkdir(parents=True, exist_ok=True)
+            tmp = results_dir / f"{run.id}.json.tmp"
+            tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, results_dir / f"{run.id}.json")
+            files = sorted(results_dir.glob("*.json"), key=lambda f: f.stat().st_mtime)
+            for old in files[:-_MAX_STORED_RESULTS]:
+                old.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"Failed to store subagent result: {e}")
+    
+    def _load_result(self, task_id: str) -> dict[str, Any] | None:
+        results_dir = self._results_dir()
+        if results_dir is None or not task_id.isalnum():
+            return None
+        try:
+            return json.loads((results_dir / f"{task_id}.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+    
+    def _ensure_monitor(self) -> None:
+        if self._monitor_task is None or self._monitor_task.done():
+            self._monitor_task = asyncio.create_task(self._monitor())
+    
+    async def _monitor(self) -> None:
+        """Publish progress and serve CLI cancel requests while subagents are active."""
+        interval = self.config.progress_interval_s
+        last_progress = time.monotonic()
+        while True:
+            self._process_cancel_requests()
+            self._write_status()
+            if not self._running_count and not self._queue:
+                return
+            if interval > 0 and time.monotonic() - last_progress >= interval:
+                last_progress = time.monotonic()
+                for run in list(self._runs.values()):
+                    if run.status == "running":
+                        await self.bus.publish_progress(SubagentProgress(
+                            channel=run.origin["channel"],
+                            chat_id=run.origin["chat_id"],
+                            task_id=run.id,
+                            label=run.label,
+                            status=run.status,
+                            iterations=run.iterations,
+                            elapsed_s=run.elapsed_s,
+                            last_tool=run.last_tool,
+                        ))
+            await asyncio.sleep(min(interval, 1.0) if interval > 0 else 1.0)
+    
+    def _process_cancel_requests(self) -> None:
+        if not self.state_dir:
+            return
+        cancel_dir = self.state_dir / "cancel"
+        if not cancel_dir.is_dir():
+            return
+        for request in cancel_dir.iterdir():
+            self.cancel(request.name)
+            request.unlink(missing_ok=True)
+    
+    def _write_status(self) -> None:
+        if not self.state_dir:
+            return
+        try:
+            self.state_dir.mkdir(parents=True, exist_ok=True)
+            tmp = self.state_dir / "status.json.tmp"
+            tmp.write_text(json.dumps({"updated_at": time.time(), **self.status()}, indent=2))
+            os.replace(tmp, self.state_dir / "status.json")
+        except OSError as e:
+            logger.warning(f"Failed to write subagent status: {e}")
+    
+    async def _run_subagent(self, run: SubagentRun) -> None:
         """Execute the subagent task and announce the result."""
+        task_id, task, label, origin = run.id, run.task, run.label, run.origin
         logger.info(f"Subagent [{task_id}] starting task: {label}")
         
         try:
-            # Build subagent tools (no message tool, no spawn tool)
-            tools = ToolRegistry()
-            tools.register(ReadFileTool())
-            tools.register(WriteFileTool())
-            tools.register(ListDirTool())
-            tools.register(ExecTool(
-                working_dir=str(self.workspace),
-                timeout=self.exec_config.timeout,
-                restrict_to_workspace=self.exec_config.restrict_to_workspace,
-            ))
-            tools.register(WebSearchTool(api_key=self.brave_api_key))
-            tools.register(WebFetchTool())
+            tools = self.tools
+            compactor = ToolResultCompactor(self.compaction_config)
+            expand_tool = tools.get("expand_result")
+            if isinstance(expand_tool, ExpandResultTool):
+                expand_tool.set_context(compactor)
+            exec_tool = tools.get("exec")
+            if isinstance(exec_tool, ExecTool):
+                exec_tool.set_context(f"subagent:{task_id}")  # Its own shell, if persistent
             
             # Build messages with subagent-specific prompt
             system_prompt = self._build_subagent_prompt(task)
@@ -115,7 +636,7 @@ class SubagentManager:
             ]
             
             # Run agent loop (limited iterations)
-            max_iterations = 15
+            max_iterations = self.config.max_iterations
             iteration = 0
             final_result: str | None = None
             
@@ -127,6 +648,10 @@ class SubagentManager:
                     tools=tools.get_definitions(),
                     model=self.model,
                 )
+                run.iterations = iteration
+                
+                if response.finish_reason == "error":
+                    raise RuntimeError(response.content or "LLM call failed")
                 
                 if response.has_tool_calls:
                     # Add assistant message with tool calls
@@ -147,16 +672,21 @@ class SubagentManager:
                         "tool_calls": tool_call_dicts,
                     })
                     
-                    # Execute tools
+                    # Execute tools (independent calls run concurrently)
                     for tool_call in response.tool_calls:
                         logger.debug(f"Subagent [{task_id}] executing: {tool_call.name}")
-                        result = await tools.execute(tool_call.name, tool_call.arguments)
+                    run.last_tool = ", ".join(tc.name for tc in response.tool_calls)
+                    results = await tools.execute_batch(
+                        [(tc.name, tc.arguments) for tc in response.tool_calls]
+                    )
+                    for tool_call, result in zip(response.tool_calls, results):
                         messages.append({
                             "role": "tool",
                             "tool_call_id": tool_call.id,
                             "name": tool_call.name,
                             "content": result,
                         })
+                    compactor.compact(messages)
                 else:
                     final_result = response.content
                     break
@@ -165,12 +695,21 @@ class SubagentManager:
                 final_result = "Task completed but no final response was generated."
             
             logger.info(f"Subagent [{task_id}] completed successfully")
-            await self._announce_result(task_id, label, task, final_result, origin, "ok")
-            
+            run.status, run.result = "done", final_result
+            if run.group_id is None:
+                await self._announce_result(task_id, label, task, final_result, origin, "ok")
+        
         except Exception as e:
             error_msg = f"Error: {str(e)}"
             logger.error(f"Subagent [{task_id}] failed: {e}")
-            await self._announce_result(task_id, label, task, error_msg, origin, "error")
+            run.status, run.result = "failed", error_msg
+            if run.group_id is None:
+                await self._announce_result(task_id, label, task, error_msg, origin, "error")
+        
+        finally:
+            exec_tool = self.tools.get("exec")
+            if isinstance(exec_tool, ExecTool):
+                await exec_tool.close_session(f"subagent:{task_id}")
     
     async def _announce_result(
         self,
@@ -193,16 +732,18 @@ Result:
 
 Summarize this naturally for the user. Keep it brief (1-2 sentences). Do not mention technical details like "subagent" or task IDs."""
         
+        await self._publish_announcement(origin, announce_content)
+        logger.debug(f"Subagent [{task_id}] announced result to {origin['channel']}:{origin['chat_id']}")
+    
+    async def _publish_announcement(self, origin: dict[str, str], content: str) -> None:
         # Inject as system message to trigger main agent
         msg = InboundMessage(
             channel="system",
             sender_id="subagent",
             chat_id=f"{origin['channel']}:{origin['chat_id']}",
-            content=announce_content,
+            content=content,
         )
-        
         await self.bus.publish_inbound(msg)
-        logger.debug(f"Subagent [{task_id}] announced result to {origin['channel']}:{origin['chat_id']}")
     
     def _build_subagent_prompt(self, task: str) -> str:
         """Build a focused system prompt for the subagent."""
@@ -237,4 +778,4 @@ When you have completed the task, provide a clear summary of your findings or ac
     
     def get_running_count(self) -> int:
         """Return the number of currently running subagents."""
-        return len(self._running_tasks)
+        return self._running_count
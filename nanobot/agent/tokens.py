@@ -0,0 +1,103 @@
+"""Token counting for context budgeting."""
+
+import json
+from functools import lru_cache
+from typing import Any, Callable
+
+from loguru import logger
+
+Tokenizer = Callable[[str], int]
+
+# Per-message framing (role, separators) added by chat templates.
+MESSAGE_OVERHEAD = 4
+
+# Rough cost of an attached image; providers bill roughly this for a mid-size one.
+IMAGE_TOKENS = 800
+
+DEFAULT_CONTEXT_WINDOW = 32768
+
+
+def heuristic_tokens(text: str) -> int:
+    """
+    Estimate tokens without a tokenizer.
+    
+    About four characters per token for ASCII text and one token per
+    character for CJK and other multi-byte scripts. Errs on the high side.
+    """
+    if not text:
+        return 0
+    chars = len(text)
+    # Most non-ASCII characters in chat text take 3 UTF-8 bytes.
+    wide = min(chars, (len(text.encode("utf-8")) - chars) // 2)
+    return (chars - wide + 3) // 4 + wide
+
+
+def get_tokenizer(name: str = "auto") -> Tokenizer:
+    """
+    Get a token counter by name.
+    
+    "tiktoken" uses the cl100k encoding bundled with LiteLLM (exact for
+    OpenAI models, a close estimate for others); "heuristic" needs no
+    tokenizer at all; "auto" uses tiktoken if it loads and falls back to
+    the heuristic.
+    """
+    if name == "heuristic":
+        return heuristic_tokens
+    
+    try:
+        from litellm.litellm_core_utils.default_encoding import encoding
+    except Exception as e:
+        if name == "tiktoken":
+            raise
+        logger.warning(f"tiktoken unavailable ({e}); estimating tokens heuristically")
+        return heuristic_tokens
+    
+    @lru_cache(maxsize=4096)
+    def count(text: str) -> int:
+        return len(encoding.encode(text, disallowed_special=()))
+    
+    return count
+
+
+def count_message_tokens(message: dict[str, Any], tokenizer: Tokenizer) -> int:
+    """Count the tokens a chat message costs in a prompt."""
+    tokens = MESSAGE_OVERHEAD
+    content = message.get("content")
+    if isinstance(content, str):
+        tokens += tokenizer(content)
+    elif isinstance(content, list):
+        for block in content:
+            if block.get("type") == "text":
+                tokens += tokenizer(block.get("text", ""))
+            else:
+                tokens += IMAGE_TOKENS
+    for tc in message.get("tool_calls") or []:
+        fn = tc.get("function", {})
+        tokens += MESSAGE_OVERHEAD + tokenizer(fn.get("name", "")) + tokenizer(fn.get("arguments", ""))
+    return tokens
+
+
+def count_tools_tokens(tools: list[dict[str, Any]] | None, tokenizer: Tokenizer) -> int:
+    """Count the tokens taken by tool definitions."""
+    if not tools:
+        return 0
+    return tokenizer(json.dumps(tools))
+
+
+def context_window(model: str, default: int = DEFAULT_CONTEXT_WINDOW) -> int:
+    """Look up a model's input token limit, or `default` if it is unknown."""
+    import litellm
+    
+    candidates = [model]
+    if "/" in model:
+        candidates.append(model.split("/", 1)[1])
+    for candidate in candidates:
+        try:
+            info = litellm.get_model_info(candidate)
+        except Exception:
+            continue
+        limit = info.get("max_input_tokens") or info.get("max_tokens")
+        if limit:
+            return int(limit)
+    logger.info(f"Unknown context window for {model}; assuming {default} tokens")
+    return default
@@ -1,7 +1,19 @@
 """Base class for agent tools."""
 
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Callable
+
+# A compiled schema check: (value, path, errors) -> None, appending any errors.
+Validator = Callable[[Any, str, list[str]], None]
+
+_TYPE_MAP: dict[str, type | tuple[type, ...]] = {
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "array": list,
+    "object": dict,
+}
 
 
 class Tool(ABC):
@@ -12,14 +24,7 @@ class Tool(ABC):
     the environment, such as reading files, executing commands, etc.
     """
     
-    _TYPE_MAP = {
-        "string": str,
-        "integer": int,
-        "number": (int, float),
-        "boolean": bool,
-        "array": list,
-        "object": dict,
-    }
+    _validator: Validator | None = None  # Compiled from `parameters`
     
     @property
     @abstractmethod
@@ -52,43 +57,47 @@ class Tool(ABC):
         """
         pass
 
+    def concurrency_key(self, params: dict[str, Any]) -> str | None:
+        """
+        Resource that a call of this tool touches.
+        
+        Within one LLM turn, calls touching the same resource run in their
+        original order unless both are read-only. A key ending in "*" is a
+        wildcard (e.g. "path:*") that orders the call after/before every
+        call whose key shares the prefix, unless both are read-only. Calls
+        returning None may run concurrently with everything else.
+        
+        Args:
+            params: The parameters the tool will be called with.
+        
+        Returns:
+            Resource key, or None if the call is safe to run concurrently.
+        """
+        return None
+
+    def is_read_only(self, params: dict[str, Any]) -> bool:
+        """Whether a call only reads its `concurrency_key` resource."""
+        return False
+
     def validate_params(self, params: dict[str, Any]) -> list[str]:
         """Validate tool parameters against JSON schema. Returns error list (empty if valid)."""
+        validator = self._validator or self.compile_validator()
+        errors: list[str] = []
+        validator(params, "", errors)
+        return errors
+    
+    def compile_validator(self) -> "Validator":
+        """
+        Compile the parameter schema into a validator function.
+        
+        Called by ToolRegistry.register() (and lazily otherwise); the
+        schema is walked once here instead of on every call.
+        """
         schema = self.parameters or {}
         if schema.get("type", "object") != "object":
             raise ValueError(f"Schema must be object type, got {schema.get('type')!r}")
-        return self._validate(params, {**schema, "type": "object"}, "")
-
-    def _validate(self, val: Any, schema: dict[str, Any], path: str) -> list[str]:
-        t, label = schema.get("type"), path or "parameter"
-        if t in self._TYPE_MAP and not isinstance(val, self._TYPE_MAP[t]):
-            return [f"{label} should be {t}"]
-        
-        errors = []
-        if "enum" in schema and val not in schema["enum"]:
-            errors.append(f"{label} must be one of {schema['enum']}")
-        if t in ("integer", "number"):
-            if "minimum" in schema and val < schema["minimum"]:
-                errors.append(f"{label} must be >= {schema['minimum']}")
-            if "maximum" in schema and val > schema["maximum"]:
-                errors.append(f"{label} must be <= {schema['maximum']}")
-        if t == "string":
-            if "minLength" in schema and len(val) < schema["minLength"]:
-                errors.append(f"{label} must be at least {schema['minLength']} chars")
-            if "maxLength" in schema and len(val) > schema["maxLength"]:
-                errors.append(f"{label} must be at most {schema['maxLength']} chars")
-        if t == "object":
-            props = schema.get("properties", {})
-            for k in schema.get("required", []):
-                if k not in val:
-                    errors.append(f"missing required {path + '.' + k if path else k}")
-            for k, v in val.items():
-                if k in props:
-                    errors.extend(self._validate(v, props[k], path + '.' + k if path else k))
-        if t == "array" and "items" in schema:
-            for i, item in enumerate(val):
-                errors.extend(self._validate(item, schema["items"], f"{path}[{i}]" if path else f"[{i}]"))
-        return errors
+        self._validator = compile_schema({**schema, "type": "object"})
+        return self._validator
     
     def to_schema(self) -> dict[str, Any]:
         """Convert tool to OpenAI function schema format."""
@@ -100,3 +109,94 @@ class Tool(ABC):
                 "parameters": self.parameters,
             }
         }
+
+
+def _accept(val: Any, path: str, errors: list[str]) -> None:
+    pass
+
+
+def compile_schema(schema: dict[str, Any]) -> Validator:
+    """
+    Compile a JSON schema into a validator function.
+    
+    Supports the subset tools use (type, enum, minimum/maximum,
+    minLength/maxLength, properties/required, items). Only the checks a
+    schema node actually declares end up in its validator.
+    """
+    t = schema.get("type")
+    expected = _TYPE_MAP.get(t) if isinstance(t, str) else None
+    checks: list[Validator] = []
+    
+    if "enum" in schema:
+        enum = schema["enum"]
+        
+        def check_enum(val: Any, path: str, errors: list[str]) -> None:
+            if val not in enum:
+                errors.append(f"{path or 'parameter'} must be one of {enum}")
+        checks.append(check_enum)
+    
+    if t in ("integer", "number"):
+        if "minimum" in schema:
+            minimum = schema["minimum"]
+            
+            def check_minimum(val: Any, path: str, errors: list[str]) -> None:
+                if val < minimum:
+                    errors.append(f"{path or 'parameter'} must be >= {minimum}")
+            checks.append(check_minimum)
+        if "maximum" in schema:
+            maximum = schema["maximum"]
+            
+            def check_maximum(val: Any, path: str, errors: list[str]) -> None:
+                if val > maximum:
+                    errors.append(f"{path or 'parameter'} must be <= {maximum}")
+            checks.append(check_maximum)
+    
+    if t == "string":
+        if "minLength" in schema:
+            min_length = schema["minLength"]
+            
+            def check_min_length(val: Any, path: str, errors: list[str]) -> None:
+                if len(val) < min_length:
+                    errors.append(f"{path or 'parameter'} must be at least {min_length} chars")
+            checks.append(check_min_length)
+        if "maxLength" in schema:
+            max_length = schema["maxLength"]
+            
+            def check_max_length(val: Any, path: str, errors: list[str]) -> None:
+                if len(val) > max_length:
+                    errors.append(f"{path or 'parameter'} must be at most {max_length} chars")
+            checks.append(check_max_length)
+    
+    if t == "object":
+        required = tuple(schema.get("required", []))
+        props = {k: compile_schema(v) for k, v in schema.get("properties", {}).items()}
+        
+        def check_object(val: dict[str, Any], path: str, errors: list[str]) -> None:
+            for k in required:
+                if k not in val:
+                    errors.append(f"missing required {path + '.' + k if path else k}")
+            for k, v in val.items():
+                validate = props.get(k)
+                if validate is not None:
+                    validate(v, path + '.' + k if path else k, errors)
+        if required or props:
+            checks.append(check_object)
+    
+    if t == "array" and "items" in schema:
+        validate_item = compile_schema(schema["items"])
+        
+        def check_items(val: list[Any], path: str, errors: list[str]) -> None:
+            for i, item in enumerate(val):
+                validate_item(item, f"{path}[{i}]" if path else f"[{i}]", errors)
+        checks.append(check_items)
+    
+    if expected is None and not checks:
+        return _accept
+    
+    def validate(val: Any, path: str, errors: list[str]) -> None:
+        if expected is not None and not isinstance(val, expected):
+            errors.append(f"{path or 'parameter'} should be {t}")
+            return
+        for check in checks:
+            check(val, path, errors)
+    return validate
@@ -0,0 +1,62 @@
+"""Expand tool: read back compacted tool results."""
+
+from contextvars import ContextVar
+from typing import Any
+
+from nanobot.agent.compaction import ToolResultCompactor
+from nanobot.agent.tools.base import Tool
+
+
+class ExpandResultTool(Tool):
+    """Tool to read the full output of a tool call that was compacted."""
+    
+    def __init__(self):
+        # The compactor is per turn, so concurrent sessions each see their own.
+        self._compactor: ContextVar[ToolResultCompactor | None] = ContextVar(
+            f"expand_result_{id(self)}", default=None
+        )
+    
+    def set_context(self, compactor: ToolResultCompactor) -> None:
+        """Set the compactor of the current turn (for the running task only)."""
+        self._compactor.set(compactor)
+    
+    @property
+    def name(self) -> str:
+        return "expand_result"
+    
+    @property
+    def description(self) -> str:
+        return (
+            "Read the full output of an earlier tool call whose result was shortened "
+            "to save context. Pass the handle given in the shortened result; "
+            "use offset to page through long output."
+        )
+    
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "handle": {
+                    "type": "string",
+                    "description": "Handle from the shortened result"
+                },
+                "offset": {
+                    "type": "integer",
+                    "description": "Character offset to start reading from",
+                    "minimum": 0
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "Maximum characters to return (default 20000)",
+                    "minimum": 1
+                }
+            },
+            "required": ["handle"]
+        }
+    
+    async def execute(self, handle: str, offset: int = 0, limit: int = 20000, **kwargs: Any) -> str:
+        compactor = self._compactor.get()
+        if compactor is None:
+            return f"Error: Unknown result handle '{handle}'"
+        return compactor.expand(handle, offset, limit)
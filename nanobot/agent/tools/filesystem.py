@@ -1,11 +1,28 @@
 """File system tools: read, write, edit."""
 
+import os
 from pathlib import Path
 from typing import Any
 
 from nanobot.agent.tools.base import Tool
 
 
+def _path_key(params: dict[str, Any]) -> str | None:
+    """Serialization key for calls touching a single file path."""
+    path = params.get("path")
+    if not isinstance(path, str):
+        return None
+    return f"path:{Path(path).expanduser().resolve()}"
+
+
+def _dir_key(params: dict[str, Any]) -> str | None:
+    """Serialization key (a wildcard) for calls touching everything under a directory."""
+    path = params.get("path")
+    if not isinstance(path, str):
+        return None
+    return f"path:{os.path.join(Path(path).expanduser().resolve(), '')}*"
+
+
 class ReadFileTool(Tool):
     """Tool to read file contents."""
     
@@ -30,6 +47,12 @@ class ReadFileTool(Tool):
             "required": ["path"]
         }
     
+    def concurrency_key(self, params: dict[str, Any]) -> str | None:
+        return _path_key(params)
+    
+    def is_read_only(self, params: dict[str, Any]) -> bool:
+        return True
+    
     async def execute(self, path: str, **kwargs: Any) -> str:
         try:
             file_path = Path(path).expanduser()
@@ -74,6 +97,9 @@ class WriteFileTool(Tool):
             "required": ["path", "content"]
         }
     
+    def concurrency_key(self, params: dict[str, Any]) -> str | None:
+        return _path_key(params)
+    
     async def execute(self, path: str, content: str, **kwargs: Any) -> str:
         try:
             file_path = Path(path).expanduser()
@@ -118,6 +144,9 @@ class EditFileTool(Tool):
             "required": ["path", "old_text", "new_text"]
         }
     
+    def concurrency_key(self, params: dict[str, Any]) -> str | None:
+        return _path_key(params)
+    
     async def execute(self, path: str, old_text: str, new_text: str, **kwargs: Any) -> str:
         try:
             file_path = Path(path).expanduser()
@@ -168,6 +197,13 @@ class ListDirTool(Tool):
             "required": ["path"]
         }
     
+    def concurrency_key(self, params: dict[str, Any]) -> str | None:
+        # Ordered after earlier writes (and exec) that may create entries in it.
+        return _dir_key(params)
+    
+    def is_read_only(self, params: dict[str, Any]) -> bool:
+        return True
+    
     async def execute(self, path: str, **kwargs: Any) -> str:
         try:
             dir_path = Path(path).expanduser()
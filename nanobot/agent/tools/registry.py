@@ -1,5 +1,6 @@
 """Tool registry for dynamic tool management."""
 
+import asyncio
 from typing import Any
 
 from nanobot.agent.tools.base import Tool
@@ -10,18 +11,26 @@ class ToolRegistry:
     Registry for agent tools.
     
     Allows dynamic registration and execution of tools.
+    
+    Tool definitions are built once and shared until the set of tools
+    changes, and each tool's parameter schema is compiled into a
+    validator when it is registered.
     """
     
     def __init__(self):
         self._tools: dict[str, Tool] = {}
+        self._definitions: list[dict[str, Any]] | None = None
     
     def register(self, tool: Tool) -> None:
         """Register a tool."""
+        tool.compile_validator()
         self._tools[tool.name] = tool
+        self._definitions = None
     
     def unregister(self, name: str) -> None:
         """Unregister a tool by name."""
-        self._tools.pop(name, None)
+        if self._tools.pop(name, None) is not None:
+            self._definitions = None
     
     def get(self, name: str) -> Tool | None:
         """Get a tool by name."""
@@ -32,8 +41,15 @@ class ToolRegistry:
         return name in self._tools
     
     def get_definitions(self) -> list[dict[str, Any]]:
-        """Get all tool definitions in OpenAI format."""
-        return [tool.to_schema() for tool in self._tools.values()]
+        """
+        Get all tool definitions in OpenAI format.
+        
+        The same list is returned until a tool is registered or
+        unregistered; callers must not modify it.
+        """
+        if self._definitions is None:
+            self._definitions = [tool.to_schema() for tool in self._tools.values()]
+        return self._definitions
     
     async def execute(self, name: str, params: dict[str, Any]) -> str:
         """
@@ -61,6 +77,62 @@ class ToolRegistry:
         except Exception as e:
             return f"Error executing {name}: {str(e)}"
     
+    async def execute_batch(self, calls: list[tuple[str, dict[str, Any]]]) -> list[str]:
+        """
+        Execute several tool calls, running independent ones concurrently.
+        
+        A call waits for every earlier call it conflicts with (see
+        `Tool.concurrency_key`); everything else runs in parallel.
+        
+        Args:
+            calls: List of (tool name, params) pairs.
+        
+        Returns:
+            Results in the same order as `calls`.
+        """
+        access: list[tuple[str | None, bool]] = []
+        for name, params in calls:
+            tool = self._tools.get(name)
+            try:
+                key = tool.concurrency_key(params) if tool else None
+                read_only = tool.is_read_only(params) if tool else True
+            except Exception:
+                key, read_only = None, True
+            access.append((key, read_only))
+        
+        deps = [
+            [j for j in range(i) if self._conflicts(access[j], access[i])]
+            for i in range(len(calls))
+        ]
+        results: list[str] = [""] * len(calls)
+        done = [asyncio.Event() for _ in calls]
+        
+        async def run(i: int) -> None:
+            try:
+                for j in deps[i]:
+                    await done[j].wait()
+                name, params = calls[i]
+                results[i] = await self.execute(name, params)
+            finally:
+                done[i].set()
+        
+        await asyncio.gather(*(run(i) for i in range(len(calls))))
+        return results
+    
+    @staticmethod
+    def _conflicts(a: tuple[str | None, bool], b: tuple[str | None, bool]) -> bool:
+        """Check if two calls must keep their relative order."""
+        (key_a, read_a), (key_b, read_b) = a, b
+        if key_a is None or key_b is None or (read_a and read_b):
+            return False
+        if key_a == key_b:
+            return True
+        # A wildcard writer may touch any matching resource, read-only ones included.
+        return (
+            (key_a.endswith("*") and key_b.startswith(key_a[:-1]))
+            or (key_b.endswith("*") and key_a.startswith(key_b[:-1]))
+        )
+    
     @property
     def tool_names(self) -> list[str]:
         """Get list of registered tool names."""
@@ -3,14 +3,264 @@
 import asyncio
 import os
 import re
+import shlex
+import shutil
+import signal
+import subprocess
+import time
+import uuid
+from contextvars import ContextVar
 from pathlib import Path
 from typing import Any
 
+from loguru import logger
+
 from nanobot.agent.tools.base import Tool
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+# Where os.wait4 exists, commands are reaped with it to measure their resource use.
+_HAS_WAIT4 = hasattr(os, "wait4")
+
+# How long to keep reading after a command is killed, for output already in the pipes.
+_DRAIN_S = 0.5
+
+_READ_SIZE = 64 * 1024
+
+# Where /proc exists, the memory and CPU time of running commands are sampled this often.
+_HAS_PROC = os.path.isdir("/proc/self/task")
+_USAGE_SAMPLE_S = 0.2
+
+
+def _kill_group(pid: int) -> None:
+    """Kill a process and everything in its process group (the group it leads)."""
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(pid, signal.SIGKILL)
+        else:
+            os.kill(pid, signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _tree_usage(pid: int) -> tuple[int, float]:
+    """
+    Current resident memory (in KB) and CPU time used so far (in seconds)
+    by a process and all its descendants.
+    """
+    rss_kb = 0
+    ticks = 0
+    stack = [pid]
+    while stack:
+        pid = stack.pop()
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                # Fields after the command name; utime, stime, cutime and cstime are 14-17.
+                fields = f.read().rsplit(")", 1)[1].split()
+            ticks += sum(int(t) for t in fields[11:15])
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        rss_kb += int(line.split()[1])
+                        break
+            for task in os.listdir(f"/proc/{pid}/task"):
+                with open(f"/proc/{pid}/task/{task}/children") as f:
+                    stack.extend(int(child) for child in f.read().split())
+        except (OSError, ValueError, IndexError):
+            continue
+    return rss_kb, ticks / os.sysconf("SC_CLK_TCK")
+
+
+class _OutputBuffer:
+    """Keeps the first and last part of a stream, up to `limit` bytes in all."""
+    
+    def __init__(self, limit: int):
+        self.head_limit = limit // 2
+        self.tail_limit = limit - self.head_limit
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+    
+    def feed(self, data: bytes) -> None:
+        self.total += len(data)
+        room = self.head_limit - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if data and self.tail_limit > 0:
+            self.tail += data
+            if len(self.tail) > self.tail_limit:
+                del self.tail[:-self.tail_limit]
+    
+    @property
+    def omitted(self) -> int:
+        return self.total - len(self.head) - len(self.tail)
+    
+    def text(self) -> str:
+        if not self.omitted:
+            return (self.head + self.tail).decode("utf-8", errors="replace")
+        return (
+            self.head.decode("utf-8", errors="replace")
+            + f"\n... ({self.omitted} bytes omitted) ...\n"
+            + self.tail.decode("utf-8", errors="replace")
+        )
+
+
+class _OutputLimitExceeded(Exception):
+    pass
+
+
+class ShellSession:
+    """
+    A long-lived shell that runs commands one at a time, keeping its
+    working directory, variables and environment between them.
+    
+    After each command the shell prints a sentinel line, unique to the
+    session, on stdout (with the exit code and working directory) and on
+    stderr, so one command's output is told apart from the next without
+    closing the pipes. Commands are passed through `eval` with stdin from
+    /dev/null, so they can neither swallow the sentinel nor read the
+    session's own input.
+    """
+    
+    def __init__(self, cwd: str):
+        self.cwd = cwd
+        self.marker = f"__nanobot_{uuid.uuid4().hex}_".encode()
+        self.last_used = time.monotonic()
+        self.lock = asyncio.Lock()
+        self.process: asyncio.subprocess.Process | None = None
+    
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+    
+    async def start(self, limits_prefix: str = "") -> None:
+        """Start the shell, first running `limits_prefix` (see ExecTool._limits_prefix)."""
+        bash = shutil.which("bash")
+        argv = [bash, "--noprofile", "--norc"] if bash else ["/bin/sh"]
+        if limits_prefix:
+            argv = ["/bin/sh", "-c", f"{limits_prefix}exec {shlex.join(argv)}"]
+        self.process = await asyncio.create_subprocess_exec(
+            *argv,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=self.cwd,
+            start_new_session=True,  # So close() can kill what the shell started, too
+        )
+    
+    async def run(
+        self,
+        command: str,
+        stdout: _OutputBuffer,
+        stderr: _OutputBuffer,
+        max_output_bytes: int,
+    ) -> tuple[int, str]:
+        """
+        Run a command, streaming its output into the buffers.
+        
+        Returns:
+            The exit code and the shell's working directory afterwards.
+        
+        Raises:
+            EOFError: The shell exited (e.g. the command ran `exit`).
+            _OutputLimitExceeded: The command wrote more than max_output_bytes.
+        """
+        assert self.process is not None and self.process.stdin is not None
+        self.last_used = time.monotonic()
+        marker = self.marker.decode()
+        script = (
+            f"eval {shlex.quote(command)} < /dev/null\n"
+            f"printf '\\n{marker}%d %s\\n' \"$?\" \"$PWD\"; printf '\\n{marker}\\n' >&2\n"
+        )
+        try:
+            self.process.stdin.write(script.encode())
+            await self.process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError) as e:
+            raise EOFError("shell exited") from e
+        
+        def check_limit() -> None:
+            if stdout.total + stderr.total > max_output_bytes:
+                raise _OutputLimitExceeded()
+        
+        status, _ = await asyncio.gather(
+            self._read_until_marker(self.process.stdout, stdout, check_limit),
+            self._read_until_marker(self.process.stderr, stderr, check_limit),
+        )
+        self.last_used = time.monotonic()
+        code, _, cwd = status.partition(" ")
+        return int(code), cwd
+    
+    async def _read_until_marker(
+        self,
+        reader: asyncio.StreamReader | None,
+        buffer: _OutputBuffer,
+        check_limit: Any,
+    ) -> str:
+        """Feed output to the buffer up to the sentinel; return the rest of the sentinel line."""
+        assert reader is not None
+        marker = b"\n" + self.marker
+        keep = len(marker) - 1  # A marker split across reads must not reach the buffer
+        carry = b""
+        try:
+            while True:
+                chunk = await reader.read(_READ_SIZE)
+                if not chunk:
+                    raise EOFError("shell exited")
+                data = carry + chunk
+                i = data.find(marker)
+                if i >= 0:
+                    carry = b""
+                    buffer.feed(data[:i])
+                    rest = data[i + len(marker):]
+                    while b"\n" not in rest:
+                        more = await reader.read(_READ_SIZE)
+                        if not more:
+                            raise EOFError("shell exited")
+                        rest += more
+                    return rest.split(b"\n", 1)[0].decode("utf-8", errors="replace")
+                buffer.feed(data[:-keep])
+                carry = data[-keep:]
+                check_limit()
+        finally:
+            buffer.feed(carry)  # Interrupted (timeout, exit): keep the held-back output
+    
+    async def close(self) -> None:
+        """Kill the shell and every process it started."""
+        if self.process is None:
+            return
+        _kill_group(self.process.pid)
+        await self.process.wait()
+
 
 class ExecTool(Tool):
-    """Tool to execute shell commands."""
+    """
+    Tool to execute shell commands.
+    
+    Output is read as it arrives. Only the first and last `max_output_chars`
+    / 2 bytes of stdout (half that for stderr) are kept, and a command that
+    writes more than `max_output_bytes` in all is killed, so a runaway
+    command can't grow the gateway's memory. A command that times out or is
+    killed reports the output it produced so far, with its CPU time and
+    peak memory.
+    
+    With `persistent_shell`, each agent session (set with set_context) runs
+    its commands in its own long-lived ShellSession, so `cd`, exported
+    variables and activated environments carry over between calls. A
+    session idle for `shell_idle_s` is closed; one that times out or
+    overflows is killed, and the next command starts a fresh shell.
+    
+    Every command runs in its own session (process group), so a timeout,
+    an overflow or a cancelled call kills everything it started, not just
+    the shell. Optional rlimits (CPU seconds, address space, open files,
+    processes) are applied to the shell and inherited by its children.
+    At most `max_concurrent` commands run at once; pass a shared `slots`
+    semaphore to apply one cap across several ExecTool instances (the
+    main agent's and the subagents').
+    """
     
     def __init__(
         self,
@@ -19,8 +269,42 @@ class ExecTool(Tool):
         deny_patterns: list[str] | None = None,
         allow_patterns: list[str] | None = None,
         restrict_to_workspace: bool = False,
+        max_output_chars: int = 10000,
+        max_output_bytes: int = 32 * 1024 * 1024,
+        persistent_shell: bool = False,
+        shell_idle_s: float = 600.0,
+        cpu_limit_s: int = 0,
+        memory_limit_mb: int = 0,
+        open_files_limit: int = 0,
+        process_limit: int = 0,
+        max_concurrent: int = 4,
+        slots: asyncio.Semaphore | None = None,
     ):
         self.timeout = timeout
+        self._slots = slots or asyncio.Semaphore(max_concurrent)
+        # (rlimit, ulimit options to try, value in ulimit's unit)
+        self._rlimits: list[tuple[int, tuple[str, ...], int]] = []
+        if resource is not None:
+            for kind, options, value in (
+                (resource.RLIMIT_CPU, ("-t",), cpu_limit_s),
+                (resource.RLIMIT_AS, ("-v",), memory_limit_mb * 1024),  # KB
+                (resource.RLIMIT_NOFILE, ("-n",), open_files_limit),
+                (resource.RLIMIT_NPROC, ("-u", "-p"), process_limit),  # bash, dash
+            ):
+                if value > 0:
+                    self._rlimits.append((kind, options, value))
+        elif any((cpu_limit_s, memory_limit_mb, open_files_limit, process_limit)):
+            logger.warning("Resource limits for exec are not supported on this platform")
+        self.persistent_shell = persistent_shell
+        self.shell_idle_s = shell_idle_s
+        self._sessions: dict[str, ShellSession] = {}
+        self._reaper: asyncio.Task[None] | None = None
+        # The session is task-local so concurrent chats each get their own shell.
+        self._session_key: ContextVar[str | None] = ContextVar(
+            f"exec_session_{id(self)}", default=None
+        )
+        self.max_output_chars = max_output_chars
+        self.max_output_bytes = max_output_bytes
         self.working_dir = working_dir
         self.deny_patterns = deny_patterns or [
             r"\brm\s+-[rf]{1,2}\b",          # rm -r, rm -rf, rm -fr
@@ -35,12 +319,22 @@ class ExecTool(Tool):
         self.allow_patterns = allow_patterns or []
         self.restrict_to_workspace = restrict_to_workspace
     
+    def set_context(self, session_key: str | None) -> None:
+        """Set the agent session whose persistent shell runs commands (for the running task only)."""
+        self._session_key.set(session_key)
+    
     @property
     def name(self) -> str:
         return "exec"
     
     @property
     def description(self) -> str:
+        if self.persistent_shell:
+            return (
+                "Execute a shell command and return its output. Use with caution. "
+                "Commands run in a persistent shell: the working directory, variables "
+                "and activated environments carry over to later commands."
+            )
         return "Execute a shell command and return its output. Use with caution."
     
     @property
@@ -60,6 +354,11 @@ class ExecTool(Tool):
             "required": ["command"]
         }
     
+    def concurrency_key(self, params: dict[str, Any]) -> str | None:
+        # Commands may touch any file and depend on each other's side effects:
+        # order them against file writes and against other commands.
+        return "path:*"
+    
     async def execute(self, command: str, working_dir: str | None = None, **kwargs: Any) -> str:
         cwd = working_dir or self.working_dir or os.getcwd()
         guard_error = self._guard_command(command, cwd)
@@ -67,47 +366,263 @@ class ExecTool(Tool):
             return guard_error
         
         try:
+            async with self._slots:
+                session_key = self._session_key.get()
+                if self.persistent_shell and session_key is not None:
+                    return await self._run_in_session(session_key, command, working_dir)
+                return await self._run(command, cwd)
+        except Exception as e:
+            return f"Error executing command: {str(e)}"
+    
+    async def close_session(self, session_key: str) -> None:
+        """Close a session's persistent shell, if it has one."""
+        session = self._sessions.pop(session_key, None)
+        if session is not None:
+            await session.close()
+    
+    async def close_all(self) -> None:
+        """Close every persistent shell."""
+        for key in list(self._sessions):
+            await self.close_session(key)
+    
+    async def _run_in_session(self, session_key: str, command: str, working_dir: str | None) -> str:
+        session = self._sessions.get(session_key)
+        if session is None or not session.alive:
+            session = ShellSession(self.working_dir or os.getcwd())
+            await session.start(self._limits_prefix())
+            self._sessions[session_key] = session
+            if self._reaper is None or self._reaper.done():
+                self._reaper = asyncio.create_task(self._reap_idle())
+        
+        if working_dir:
+            # Like a one-off command, this one runs elsewhere without moving the session.
+            command = f"(cd {shlex.quote(working_dir)} && eval {shlex.quote(command)})"
+        stdout = _OutputBuffer(self.max_output_chars)
+        stderr = _OutputBuffer(self.max_output_chars // 2)
+        returncode: int | None = None
+        error: str | None = None
+        async with session.lock:
+            try:
+                returncode, cwd = await asyncio.wait_for(
+                    session.run(command, stdout, stderr, self.max_output_bytes),
+                    timeout=self.timeout,
+                )
+            except asyncio.TimeoutError:
+                error = f"timed out after {self.timeout} seconds"
+            except _OutputLimitExceeded:
+                error = f"was killed after writing more than {self.max_output_bytes} bytes"
+            except EOFError:
+                error = "ended the shell session"
+            except asyncio.CancelledError:
+                await self.close_session(session_key)  # Don't leave the command running
+                raise
+            
+            if error is not None:
+                await self.close_session(session_key)
+                error += ". The output above is what it wrote until then"
+                error += "; the next command starts a new shell (directory and variables are reset)."
+            elif self.restrict_to_workspace and self.working_dir:
+                workspace = Path(self.working_dir).resolve()
+                here = Path(cwd).resolve()
+                if here != workspace and workspace not in here.parents:
+                    await session.run(
+                        f"cd {shlex.quote(str(workspace))}",
+                        _OutputBuffer(0), _OutputBuffer(0), self.max_output_bytes,
+                    )
+                    error = f"left the workspace; the shell was moved back to {workspace}."
+        return self._format_result(stdout, stderr, returncode, error, [])
+    
+    async def _reap_idle(self) -> None:
+        """Close persistent shells that have been idle for shell_idle_s."""
+        while self._sessions:
+            await asyncio.sleep(min(self.shell_idle_s / 2, 60))
+            now = time.monotonic()
+            for key, session in list(self._sessions.items()):
+                if not session.lock.locked() and now - session.last_used >= self.shell_idle_s:
+                    logger.debug(f"Closing idle shell of session {key}")
+                    await self.close_session(key)
+    
+    async def _run(self, command: str, cwd: str) -> str:
+        stdout = _OutputBuffer(self.max_output_chars)
+        stderr = _OutputBuffer(self.max_output_chars // 2)
+        process, readers, transports, waiter = await self._start(command, cwd)
+        stopped = asyncio.Event()
+        killed: str | None = None
+        
+        def kill(reason: str) -> None:
+            nonlocal killed
+            killed = killed or reason
+            stopped.set()
+            if not waiter.done():
+                # The shell leads its own process group: take its children down with it.
+                _kill_group(process.pid)
+        
+        async def pump(reader: asyncio.StreamReader, buffer: _OutputBuffer) -> None:
+            while chunk := await reader.read(_READ_SIZE):
+                buffer.feed(chunk)
+                if stdout.total + stderr.total > self.max_output_bytes:
+                    kill(f"was killed after writing more than {self.max_output_bytes} bytes")
+                    return  # Stop reading; the writer gets EPIPE once the pipe is closed
+        
+        pumps = [
+            asyncio.create_task(pump(readers[0], stdout)),
+            asyncio.create_task(pump(readers[1], stderr)),
+        ]
+        sampler = asyncio.create_task(self._sample_usage(process.pid, waiter)) if _HAS_PROC else None
+        finished = asyncio.create_task(asyncio.wait([*pumps, waiter]))
+        interrupted = asyncio.create_task(stopped.wait())
+        try:
+            await asyncio.wait([finished, interrupted], timeout=self.timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not finished.done():
+                if not stopped.is_set():
+                    kill(f"timed out after {self.timeout} seconds")
+                # Keep what is already in the pipes, but don't wait on processes
+                # that outlived the shell and still hold them open.
+                await asyncio.wait(pumps, timeout=_DRAIN_S)
+        except asyncio.CancelledError:
+            kill("was cancelled")
+            raise
+        finally:
+            for task in (*pumps, finished, interrupted):
+                task.cancel()
+            for transport in transports:
+                transport.close()
+        returncode, cpu_s = await waiter
+        peak_rss_kb = 0
+        if sampler is not None:
+            # Descendants the shell didn't wait for (e.g. after a kill) only show up in the samples.
+            peak_rss_kb, sampled_cpu_s = await sampler
+            cpu_s = max(cpu_s or 0.0, sampled_cpu_s)
+        
+        usage = []
+        if cpu_s is not None:
+            usage.append(f"CPU time {cpu_s:.2f}s")
+        if peak_rss_kb:
+            usage.append(f"peak RSS {peak_rss_kb / 1024:.1f} MB")
+        if usage:
+            logger.debug(f"exec finished ({', '.join(usage)}): {command[:80]}")
+        
+        if killed is not None:
+            killed += ". The output above is what it wrote until then."
+        return self._format_result(stdout, stderr, returncode, killed, usage)
+    
+    @staticmethod
+    def _format_result(
+        stdout: _OutputBuffer,
+        stderr: _OutputBuffer,
+        returncode: int | None,
+        error: str | None,
+        usage: list[str],
+    ) -> str:
+        output_parts = []
+        
+        if stdout.total:
+            output_parts.append(stdout.text())
+        
+        if stderr.total:
+            stderr_text = stderr.text()
+            if stderr_text.strip():
+                output_parts.append(f"STDERR:\n{stderr_text}")
+        
+        if error is not None:
+            output_parts.append(f"\nError: Command {error}")
+            if usage:
+                output_parts.append(f"Resource use: {', '.join(usage)}")
+        elif returncode != 0:
+            output_parts.append(f"\nExit code: {returncode}")
+        
+        return "\n".join(output_parts) if output_parts else "(no output)"
+    
+    async def _start(
+        self,
+        command: str,
+        cwd: str,
+    ) -> tuple[Any, list[asyncio.StreamReader], list[asyncio.BaseTransport], "asyncio.Future[tuple[int, float | None]]"]:
+        """
+        Launch a command with its stdout and stderr connected to stream readers.
+        
+        Returns the process, the two readers, transports to close when done,
+        and a future for the exit code and the CPU time used (if known).
+        """
+        command = self._limits_prefix() + command
+        if not _HAS_WAIT4:
             process = await asyncio.create_subprocess_shell(
                 command,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
                 cwd=cwd,
+                start_new_session=True,
             )
             
-            try:
-                stdout, stderr = await asyncio.wait_for(
-                    process.communicate(),
-                    timeout=self.timeout
-                )
-            except asyncio.TimeoutError:
-                process.kill()
-                return f"Error: Command timed out after {self.timeout} seconds"
-            
-            output_parts = []
-            
-            if stdout:
-                output_parts.append(stdout.decode("utf-8", errors="replace"))
-            
-            if stderr:
-                stderr_text = stderr.decode("utf-8", errors="replace")
-                if stderr_text.strip():
-                    output_parts.append(f"STDERR:\n{stderr_text}")
-            
-            if process.returncode != 0:
-                output_parts.append(f"\nExit code: {process.returncode}")
-            
-            result = "\n".join(output_parts) if output_parts else "(no output)"
-            
-            # Truncate very long output
-            max_len = 10000
-            if len(result) > max_len:
-                result = result[:max_len] + f"\n... (truncated, {len(result) - max_len} more chars)"
-            
-            return result
-            
-        except Exception as e:
-            return f"Error executing command: {str(e)}"
-
+            async def wait() -> tuple[int, float | None]:
+                return await process.wait(), None
+            return process, [process.stdout, process.stderr], [], asyncio.ensure_future(wait())
+        
+        # Reap the process ourselves: os.wait4 reports the CPU time of the
+        # shell and of the children it waited for.
+        process = subprocess.Popen(
+            command,
+            shell=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=cwd,
+            start_new_session=True,
+        )
+        loop = asyncio.get_running_loop()
+        readers: list[asyncio.StreamReader] = []
+        transports: list[asyncio.BaseTransport] = []
+        for pipe in (process.stdout, process.stderr):
+            reader = asyncio.StreamReader(limit=_READ_SIZE)
+            transport, _ = await loop.connect_read_pipe(
+                lambda reader=reader: asyncio.StreamReaderProtocol(reader), pipe
+            )
+            readers.append(reader)
+            transports.append(transport)
+        
+        async def wait() -> tuple[int, float | None]:
+            _, status, rusage = await loop.run_in_executor(None, os.wait4, process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(status)
+            return process.returncode, rusage.ru_utime + rusage.ru_stime
+        return process, readers, transports, asyncio.ensure_future(wait())
+    
+    def _limits_prefix(self) -> str:
+        """
+        Shell lines that apply the rlimits, to run before the command.
+        
+        The shell sets them itself (a preexec_fn isn't safe to run in the
+        forked child of a process with other threads). If a limit can't be
+        set, the shell exits with 126 instead of running unconfined.
+        """
+        lines = []
+        for kind, options, value in self._rlimits:
+            _, hard = resource.getrlimit(kind)
+            if hard != resource.RLIM_INFINITY:
+                value = min(value, hard // 1024 if kind == resource.RLIMIT_AS else hard)
+            attempts = [f"ulimit {option} {value}" for option in options]
+            if len(attempts) > 1:
+                tried = " || ".join(f"{a} 2>/dev/null" for a in attempts[:-1])
+                lines.append(f"{{ {tried} || {attempts[-1]}; }} || exit 126\n")
+            else:
+                lines.append(f"{attempts[0]} || exit 126\n")
+        return "".join(lines)
+    
+    @staticmethod
+    async def _sample_usage(pid: int, waiter: asyncio.Future[Any]) -> tuple[int, float]:
+        """
+        Track a process tree until the process exits.
+        
+        Returns the peak total RSS (in KB) and the last CPU time seen. (The
+        ru_maxrss from wait4 can't be used: it includes the memory of the
+        forking gateway process.)
+        """
+        peak_kb, cpu_s = 0, 0.0
+        while not waiter.done():
+            await asyncio.wait([waiter], timeout=_USAGE_SAMPLE_S)
+            if not waiter.done():
+                rss_kb, cpu_s = _tree_usage(pid)
+                peak_kb = max(peak_kb, rss_kb)
+        return peak_kb, cpu_s
+    
     def _guard_command(self, command: str, cwd: str) -> str | None:
         """Best-effort safety guard for potentially destructive commands."""
         cmd = command.strip()
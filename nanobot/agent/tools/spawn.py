@@ -1,5 +1,6 @@
 """Spawn tool for creating background subagents."""
 
+from contextvars import ContextVar
 from typing import Any, TYPE_CHECKING
 
 from nanobot.agent.tools.base import Tool
@@ -13,18 +14,20 @@ class SpawnTool(Tool):
     Tool to spawn a subagent for background task execution.
     
     The subagent runs asynchronously and announces its result back
-    to the main agent when complete.
+    to the main agent when complete. Several tasks spawned together
+    report back once, with all their results.
     """
     
     def __init__(self, manager: "SubagentManager"):
         self._manager = manager
-        self._origin_channel = "cli"
-        self._origin_chat_id = "direct"
+        # Origin is task-local so concurrent sessions don't overwrite each other.
+        self._origin: ContextVar[tuple[str, str]] = ContextVar(
+            f"spawn_origin_{id(self)}", default=("cli", "direct")
+        )
     
     def set_context(self, channel: str, chat_id: str) -> None:
-        """Set the origin context for subagent announcements."""
-        self._origin_channel = channel
-        self._origin_chat_id = chat_id
+        """Set the origin context for subagent announcements (for the running task only)."""
+        self._origin.set((channel, chat_id))
     
     @property
     def name(self) -> str:
@@ -35,7 +38,10 @@ class SpawnTool(Tool):
         return (
             "Spawn a subagent to handle a task in the background. "
             "Use this for complex or time-consuming tasks that can run independently. "
-            "The subagent will complete the task and report back when done."
+            "The subagent will complete the task and report back when done. "
+            "To work on several independent tasks in parallel, pass them all in `tasks` "
+            "instead of spawning one at a time: their results are reported together, "
+            "optionally as soon as `quorum` of them succeed or after `deadline_s` seconds."
         )
     
     @property
@@ -47,19 +53,57 @@ class SpawnTool(Tool):
                     "type": "string",
                     "description": "The task for the subagent to complete",
                 },
+                "tasks": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Several tasks to run in parallel, one subagent each (instead of task)",
+                },
                 "label": {
                     "type": "string",
                     "description": "Optional short label for the task (for display)",
                 },
+                "quorum": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "description": "With tasks: report once this many have succeeded (default: all)",
+                },
+                "deadline_s": {
+                    "type": "number",
+                    "minimum": 1,
+                    "description": "With tasks: report after this many seconds at the latest",
+                },
             },
-            "required": ["task"],
         }
     
-    async def execute(self, task: str, label: str | None = None, **kwargs: Any) -> str:
-        """Spawn a subagent to execute the given task."""
+    def concurrency_key(self, params: dict[str, Any]) -> str | None:
+        # Same key as the subagents tool.
+        return f"subagents:{':'.join(self._origin.get())}"
+    
+    async def execute(
+        self,
+        task: str | None = None,
+        label: str | None = None,
+        tasks: list[str] | None = None,
+        quorum: int | None = None,
+        deadline_s: float | None = None,
+        **kwargs: Any,
+    ) -> str:
+        """Spawn a subagent to execute the given task (or a group for several)."""
+        origin_channel, origin_chat_id = self._origin.get()
+        if tasks:
+            return await self._manager.spawn_group(
+                tasks=tasks + ([task] if task else []),
+                label=label,
+                quorum=quorum,
+                deadline_s=deadline_s,
+                origin_channel=origin_channel,
+                origin_chat_id=origin_chat_id,
+            )
+        if not task:
+            return "Error: either task or tasks is required"
         return await self._manager.spawn(
             task=task,
             label=label,
-            origin_channel=self._origin_channel,
-            origin_chat_id=self._origin_chat_id,
+            origin_channel=origin_channel,
+            origin_chat_id=origin_chat_id,
         )
@@ -0,0 +1,98 @@
+"""Subagents tool for checking on and cancelling background subagents."""
+
+from contextvars import ContextVar
+from typing import Any, TYPE_CHECKING
+
+from nanobot.agent.tools.base import Tool
+
+if TYPE_CHECKING:
+    from nanobot.agent.subagent import SubagentManager
+
+
+class SubagentsTool(Tool):
+    """
+    Tool to list and cancel the subagents spawned from the current session.
+    
+    Only the session's own subagents are visible, so one chat can't cancel
+    another's work.
+    """
+    
+    def __init__(self, manager: "SubagentManager"):
+        self._manager = manager
+        self._origin: ContextVar[tuple[str, str]] = ContextVar(
+            f"subagents_origin_{id(self)}", default=("cli", "direct")
+        )
+    
+    def set_context(self, channel: str, chat_id: str) -> None:
+        """Set the session whose subagents are managed (for the running task only)."""
+        self._origin.set((channel, chat_id))
+    
+    @property
+    def name(self) -> str:
+        return "subagents"
+    
+    @property
+    def description(self) -> str:
+        return (
+            "Check on or cancel background subagents started with spawn. "
+            "Use action 'list' to see their status and progress, "
+            "'result' with a task_id (or group id) to read full results, "
+            "or 'cancel' with a task_id (or group id) to stop work that is queued or running."
+        )
+    
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "action": {
+                    "type": "string",
+                    "enum": ["list", "result", "cancel"],
+                    "description": "What to do",
+                },
+                "task_id": {
+                    "type": "string",
+                    "description": "Subagent or group ID (for result and cancel)",
+                },
+            },
+            "required": ["action"],
+        }
+    
+    def concurrency_key(self, params: dict[str, Any]) -> str | None:
+        # Shared with spawn, so a cancel or spawn is ordered against list/result.
+        return f"subagents:{':'.join(self._origin.get())}"
+    
+    def is_read_only(self, params: dict[str, Any]) -> bool:
+        return params.get("action") in ("list", "result")
+    
+    async def execute(self, action: str, task_id: str | None = None, **kwargs: Any) -> str:
+        origin = ":".join(self._origin.get())
+        if action == "list":
+            runs = self._manager.list_runs(origin)
+            if not runs:
+                return "No subagents in this session."
+            lines = []
+            for run in runs:
+                line = f"- [{run.id}] {run.label}: {run.status}"
+                if run.group_id:
+                    line += f" (group {run.group_id})"
+                if run.status != "queued":
+                    line += f", {run.iterations} steps, {run.elapsed_s:.0f}s"
+                if run.status == "running" and run.last_tool:
+                    line += f", last tool: {run.last_tool}"
+                lines.append(line)
+            return "\n".join(lines)
+        if action == "result":
+            if not task_id:
+                return "Error: task_id is required for result"
+            result = self._manager.get_result(task_id, origin=origin)
+            if result is None:
+                return f"Error: no result for {task_id} in this session (it may still be running)"
+            return result
+        if action == "cancel":
+            if not task_id:
+                return "Error: task_id is required for cancel"
+            if self._manager.cancel(task_id, origin=origin):
+                return f"Cancelled subagent {task_id}"
+            return f"Error: no queued or running subagent or group {task_id} in this session"
+        return f"Error: unknown action '{action}'"
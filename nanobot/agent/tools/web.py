@@ -7,9 +7,8 @@ import re
 from typing import Any
 from urllib.parse import urlparse
 
-import httpx
-
 from nanobot.agent.tools.base import Tool
+from nanobot.utils.http import HttpClientPool, http_client
 
 # Shared constants
 USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_7_2) AppleWebKit/537.36"
@@ -57,9 +56,15 @@ class WebSearchTool(Tool):
         "required": ["query"]
     }
     
-    def __init__(self, api_key: str | None = None, max_results: int = 5):
+    def __init__(
+        self,
+        api_key: str | None = None,
+        max_results: int = 5,
+        http: HttpClientPool | None = None,
+    ):
         self.api_key = api_key or os.environ.get("BRAVE_API_KEY", "")
         self.max_results = max_results
+        self.http = http
     
     async def execute(self, query: str, count: int | None = None, **kwargs: Any) -> str:
         if not self.api_key:
@@ -67,7 +72,7 @@ class WebSearchTool(Tool):
         
         try:
             n = min(max(count or self.max_results, 1), 10)
-            async with httpx.AsyncClient() as client:
+            async with http_client(self.http) as client:
                 r = await client.get(
                     "https://api.search.brave.com/res/v1/web/search",
                     params={"q": query, "count": n},
@@ -105,8 +110,9 @@ class WebFetchTool(Tool):
         "required": ["url"]
     }
     
-    def __init__(self, max_chars: int = 50000):
+    def __init__(self, max_chars: int = 50000, http: HttpClientPool | None = None):
         self.max_chars = max_chars
+        self.http = http
     
     async def execute(self, url: str, extractMode: str = "markdown", maxChars: int | None = None, **kwargs: Any) -> str:
         from readability import Document
@@ -119,12 +125,13 @@ class WebFetchTool(Tool):
             return json.dumps({"error": f"URL validation failed: {error_msg}", "url": url})
 
         try:
-            async with httpx.AsyncClient(
+            async with http_client(
+                self.http,
+                "web_fetch",
                 follow_redirects=True,
                 max_redirects=MAX_REDIRECTS,
-                timeout=30.0
             ) as client:
-                r = await client.get(url, headers={"User-Agent": USER_AGENT})
+                r = await client.get(url, headers={"User-Agent": USER_AGENT}, timeout=30.0)
                 r.raise_for_status()
             
             ctype = r.headers.get("content-type", "")
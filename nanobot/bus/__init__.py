@@ -1,6 +1,6 @@
 """Message bus module for decoupled channel-agent communication."""
 
-from nanobot.bus.events import InboundMessage, OutboundMessage
+from nanobot.bus.events import InboundMessage, OutboundDelta, OutboundMessage
 from nanobot.bus.queue import MessageBus
 
-__all__ = ["MessageBus", "InboundMessage", "OutboundMessage"]
+__all__ = ["MessageBus", "InboundMessage", "OutboundMessage", "OutboundDelta"]
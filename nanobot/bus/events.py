@@ -35,3 +35,34 @@ class OutboundMessage:
     metadata: dict[str, Any] = field(default_factory=dict)
 
 
+@dataclass
+class OutboundDelta:
+    """Partial content of a response that is still being generated."""
+    
+    channel: str
+    chat_id: str
+    content: str  # Text delta since the previous event
+    stream_id: str  # Groups the deltas of one LLM response
+
+
+@dataclass
+class SubagentProgress:
+    """Status update of a background subagent, for the chat that spawned it."""
+    
+    channel: str
+    chat_id: str
+    task_id: str
+    label: str
+    status: str  # queued | running | done | failed | cancelled
+    iterations: int = 0  # LLM rounds completed so far
+    elapsed_s: float = 0.0
+    last_tool: str | None = None
+    
+    def describe(self) -> str:
+        """Short human-readable summary."""
+        text = f"{self.label}: {self.status}"
+        if self.status == "running":
+            text += f" for {self.elapsed_s:.0f}s, step {self.iterations}"
+            if self.last_tool:
+                text += f" ({self.last_tool})"
+        return text
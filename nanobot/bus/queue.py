@@ -1,11 +1,34 @@
 """Async message queue for decoupled channel-agent communication."""
 
 import asyncio
+import time
+from collections import OrderedDict, deque
 from typing import Callable, Awaitable
 
 from loguru import logger
 
-from nanobot.bus.events import InboundMessage, OutboundMessage
+from nanobot.bus.events import InboundMessage, OutboundDelta, OutboundMessage, SubagentProgress
+from nanobot.config.schema import BusConfig
+
+# Inbound priority classes, served strictly in this order.
+PRIORITY_INTERACTIVE = 0  # Users talking to the bot
+PRIORITY_SYSTEM = 1  # Subagent announcements
+PRIORITY_BACKGROUND = 2  # Cron jobs and heartbeat (set explicitly by their callers)
+
+
+def message_priority(msg: InboundMessage) -> int:
+    """
+    Get the priority class of an inbound message.
+    
+    Publishers can override the channel-based default with
+    ``metadata["priority"]``.
+    """
+    priority = msg.metadata.get("priority")
+    if isinstance(priority, int) and PRIORITY_INTERACTIVE <= priority <= PRIORITY_BACKGROUND:
+        return priority
+    if msg.channel == "system":
+        return PRIORITY_SYSTEM
+    return PRIORITY_INTERACTIVE
 
 
 class MessageBus:
@@ -14,21 +37,150 @@ class MessageBus:
     
     Channels push messages to the inbound queue, and the agent processes
     them and pushes responses to the outbound queue.
+    
+    The inbound queue is bounded and prioritized: interactive messages are
+    served before subagent announcements, which are served before
+    background work. Within a priority class, channels are served
+    round-robin so one busy chat cannot starve the others. When the queue
+    is full the configured overflow policy applies.
     """
     
-    def __init__(self):
-        self.inbound: asyncio.Queue[InboundMessage] = asyncio.Queue()
-        self.outbound: asyncio.Queue[OutboundMessage] = asyncio.Queue()
+    def __init__(self, config: BusConfig | None = None):
+        self.config = config or BusConfig()
+        # Per priority class: channel -> FIFO of (enqueue time, message)
+        self._inbound: list[OrderedDict[str, deque[tuple[float, InboundMessage]]]] = [
+            OrderedDict() for _ in range(PRIORITY_BACKGROUND + 1)
+        ]
+        self._inbound_count = 0
+        self._inbound_changed = asyncio.Condition()
+        self._waits: deque[float] = deque(maxlen=1000)  # Recent inbound wait times (s)
+        self._counters = {"published": 0, "consumed": 0, "dropped": 0, "rejected": 0}
+        self.outbound: asyncio.Queue[OutboundMessage] = asyncio.Queue(
+            maxsize=max(self.config.outbound_max_size, 0)
+        )
         self._outbound_subscribers: dict[str, list[Callable[[OutboundMessage], Awaitable[None]]]] = {}
+        self._delta_subscribers: dict[str, list[Callable[[OutboundDelta], Awaitable[None]]]] = {}
+        self._progress_subscribers: dict[str, list[Callable[[SubagentProgress], Awaitable[None]]]] = {}
         self._running = False
     
     async def publish_inbound(self, msg: InboundMessage) -> None:
-        """Publish a message from a channel to the agent."""
-        await self.inbound.put(msg)
+        """
+        Publish a message from a channel to the agent.
+        
+        If the inbound queue is full, this blocks until there is room,
+        sheds the oldest message of the lowest queued priority, or rejects
+        the new message, depending on the overflow policy. Shed messages
+        get a "busy" reply through their originating channel.
+        """
+        priority = message_priority(msg)
+        limit = self.config.inbound_max_size
+        async with self._inbound_changed:
+            if limit > 0 and self._inbound_count >= limit:
+                if self.config.overflow == "block":
+                    await self._inbound_changed.wait_for(lambda: self._inbound_count < limit)
+                elif self.config.overflow == "drop_oldest":
+                    victim = self._pop_victim(priority)
+                    if victim is None:
+                        # Everything queued outranks the new message.
+                        self._shed(msg, "rejected")
+                        return
+                    self._shed(victim, "dropped")
+                else:
+                    self._shed(msg, "rejected")
+                    return
+            
+            queues = self._inbound[priority]
+            queues.setdefault(msg.channel, deque()).append((time.monotonic(), msg))
+            self._inbound_count += 1
+            self._counters["published"] += 1
+            self._inbound_changed.notify_all()
     
-    async def consume_inbound(self) -> InboundMessage:
-        """Consume the next inbound message (blocks until available)."""
-        return await self.inbound.get()
+    async def consume_inbound(
+        self, accept: Callable[[InboundMessage], bool] | None = None
+    ) -> InboundMessage:
+        """
+        Consume the next inbound message (blocks until available).
+        
+        Args:
+            accept: Optional filter; messages it rejects stay queued in place
+                (e.g. ones for a session that is still busy). Call
+                ``notify_inbound()`` when its answer may have changed.
+        """
+        item: tuple[float, InboundMessage] | None = None
+        
+        def ready() -> bool:
+            nonlocal item
+            item = self._pop_next(accept) if self._inbound_count else None
+            return item is not None
+        
+        async with self._inbound_changed:
+            await self._inbound_changed.wait_for(ready)
+            self._inbound_changed.notify_all()
+        enqueued_at, msg = item
+        self._waits.append(time.monotonic() - enqueued_at)
+        self._counters["consumed"] += 1
+        return msg
+    
+    async def notify_inbound(self) -> None:
+        """Wake consumers so they re-check their ``accept`` filter."""
+        async with self._inbound_changed:
+            self._inbound_changed.notify_all()
+    
+    def _pop_next(
+        self, accept: Callable[[InboundMessage], bool] | None = None
+    ) -> tuple[float, InboundMessage] | None:
+        """Take the next accepted message: highest priority first, channels round-robin."""
+        for queues in self._inbound:
+            for channel, queue in queues.items():
+                index = next(
+                    (i for i, (_, msg) in enumerate(queue) if accept is None or accept(msg)),
+                    None,
+                )
+                if index is None:
+                    continue
+                item = queue[index]
+                del queue[index]
+                if queue:
+                    queues.move_to_end(channel)
+                else:
+                    del queues[channel]
+                self._inbound_count -= 1
+                return item
+        return None
+    
+    def _pop_victim(self, priority: int) -> InboundMessage | None:
+        """
+        Remove the message to shed for an incoming one of the given priority.
+        
+        Picks the oldest message of the busiest channel in the lowest
+        non-empty priority class that does not outrank the incoming message.
+        """
+        for level in range(PRIORITY_BACKGROUND, priority - 1, -1):
+            queues = self._inbound[level]
+            if not queues:
+                continue
+            channel = max(queues, key=lambda c: len(queues[c]))
+            _, victim = queues[channel].popleft()
+            if not queues[channel]:
+                del queues[channel]
+            self._inbound_count -= 1
+            return victim
+        return None
+    
+    def _shed(self, msg: InboundMessage, reason: str) -> None:
+        """Account for a message that will not be processed and tell its sender."""
+        self._counters[reason] += 1
+        logger.warning(f"Inbound queue full, {reason} message from {msg.channel}:{msg.chat_id}")
+        if msg.channel == "system" or not self.config.busy_message:
+            return
+        try:
+            self.outbound.put_nowait(OutboundMessage(
+                channel=msg.channel,
+                chat_id=msg.chat_id,
+                content=self.config.busy_message,
+            ))
+        except asyncio.QueueFull:
+            logger.warning(f"Outbound queue full, no busy reply for {msg.channel}:{msg.chat_id}")
     
     async def publish_outbound(self, msg: OutboundMessage) -> None:
         """Publish a response from the agent to channels."""
@@ -48,6 +200,54 @@ class MessageBus:
             self._outbound_subscribers[channel] = []
         self._outbound_subscribers[channel].append(callback)
     
+    def subscribe_delta(
+        self,
+        channel: str,
+        callback: Callable[[OutboundDelta], Awaitable[None]]
+    ) -> None:
+        """Subscribe to streamed response deltas for a specific channel."""
+        self._delta_subscribers.setdefault(channel, []).append(callback)
+    
+    def wants_deltas(self, channel: str) -> bool:
+        """Check if any subscriber consumes streamed deltas for a channel."""
+        return bool(self._delta_subscribers.get(channel))
+    
+    async def publish_delta(self, delta: OutboundDelta) -> None:
+        """
+        Deliver a response delta to the channel's delta subscribers.
+        
+        Deltas bypass the outbound queue: they are only useful while fresh,
+        and the final OutboundMessage still goes through the queue.
+        Subscribers must not block on client I/O (this runs inside the
+        agent's streaming loop).
+        """
+        for callback in self._delta_subscribers.get(delta.channel, []):
+            try:
+                await callback(delta)
+            except Exception as e:
+                logger.warning(f"Error dispatching delta to {delta.channel}: {e}")
+    
+    def subscribe_progress(
+        self,
+        channel: str,
+        callback: Callable[[SubagentProgress], Awaitable[None]]
+    ) -> None:
+        """Subscribe to subagent progress updates for a specific channel."""
+        self._progress_subscribers.setdefault(channel, []).append(callback)
+    
+    async def publish_progress(self, event: SubagentProgress) -> None:
+        """
+        Deliver a subagent progress update to the channel's subscribers.
+        
+        Like deltas, progress bypasses the outbound queue; channels without
+        a subscriber simply don't show it.
+        """
+        for callback in self._progress_subscribers.get(event.channel, []):
+            try:
+                await callback(event)
+            except Exception as e:
+                logger.warning(f"Error dispatching progress to {event.channel}: {e}")
+    
     async def dispatch_outbound(self) -> None:
         """
         Dispatch outbound messages to subscribed channels.
@@ -73,9 +273,46 @@ class MessageBus:
     @property
     def inbound_size(self) -> int:
         """Number of pending inbound messages."""
-        return self.inbound.qsize()
+        return self._inbound_count
     
     @property
     def outbound_size(self) -> int:
         """Number of pending outbound messages."""
         return self.outbound.qsize()
+    
+    def stats(self) -> dict:
+        """Get queue depths, throughput counters and recent inbound wait times."""
+        waits = sorted(self._waits)
+        return {
+            "inbound": {
+                "depth": self._inbound_count,
+                "capacity": self.config.inbound_max_size,
+                "by_priority": {
+                    name: sum(len(q) for q in self._inbound[level].values())
+                    for name, level in (
+                        ("interactive", PRIORITY_INTERACTIVE),
+                        ("system", PRIORITY_SYSTEM),
+                        ("background", PRIORITY_BACKGROUND),
+                    )
+                },
+                "by_channel": self._depth_by_channel(),
+                **self._counters,
+            },
+            "outbound": {
+                "depth": self.outbound.qsize(),
+                "capacity": self.config.outbound_max_size,
+            },
+            "wait_s": {
+                "samples": len(waits),
+                "avg": sum(waits) / len(waits) if waits else 0.0,
+                "p95": waits[int(len(waits) * 0.95)] if waits else 0.0,
+                "max": waits[-1] if waits else 0.0,
+            },
+        }
+    
+    def _depth_by_channel(self) -> dict[str, int]:
+        depth: dict[str, int] = {}
+        for queues in self._inbound:
+            for channel, queue in queues.items():
+                depth[channel] = depth.get(channel, 0) + len(queue)
+        return depth
@@ -9,6 +9,8 @@ from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
 from nanobot.config.schema import Config
+from nanobot.session.manager import SessionManager
+from nanobot.utils.http import HttpClientPool
 
 
 class ChannelManager:
@@ -21,9 +23,17 @@ class ChannelManager:
     - Route outbound messages
     """
     
-    def __init__(self, config: Config, bus: MessageBus):
+    def __init__(
+        self,
+        config: Config,
+        bus: MessageBus,
+        http: HttpClientPool | None = None,
+        sessions: SessionManager | None = None,
+    ):
         self.config = config
         self.bus = bus
+        self.http = http
+        self.sessions = sessions
         self.channels: dict[str, BaseChannel] = {}
         self._dispatch_task: asyncio.Task | None = None
         
@@ -40,6 +50,7 @@ class ChannelManager:
                     self.config.channels.web,
                     self.bus,
                     workspace=self.config.workspace_path,
+                    sessions=self.sessions,
                 )
                 logger.info("Web channel enabled")
             except ImportError as e:
@@ -53,6 +64,7 @@ class ChannelManager:
                     self.config.channels.telegram,
                     self.bus,
                     groq_api_key=self.config.providers.groq.api_key,
+                    http=self.http,
                 )
                 logger.info("Telegram channel enabled")
             except ImportError as e:
@@ -17,11 +17,11 @@ from websockets.datastructures import Headers
 from websockets.exceptions import ConnectionClosed
 from websockets.http11 import Request, Response
 
-from nanobot.bus.events import OutboundMessage
+from nanobot.bus.events import OutboundDelta, OutboundMessage, SubagentProgress
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
 from nanobot.config.schema import WebConfig
-from nanobot.session.manager import SessionManager
+from nanobot.session.manager import SessionChange, SessionManager
 
 
 _INDEX_HTML_CACHE: str | None = None
@@ -61,6 +61,12 @@ def _list_skill_dirs() -> list[str]:
         return []
 
 
+# Deltas waiting to be sent; beyond this, new deltas are dropped rather than
+# letting a slow client hold up the agent.
+_DELTA_QUEUE_SIZE = 1000
+_SEND_TIMEOUT_S = 2.0
+
+
 def _http_response(status: int, reason: str, content_type: str, body: bytes) -> Response:
     headers = Headers()
     headers["Content-Type"] = content_type
@@ -81,13 +87,28 @@ class WebChannel(BaseChannel):
 
     name = "web"
 
-    def __init__(self, config: WebConfig, bus: MessageBus, workspace: Path):
+    def __init__(
+        self,
+        config: WebConfig,
+        bus: MessageBus,
+        workspace: Path,
+        sessions: SessionManager | None = None,
+    ):
         super().__init__(config, bus)
         self.config: WebConfig = config
         self._server: Server | None = None
         self._ready = asyncio.Event()
         self._connections: dict[str, set[ServerConnection]] = {}
-        self._sessions = SessionManager(workspace)
+        # Shared with the agent so history is served from memory, not re-read from disk.
+        self._sessions = sessions or SessionManager(workspace)
+        self._sessions.subscribe(self._on_session_change)
+        self._history: dict[str, str] = {}  # session id -> serialized history payload
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._deltas: asyncio.Queue[OutboundDelta] = asyncio.Queue(maxsize=_DELTA_QUEUE_SIZE)
+        self._delta_task: asyncio.Task[None] | None = None
+        self._dropped_deltas = 0
+        self.bus.subscribe_delta(self.name, self.send_delta)
+        self.bus.subscribe_progress(self.name, self.send_progress)
 
     async def start(self) -> None:
         """Start the WebSocket + HTTP server."""
@@ -123,6 +144,14 @@ class WebChannel(BaseChannel):
         """Stop the web server and close all client connections."""
         self._running = False
 
+        if self._delta_task:
+            self._delta_task.cancel()
+            try:
+                await self._delta_task
+            except asyncio.CancelledError:
+                pass
+            self._delta_task = None
+
         # Close client connections first (best-effort).
         for conns in list(self._connections.values()):
             for ws in list(conns):
@@ -139,32 +168,79 @@ class WebChannel(BaseChannel):
 
     async def send(self, msg: OutboundMessage) -> None:
         """Send an outbound message to all connected clients in the session."""
-        conns = self._connections.get(msg.chat_id)
-        if not conns:
-            return
-
-        payload = {
+        payload: dict[str, Any] = {
             "type": "message",
             "role": "assistant",
             "content": msg.content or "",
             "timestamp": datetime.now().isoformat(),
         }
-        raw = json.dumps(payload, ensure_ascii=False)
+        # Lets the UI replace exactly the streaming bubbles of this turn.
+        if msg.metadata.get("stream_ids"):
+            payload["streams"] = msg.metadata["stream_ids"]
+        await self._broadcast(msg.chat_id, payload)
+
+    async def send_delta(self, delta: OutboundDelta) -> None:
+        """
+        Queue a streamed response delta for the session's clients.
+
+        Never blocks: deltas are sent by a background task, and dropped when
+        the queue is full (the final message still carries the full text).
+        """
+        if not self._connections.get(delta.chat_id):
+            return
+        if self._delta_task is None or self._delta_task.done():
+            self._delta_task = asyncio.create_task(self._send_deltas())
+        try:
+            self._deltas.put_nowait(delta)
+        except asyncio.QueueFull:
+            self._dropped_deltas += 1
+            if self._dropped_deltas % 100 == 1:
+                logger.warning(f"Web delta queue full, dropped {self._dropped_deltas} deltas so far")
+
+    async def send_progress(self, event: SubagentProgress) -> None:
+        """Show a background task's progress to the session's clients."""
+        await self._broadcast(event.chat_id, {"type": "info", "content": event.describe()})
+
+    async def _send_deltas(self) -> None:
+        while True:
+            delta = await self._deltas.get()
+            payload = {
+                "type": "delta",
+                "stream": delta.stream_id,
+                "content": delta.content,
+            }
+            try:
+                await self._broadcast(delta.chat_id, payload)
+            except Exception as e:
+                logger.warning(f"Web delta send failed: {e}")
+
+    async def _broadcast(self, session_id: str, payload: dict[str, Any]) -> None:
+        if self._connections.get(session_id):
+            await self._broadcast_raw(session_id, json.dumps(payload, ensure_ascii=False))
+
+    async def _broadcast_raw(self, session_id: str, raw: str) -> None:
+        conns = self._connections.get(session_id)
+        if not conns:
+            return
 
         stale: list[ServerConnection] = []
-        for ws in conns:
+        for ws in list(conns):
             try:
-                await ws.send(raw)
+                await asyncio.wait_for(ws.send(raw), timeout=_SEND_TIMEOUT_S)
             except ConnectionClosed:
                 stale.append(ws)
+            except asyncio.TimeoutError:
+                logger.warning(f"Web send timed out, dropping client in session {session_id}")
+                stale.append(ws)
             except Exception as e:
-                logger.debug(f"Web send failed: {e}")
+                logger.warning(f"Web send failed: {e}")
                 stale.append(ws)
 
         for ws in stale:
             conns.discard(ws)
         if not conns:
-            self._connections.pop(msg.chat_id, None)
+            self._connections.pop(session_id, None)
+            self._history.pop(session_id, None)
 
     async def wait_ready(self, timeout_s: float = 5.0) -> None:
         """Wait until the server is ready (useful in tests)."""
@@ -239,13 +315,24 @@ class WebChannel(BaseChannel):
             conns.discard(ws)
             if not conns:
                 self._connections.pop(session_id, None)
+                self._history.pop(session_id, None)
             logger.info(f"Web client disconnected: session={session_id} client={client_id}")
 
     async def _send_history(self, ws: ServerConnection, session_id: str) -> None:
-        key = f"{self.name}:{session_id}"
-        # The agent writes session history via a different SessionManager instance.
-        # Force refresh from disk to avoid serving stale cached history on reloads.
-        session = self._sessions.get_or_create(key, refresh=True)
+        await ws.send(self._history_payload(session_id))
+
+    def _history_payload(self, session_id: str) -> str:
+        """
+        Serialized history for a session, cached until the session changes.
+
+        Reconnect storms (page reloads, flaky mobile networks) reuse the
+        cached payload instead of rebuilding it for every connection.
+        """
+        cached = self._history.get(session_id)
+        if cached is not None:
+            return cached
+
+        session = self._sessions.get_or_create(f"{self.name}:{session_id}")
 
         # Send full session messages (role/content/timestamp) for UI rendering.
         messages: list[dict[str, Any]] = []
@@ -263,7 +350,23 @@ class WebChannel(BaseChannel):
             )
 
         payload = {"type": "history", "session": session_id, "messages": messages}
-        await ws.send(json.dumps(payload, ensure_ascii=False))
+        raw = json.dumps(payload, ensure_ascii=False)
+        if session_id in self._connections:
+            self._history[session_id] = raw
+        return raw
+
+    def _on_session_change(self, change: SessionChange) -> None:
+        """Invalidate cached history; push cleared history to every open tab."""
+        channel, _, session_id = change.key.partition(":")
+        if channel != self.name:
+            return
+        self._history.pop(session_id, None)
+        if change.cleared and self._connections.get(session_id):
+            task = asyncio.create_task(
+                self._broadcast_raw(session_id, self._history_payload(session_id))
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
 
     async def _handle_ws_message(
         self,
@@ -305,10 +408,11 @@ class WebChannel(BaseChannel):
             return
 
         if msg_type == "clear":
-            key = f"{self.name}:{session_id}"
-            self._sessions.delete(key)
+            # Clearing notifies subscribers, which resends history to all tabs.
+            session = self._sessions.get_or_create(f"{self.name}:{session_id}")
+            session.clear()
+            self._sessions.save(session)
             await ws.send(json.dumps({"type": "info", "content": "cleared"}, ensure_ascii=False))
-            await self._send_history(ws, session_id)
             return
 
         await ws.send(
@@ -152,6 +152,68 @@ This file stores important information that should persist across sessions.
 # ============================================================================
 
 
+def _make_resilient(config, provider, http=None):
+    """
+    Wrap a provider with rate limits, retries, circuit breakers and failover.
+    
+    Failover goes to agents.defaults.model_bk. Rate limits
+    (providers.rateLimits) wrap each model's provider individually, so
+    retries and failover calls are budgeted as well.
+    """
+    from nanobot.providers.litellm_provider import LiteLLMProvider
+    from nanobot.providers.resilient import ResilientProvider
+    from nanobot.providers.scheduler import RateLimitedProvider, RateLimiter
+    
+    limiter = RateLimiter(config.providers.rate_limits) if config.providers.rate_limits else None
+    
+    def limited(p):
+        return RateLimitedProvider(p, limiter) if limiter else p
+    
+    if not config.providers.resilience.enabled:
+        return limited(provider)
+    
+    fallbacks = []
+    model_bk = config.agents.defaults.model_bk
+    if model_bk:
+        azure = config.get_azure_openai()
+        if model_bk.startswith("azure/") and azure:
+            backup = LiteLLMProvider(
+                api_key=azure.api_key,
+                api_base=azure.endpoint,
+                api_version=azure.api_version or None,
+                default_model=model_bk,
+                http=http,
+            )
+        else:
+            backup = LiteLLMProvider(
+                api_key=config.get_api_key(include_azure=False),
+                api_base=config.get_api_base(include_azure=False),
+                default_model=model_bk,
+                http=http,
+            )
+        fallbacks.append((limited(backup), model_bk))
+    
+    return ResilientProvider(limited(provider), fallbacks, config.providers.resilience)
+
+
+def _make_cached(config, provider):
+    """Put the response cache (providers.cache) in front of a provider if it is enabled."""
+    from pathlib import Path
+    from nanobot.config.loader import get_data_dir
+    from nanobot.providers.cache import CachedProvider, ResponseCache
+    
+    cache_config = config.providers.cache
+    if not cache_config.enabled:
+        return provider
+    cache = ResponseCache(
+        path=Path(cache_config.path).expanduser() if cache_config.path else get_data_dir() / "llm_cache",
+        ttl_s=cache_config.ttl_s,
+        max_entries=cache_config.max_entries,
+        max_disk_bytes=cache_config.max_disk_mb * 1024 * 1024,
+    )
+    return CachedProvider(provider, cache, cache_config)
+
+
 @app.command()
 def gateway(
     port: int | None = typer.Option(
@@ -161,13 +223,16 @@ def gateway(
 ):
     """Start the yiqunbot gateway."""
     from nanobot.config.loader import load_config, get_data_dir
-    from nanobot.bus.queue import MessageBus
+    from nanobot.bus.queue import MessageBus, PRIORITY_BACKGROUND
+    from nanobot.providers.cache import llm_cache
     from nanobot.providers.litellm_provider import LiteLLMProvider
     from nanobot.agent.loop import AgentLoop
     from nanobot.channels.manager import ChannelManager
     from nanobot.cron.service import CronService
     from nanobot.cron.types import CronJob
     from nanobot.heartbeat.service import HeartbeatService
+    from nanobot.session.manager import SessionManager
+    from nanobot.utils.http import HttpClientPool
     
     if verbose:
         import logging
@@ -184,7 +249,10 @@ def gateway(
     console.print(f"{__logo__} Starting yiqunbot gateway on port {config.gateway.port}...")
     
     # Create components
-    bus = MessageBus()
+    bus = MessageBus(config.gateway.bus)
+    http = HttpClientPool(config.gateway.http)
+    # One session store shared by the agent and the channels
+    sessions = SessionManager(config.workspace_path, config.sessions)
     
     # Create provider (supports OpenRouter, Anthropic, OpenAI, Azure OpenAI, Bedrock)
     model = config.agents.defaults.model
@@ -228,7 +296,9 @@ def gateway(
         api_base=api_base,
         api_version=api_version,
         default_model=model,
+        http=http,
     )
+    provider = _make_cached(config, _make_resilient(config, provider, http))
     
     # Create agent
     agent = AgentLoop(
@@ -239,15 +309,28 @@ def gateway(
         max_iterations=config.agents.defaults.max_tool_iterations,
         brave_api_key=config.tools.web.search.api_key or None,
         exec_config=config.tools.exec,
+        max_concurrent_sessions=config.agents.defaults.max_concurrent_sessions,
+        http=http,
+        sessions=sessions,
+        max_tokens=config.agents.defaults.max_tokens,
+        context_window=config.agents.defaults.context_window,
+        tokenizer=config.agents.defaults.tokenizer,
+        history_digest=config.agents.defaults.history_digest,
+        compaction_config=config.tools.compaction,
+        subagents_config=config.agents.subagents,
+        subagents_state_dir=get_data_dir() / "subagents",
     )
     
     # Create cron service
     async def on_cron_job(job: CronJob) -> str | None:
         """Execute a cron job through the agent."""
-        response = await agent.process_direct(
-            job.payload.message,
-            session_key=f"cron:{job.id}"
-        )
+        with llm_cache():
+            response = await agent.process_direct(
+                job.payload.message,
+                session_key=f"cron:{job.id}",
+                priority=PRIORITY_BACKGROUND,
+                with_history=not job.payload.stateless,
+            )
         # Optionally deliver to channel
         if job.payload.deliver and job.payload.to:
             from nanobot.bus.events import OutboundMessage
@@ -259,22 +342,41 @@ def gateway(
         return response
     
     cron_store_path = get_data_dir() / "cron" / "jobs.json"
-    cron = CronService(cron_store_path, on_job=on_cron_job)
+    cron = CronService(
+        cron_store_path,
+        on_job=on_cron_job,
+        max_workers=config.gateway.cron.max_workers,
+        flush_interval_s=config.gateway.cron.flush_interval_s,
+        compact_after=config.gateway.cron.compact_after,
+    )
     
     # Create heartbeat service
     async def on_heartbeat(prompt: str) -> str:
         """Execute heartbeat through the agent."""
-        return await agent.process_direct(prompt, session_key="cli:heartbeat")
+        with llm_cache():
+            return await agent.process_direct(
+                prompt,
+                session_key="cli:heartbeat",
+                priority=PRIORITY_BACKGROUND,
+                with_history=not config.gateway.heartbeat.stateless,
+            )
     
+    hb_config = config.gateway.heartbeat
     heartbeat = HeartbeatService(
         workspace=config.workspace_path,
         on_heartbeat=on_heartbeat,
-        interval_s=30 * 60,  # 30 minutes
-        enabled=True
+        interval_s=hb_config.interval_s,
+        enabled=hb_config.enabled,
+        max_interval_s=hb_config.max_interval_s,
+        backoff=hb_config.backoff,
+        recheck_s=hb_config.recheck_s,
+        watch=hb_config.watch,
+        watch_poll_s=hb_config.watch_poll_s,
+        state_path=get_data_dir() / "heartbeat" / "state.json",
     )
     
     # Create channel manager
-    channels = ChannelManager(config, bus)
+    channels = ChannelManager(config, bus, http=http, sessions=sessions)
     
     if channels.enabled_channels:
         console.print(f"[green]✓[/green] Channels enabled: {', '.join(channels.enabled_channels)}")
@@ -289,7 +391,11 @@ def gateway(
     if cron_status["jobs"] > 0:
         console.print(f"[green]✓[/green] Cron: {cron_status['jobs']} scheduled jobs")
     
-    console.print(f"[green]✓[/green] Heartbeat: every 30m")
+    if hb_config.enabled:
+        console.print(
+            f"[green]✓[/green] Heartbeat: every {hb_config.interval_s // 60}m"
+            f"{' (watching HEARTBEAT.md)' if hb_config.watch else ''}"
+        )
     
     async def run():
         try:
@@ -305,6 +411,9 @@ def gateway(
             cron.stop()
             agent.stop()
             await channels.stop_all()
+        finally:
+            await http.aclose()
+            sessions.close()
     
     asyncio.run(run())
 
@@ -326,6 +435,7 @@ def agent(
     from nanobot.bus.queue import MessageBus
     from nanobot.providers.litellm_provider import LiteLLMProvider
     from nanobot.agent.loop import AgentLoop
+    from nanobot.utils.http import HttpClientPool
     
     config = load_config()
     
@@ -365,12 +475,15 @@ def agent(
         raise typer.Exit(1)
 
     bus = MessageBus()
+    http = HttpClientPool(config.gateway.http)
     provider = LiteLLMProvider(
         api_key=api_key,
         api_base=api_base,
         api_version=api_version,
         default_model=model,
+        http=http,
     )
+    provider = _make_cached(config, _make_resilient(config, provider, http))
     
     agent_loop = AgentLoop(
         bus=bus,
@@ -378,13 +491,24 @@ def agent(
         workspace=config.workspace_path,
         brave_api_key=config.tools.web.search.api_key or None,
         exec_config=config.tools.exec,
+        session_config=config.sessions,
+        max_tokens=config.agents.defaults.max_tokens,
+        context_window=config.agents.defaults.context_window,
+        tokenizer=config.agents.defaults.tokenizer,
+        history_digest=config.agents.defaults.history_digest,
+        compaction_config=config.tools.compaction,
+        subagents_config=config.agents.subagents,
+        http=http,
     )
     
     if message:
         # Single message mode
         async def run_once():
-            response = await agent_loop.process_direct(message, session_id)
-            console.print(f"\n{__logo__} {response}")
+            try:
+                response = await agent_loop.process_direct(message, session_id)
+                console.print(f"\n{__logo__} {response}")
+            finally:
+                await http.aclose()
         
         asyncio.run(run_once())
     else:
@@ -392,17 +516,20 @@ def agent(
         console.print(f"{__logo__} Interactive mode (Ctrl+C to exit)\n")
         
         async def run_interactive():
-            while True:
-                try:
-                    user_input = console.input("[bold blue]You:[/bold blue] ")
-                    if not user_input.strip():
-                        continue
-                    
-                    response = await agent_loop.process_direct(user_input, session_id)
-                    console.print(f"\n{__logo__} {response}\n")
-                except KeyboardInterrupt:
-                    console.print("\nGoodbye!")
-                    break
+            try:
+                while True:
+                    try:
+                        user_input = console.input("[bold blue]You:[/bold blue] ")
+                        if not user_input.strip():
+                            continue
+                        
+                        response = await agent_loop.process_direct(user_input, session_id)
+                        console.print(f"\n{__logo__} {response}\n")
+                    except KeyboardInterrupt:
+                        console.print("\nGoodbye!")
+                        break
+            finally:
+                await http.aclose()
         
         asyncio.run(run_interactive())
 
@@ -598,6 +725,12 @@ def cron_add(
     deliver: bool = typer.Option(False, "--deliver", "-d", help="Deliver response to channel"),
     to: str = typer.Option(None, "--to", help="Recipient for delivery"),
     channel: str = typer.Option(None, "--channel", help="Channel for delivery (e.g. 'telegram', 'whatsapp')"),
+    overlap: str = typer.Option(
+        "skip", "--overlap", help="If still running when due again: skip, queue or allow"
+    ),
+    stateless: bool = typer.Option(
+        False, "--stateless", help="Run without earlier runs' history (repeats can be cached)"
+    ),
 ):
     """Add a scheduled job."""
     from nanobot.config.loader import get_data_dir
@@ -620,14 +753,20 @@ def cron_add(
     store_path = get_data_dir() / "cron" / "jobs.json"
     service = CronService(store_path)
     
-    job = service.add_job(
-        name=name,
-        schedule=schedule,
-        message=message,
-        deliver=deliver,
-        to=to,
-        channel=channel,
-    )
+    try:
+        job = service.add_job(
+            name=name,
+            schedule=schedule,
+            message=message,
+            deliver=deliver,
+            to=to,
+            channel=channel,
+            overlap=overlap,
+            stateless=stateless,
+        )
+    except ValueError as e:
+        console.print(f"[red]Error: {e}[/red]")
+        raise typer.Exit(1)
     
     console.print(f"[green]✓[/green] Added job '{job.name}' ({job.id})")
 
@@ -690,6 +829,132 @@ def cron_run(
         console.print(f"[red]Failed to run job {job_id}[/red]")
 
 
+# ============================================================================
+# Subagent Commands
+# ============================================================================
+
+subagents_app = typer.Typer(help="Inspect and cancel the gateway's background subagents")
+app.add_typer(subagents_app, name="subagents")
+
+
+@subagents_app.command("list")
+def subagents_list():
+    """List queued, running and recently finished subagents."""
+    import json
+    import time
+    from nanobot.config.loader import get_data_dir
+    
+    status_path = get_data_dir() / "subagents" / "status.json"
+    if not status_path.exists():
+        console.print("No subagents.")
+        return
+    data = json.loads(status_path.read_text())
+    runs = data.get("subagents", [])
+    if not runs:
+        console.print("No subagents.")
+        return
+    
+    table = Table(
+        title=f"Subagents ({data['running']} running, {data['queued']} queued, "
+        f"updated {time.strftime('%H:%M:%S', time.localtime(data['updated_at']))})"
+    )
+    table.add_column("ID", style="cyan")
+    table.add_column("Label")
+    table.add_column("Origin")
+    table.add_column("Status")
+    table.add_column("Steps")
+    table.add_column("Elapsed")
+    table.add_column("Last Tool")
+    for run in runs:
+        table.add_row(
+            run["id"], run["label"], run["origin"], run["status"],
+            str(run["iterations"]), f"{run['elapsed_s']:.0f}s", run.get("last_tool") or "",
+        )
+    console.print(table)
+
+
+@subagents_app.command("cancel")
+def subagents_cancel(
+    task_id: str = typer.Argument(..., help="Subagent ID to cancel"),
+):
+    """Ask the running gateway to cancel a subagent."""
+    from nanobot.config.loader import get_data_dir
+    
+    cancel_dir = get_data_dir() / "subagents" / "cancel"
+    cancel_dir.mkdir(parents=True, exist_ok=True)
+    (cancel_dir / task_id).touch()
+    console.print(f"[green]✓[/green] Requested cancellation of subagent {task_id}")
+
+
+# ============================================================================
+# Session Commands
+# ============================================================================
+
+sessions_app = typer.Typer(help="Manage conversation sessions")
+app.add_typer(sessions_app, name="sessions")
+
+
+@sessions_app.command("list")
+def sessions_list(
+    limit: int = typer.Option(20, "--limit", "-n", help="Sessions per page"),
+    page: int = typer.Option(1, "--page", "-p", help="Page number"),
+):
+    """List sessions, most recently active first."""
+    from nanobot.config.loader import load_config
+    from nanobot.session.store import create_store
+    
+    config = load_config()
+    store = create_store(config.sessions)
+    try:
+        rows = store.list_sessions(limit=limit, offset=(max(page, 1) - 1) * limit)
+    finally:
+        store.close()
+    
+    if not rows:
+        console.print("No sessions.")
+        return
+    
+    table = Table(title=f"Sessions ({config.sessions.backend}, page {page})")
+    table.add_column("Key", style="cyan")
+    table.add_column("Updated")
+    table.add_column("Created")
+    for row in rows:
+        table.add_row(row["key"], row.get("updated_at") or "", row.get("created_at") or "")
+    console.print(table)
+
+
+@sessions_app.command("migrate")
+def sessions_migrate(
+    to: str = typer.Option("sqlite", "--to", help="Target backend: sqlite or jsonl"),
+):
+    """Copy all sessions from the other backend into TO."""
+    from nanobot.config.loader import load_config
+    from nanobot.session.jsonl_store import JsonlSessionStore
+    from nanobot.session.sqlite_store import SqliteSessionStore
+    from nanobot.session.store import migrate_sessions, sqlite_path
+    from nanobot.utils.helpers import get_sessions_path
+    
+    config = load_config()
+    jsonl = JsonlSessionStore(get_sessions_path(), config.sessions)
+    sqlite = SqliteSessionStore(sqlite_path(config.sessions), config.sessions)
+    if to == "sqlite":
+        src, dst = jsonl, sqlite
+    elif to == "jsonl":
+        src, dst = sqlite, jsonl
+    else:
+        console.print(f"[red]Unknown backend: {to}[/red]")
+        raise typer.Exit(1)
+    
+    try:
+        count = migrate_sessions(src, dst)
+    finally:
+        sqlite.close()
+    
+    console.print(f"[green]✓[/green] Migrated {count} sessions to {to}")
+    if config.sessions.backend != to:
+        console.print(f'Set "sessions": {{"backend": "{to}"}} in your config to use them.')
+
+
 # ============================================================================
 # Status Commands
 # ============================================================================
@@ -2,6 +2,7 @@
 
 import os
 from pathlib import Path
+from typing import Literal
 from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings
 
@@ -39,14 +40,29 @@ class AgentDefaults(BaseModel):
     """Default agent configuration."""
     workspace: str = "~/.nanobot/workspace"
     model: str = "anthropic/claude-opus-4-5"
+    model_bk: str = ""  # Backup model used when the primary fails or is unavailable
     max_tokens: int = 8192
     temperature: float = 0.7
     max_tool_iterations: int = 20
+    max_concurrent_sessions: int = 4  # Sessions processed in parallel by the gateway
+    context_window: int = 0  # Prompt token budget; 0 = the model's known limit
+    tokenizer: Literal["auto", "tiktoken", "heuristic"] = "auto"
+    history_digest: bool = True  # Summarize history that no longer fits the budget
+
+
+class SubagentsConfig(BaseModel):
+    """Background subagent pool."""
+    max_concurrent: int = 4  # Subagents running at once across all chats
+    max_per_origin: int = 2  # Subagents running at once for one chat
+    max_queued: int = 32  # Spawns waiting for a slot before new ones are refused
+    max_iterations: int = 15
+    progress_interval_s: float = 30.0  # How often running subagents report progress; 0 = never
 
 
 class AgentsConfig(BaseModel):
     """Agent configuration."""
     defaults: AgentDefaults = Field(default_factory=AgentDefaults)
+    subagents: SubagentsConfig = Field(default_factory=SubagentsConfig)
 
 
 class ProviderConfig(BaseModel):
@@ -64,6 +80,37 @@ class AzureOpenAIConfig(BaseModel):
     deployment_name: str = ""
 
 
+class ResilienceConfig(BaseModel):
+    """Retries, circuit breaking and failover for LLM calls."""
+    enabled: bool = True
+    max_retries: int = 3  # Retries per model for rate limits, 5xx, timeouts and connection errors
+    base_delay_s: float = 0.5  # First backoff step (doubles per retry, with full jitter)
+    max_delay_s: float = 8.0
+    max_retry_after_s: float = 30.0  # Longer Retry-After requests fail over instead of waiting
+    timeout_s: float = 120.0  # Per-attempt timeout; 0 = none
+    breaker_failures: int = 5  # Consecutive failures that open a model's circuit
+    breaker_cooldown_s: float = 30.0  # How long an open circuit skips the model
+    hedge_after_s: float = 0.0  # Also ask the backup model if the primary is this slow; 0 = off
+
+
+class RateLimitConfig(BaseModel):
+    """Client-side request and token budgets for one model."""
+    rpm: int = 0  # Requests per minute; 0 = unlimited
+    tpm: int = 0  # Tokens per minute (prompt + completion); 0 = unlimited
+
+
+class ResponseCacheConfig(BaseModel):
+    """Cache of LLM responses for repeated identical requests."""
+    enabled: bool = False
+    temperature_zero: bool = True  # Also cache every call made at temperature 0
+    replay: bool = False  # Cache every call (for replaying recorded conversations)
+    background_ignore_volatile: bool = False  # Cron/heartbeat keys ignore the current time and today's notes
+    ttl_s: float = 86400.0
+    max_entries: int = 512  # Responses kept in memory
+    max_disk_mb: int = 64  # Disk budget; least recently written entries go first
+    path: str = ""  # Defaults to ~/.nanobot/llm_cache
+
+
 class ProvidersConfig(BaseModel):
     """Configuration for LLM providers."""
     anthropic: ProviderConfig = Field(default_factory=ProviderConfig)
@@ -74,12 +121,69 @@ class ProvidersConfig(BaseModel):
     vllm: ProviderConfig = Field(default_factory=ProviderConfig)
     gemini: ProviderConfig = Field(default_factory=ProviderConfig)
     azure_openai: AzureOpenAIConfig = Field(default_factory=AzureOpenAIConfig)
+    resilience: ResilienceConfig = Field(default_factory=ResilienceConfig)
+    rate_limits: dict[str, RateLimitConfig] = Field(default_factory=dict)  # Model name (or "*") -> limits
+    cache: ResponseCacheConfig = Field(default_factory=ResponseCacheConfig)
+
+
+class HttpPoolConfig(BaseModel):
+    """Shared HTTP client pool configuration."""
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0  # Seconds an idle connection is kept open
+    max_connections_per_host: int = 10  # 0 = no per-host limit
+    http2: bool = False  # Requires the 'h2' package
+    timeout: float = 60.0
+
+
+class BusConfig(BaseModel):
+    """Message bus queue limits and overflow handling."""
+    inbound_max_size: int = 1000  # 0 = unbounded
+    outbound_max_size: int = 1000  # 0 = unbounded
+    overflow: Literal["block", "drop_oldest", "reject"] = "block"
+    busy_message: str = "I'm handling a lot of messages right now, please try again in a moment."
+
+
+class SessionsConfig(BaseModel):
+    """Session persistence configuration."""
+    backend: Literal["jsonl", "sqlite"] = "jsonl"
+    sqlite_path: str = ""  # Defaults to ~/.nanobot/sessions.db
+    fsync: Literal["always", "interval", "never"] = "interval"
+    fsync_interval_s: float = 1.0  # Minimum seconds between fsyncs in "interval" mode
+    compact_interval_s: float = 300.0  # How often background compaction runs
+    compact_min_dead: int = 200  # Dead records in a file before it is compacted
+    resident_messages: int = 200  # Most recent messages kept in memory per session
+    cache_max_sessions: int = 256  # Sessions kept in memory (least recently used are evicted)
+    cache_max_mb: int = 64  # Approximate memory budget for cached sessions
+
+
+class HeartbeatConfig(BaseModel):
+    """Periodic HEARTBEAT.md check-ins."""
+    enabled: bool = True
+    interval_s: int = 30 * 60
+    max_interval_s: int = 4 * 60 * 60  # Idle backoff ceiling
+    backoff: float = 2.0  # Interval multiplier after each idle tick
+    recheck_s: int = 0  # Re-run an unchanged file already answered OK after this long; 0 = never
+    watch: bool = True  # Tick as soon as HEARTBEAT.md is edited
+    watch_poll_s: float = 2.0
+    stateless: bool = False  # Run without earlier heartbeats' history (repeats can be cached)
+
+
+class CronConfig(BaseModel):
+    """Scheduled job execution."""
+    max_workers: int = 4  # Due jobs run concurrently, up to this many at once
+    flush_interval_s: float = 1.0  # How often run-state changes are written to the journal
+    compact_after: int = 1000  # Journal records before it is folded into a snapshot
 
 
 class GatewayConfig(BaseModel):
     """Gateway/server configuration."""
     host: str = "0.0.0.0"
     port: int = 18790
+    http: HttpPoolConfig = Field(default_factory=HttpPoolConfig)
+    bus: BusConfig = Field(default_factory=BusConfig)
+    heartbeat: HeartbeatConfig = Field(default_factory=HeartbeatConfig)
+    cron: CronConfig = Field(default_factory=CronConfig)
 
 
 class WebSearchConfig(BaseModel):
@@ -97,12 +201,47 @@ class ExecToolConfig(BaseModel):
     """Shell exec tool configuration."""
     timeout: int = 60
     restrict_to_workspace: bool = False  # If true, block commands accessing paths outside workspace
+    max_output_chars: int = 10000  # Output kept per command: its start and its end
+    max_output_bytes: int = 32 * 1024 * 1024  # Commands writing more than this are killed
+    persistent_shell: bool = False  # Keep one shell per chat so cd/env carry over between commands
+    shell_idle_s: float = 600.0  # Close a chat's shell after this long without commands
+    max_concurrent: int = 4  # Commands running at once across the agent and its subagents
+    # Limits applied to each command's processes; 0 = inherit the gateway's
+    cpu_limit_s: int = 0
+    memory_limit_mb: int = 0  # Address space per process
+    open_files_limit: int = 0
+    process_limit: int = 0  # Counts all processes of the gateway's user, not just this command's
+
+
+class ToolResultPolicy(BaseModel):
+    """How a tool result is shrunk once the model has seen it."""
+    mode: Literal["truncate", "handle", "keep"] = "truncate"  # handle = re-expandable with expand_result
+    max_chars: int = 4000  # Results up to this size are left alone
+    head_chars: int = 1500  # Characters kept from the start
+    tail_chars: int = 500  # Characters kept from the end
+
+
+def _default_result_policies() -> dict[str, ToolResultPolicy]:
+    return {
+        "read_file": ToolResultPolicy(mode="handle"),
+        "web_fetch": ToolResultPolicy(mode="handle"),
+        "expand_result": ToolResultPolicy(mode="truncate"),
+    }
+
+
+class ToolCompactionConfig(BaseModel):
+    """Compaction of older tool results within one agent turn."""
+    enabled: bool = True
+    keep_recent: int = 1  # Most recent rounds of tool results kept in full
+    default: ToolResultPolicy = Field(default_factory=ToolResultPolicy)
+    per_tool: dict[str, ToolResultPolicy] = Field(default_factory=_default_result_policies)
 
 
 class ToolsConfig(BaseModel):
     """Tools configuration."""
     web: WebToolsConfig = Field(default_factory=WebToolsConfig)
     exec: ExecToolConfig = Field(default_factory=ExecToolConfig)
+    compaction: ToolCompactionConfig = Field(default_factory=ToolCompactionConfig)
 
 
 class Config(BaseSettings):
@@ -111,6 +250,7 @@ class Config(BaseSettings):
     channels: ChannelsConfig = Field(default_factory=ChannelsConfig)
     providers: ProvidersConfig = Field(default_factory=ProvidersConfig)
     gateway: GatewayConfig = Field(default_factory=GatewayConfig)
+    sessions: SessionsConfig = Field(default_factory=SessionsConfig)
     tools: ToolsConfig = Field(default_factory=ToolsConfig)
     
     @property
@@ -118,9 +258,9 @@ class Config(BaseSettings):
         """Get expanded workspace path."""
         return Path(self.agents.defaults.workspace).expanduser()
     
-    def get_api_key(self) -> str | None:
+    def get_api_key(self, include_azure: bool = True) -> str | None:
         """Get API key in priority order: OpenRouter > Anthropic > OpenAI > Gemini > Zhipu > Groq > vLLM."""
-        azure = self.get_azure_openai()
+        azure = self.get_azure_openai() if include_azure else None
         if azure and azure.enabled and azure.api_key:
             return azure.api_key
         return (
@@ -134,9 +274,9 @@ class Config(BaseSettings):
             None
         )
     
-    def get_api_base(self) -> str | None:
+    def get_api_base(self, include_azure: bool = True) -> str | None:
         """Get API base URL if using OpenRouter, Zhipu or vLLM."""
-        azure = self.get_azure_openai()
+        azure = self.get_azure_openai() if include_azure else None
         if azure and azure.enabled and azure.endpoint:
             return azure.endpoint
         if self.providers.openrouter.api_key:
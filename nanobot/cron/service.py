@@ -1,7 +1,8 @@
 """Cron service for scheduling agent tasks."""
 
 import asyncio
-import json
+import heapq
+import itertools
 import time
 import uuid
 from pathlib import Path
@@ -9,8 +10,11 @@ from typing import Any, Callable, Coroutine
 
 from loguru import logger
 
+from nanobot.cron.store import CronJournal
 from nanobot.cron.types import CronJob, CronJobState, CronPayload, CronSchedule, CronStore
 
+OVERLAP_POLICIES = ("skip", "queue", "allow")
+
 
 def _now_ms() -> int:
     return int(time.time() * 1000)
@@ -40,178 +44,214 @@ def _compute_next_run(schedule: CronSchedule, now_ms: int) -> int | None:
 
 
 class CronService:
-    """Service for managing and executing scheduled jobs."""
+    """
+    Service for managing and executing scheduled jobs.
+    
+    Enabled jobs sit in a min-heap keyed on their next run time, so adding,
+    removing or re-enabling a job and finding the next due one are all
+    O(log n). Entries of removed or rescheduled jobs are left in the heap
+    and discarded when they reach the top.
+    
+    Due jobs run concurrently, at most `max_workers` at a time, so a slow
+    agent turn doesn't hold up other jobs. A recurring job is rescheduled
+    as soon as it is dispatched; if it comes due again while still running,
+    its overlap policy decides: "skip" that run, "queue" one more run for
+    when the current one finishes, or "allow" running both at once.
+    
+    Jobs are persisted through a CronJournal: changes to a job's definition
+    are written immediately, run-state changes are coalesced and flushed
+    every `flush_interval_s`.
+    """
     
     def __init__(
         self,
         store_path: Path,
-        on_job: Callable[[CronJob], Coroutine[Any, Any, str | None]] | None = None
+        on_job: Callable[[CronJob], Coroutine[Any, Any, str | None]] | None = None,
+        max_workers: int = 4,
+        flush_interval_s: float = 1.0,
+        compact_after: int = 1000,
     ):
         self.store_path = store_path
         self.on_job = on_job  # Callback to execute job, returns response text
+        self.max_workers = max(1, max_workers)
+        self.flush_interval_s = flush_interval_s
+        self._journal = CronJournal(store_path, compact_after=compact_after)
         self._store: CronStore | None = None
         self._timer_task: asyncio.Task | None = None
+        self._flush_task: asyncio.Task | None = None
         self._running = False
+        self._wake = asyncio.Event()
+        self._heap: list[tuple[int, int, str]] = []  # (next run ms, seq, job id)
+        self._scheduled: dict[str, tuple[int, int]] = {}  # job id -> its live heap entry
+        self._seq = itertools.count()
+        self._slots = asyncio.Semaphore(self.max_workers)
+        self._running_jobs: dict[str, set[asyncio.Task]] = {}
+        self._queued: set[str] = set()  # Jobs with one more run queued behind the current one
     
     def _load_store(self) -> CronStore:
         """Load jobs from disk."""
         if self._store:
             return self._store
         
-        if self.store_path.exists():
-            try:
-                data = json.loads(self.store_path.read_text())
-                jobs = []
-                for j in data.get("jobs", []):
-                    jobs.append(CronJob(
-                        id=j["id"],
-                        name=j["name"],
-                        enabled=j.get("enabled", True),
-                        schedule=CronSchedule(
-                            kind=j["schedule"]["kind"],
-                            at_ms=j["schedule"].get("atMs"),
-                            every_ms=j["schedule"].get("everyMs"),
-                            expr=j["schedule"].get("expr"),
-                            tz=j["schedule"].get("tz"),
-                        ),
-                        payload=CronPayload(
-                            kind=j["payload"].get("kind", "agent_turn"),
-                            message=j["payload"].get("message", ""),
-                            deliver=j["payload"].get("deliver", False),
-                            channel=j["payload"].get("channel"),
-                            to=j["payload"].get("to"),
-                        ),
-                        state=CronJobState(
-                            next_run_at_ms=j.get("state", {}).get("nextRunAtMs"),
-                            last_run_at_ms=j.get("state", {}).get("lastRunAtMs"),
-                            last_status=j.get("state", {}).get("lastStatus"),
-                            last_error=j.get("state", {}).get("lastError"),
-                        ),
-                        created_at_ms=j.get("createdAtMs", 0),
-                        updated_at_ms=j.get("updatedAtMs", 0),
-                        delete_after_run=j.get("deleteAfterRun", False),
-                    ))
-                self._store = CronStore(jobs=jobs)
-            except Exception as e:
-                logger.warning(f"Failed to load cron store: {e}")
-                self._store = CronStore()
-        else:
-            self._store = CronStore()
-        
+        self._store = self._journal.load()
+        for job in self._store.jobs.values():
+            self._schedule(job)
         return self._store
     
-    def _save_store(self) -> None:
-        """Save jobs to disk."""
+    def _flush_store(self) -> None:
+        """Write pending run-state changes, compacting the journal when it has grown."""
         if not self._store:
             return
-        
-        self.store_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        data = {
-            "version": self._store.version,
-            "jobs": [
-                {
-                    "id": j.id,
-                    "name": j.name,
-                    "enabled": j.enabled,
-                    "schedule": {
-                        "kind": j.schedule.kind,
-                        "atMs": j.schedule.at_ms,
-                        "everyMs": j.schedule.every_ms,
-                        "expr": j.schedule.expr,
-                        "tz": j.schedule.tz,
-                    },
-                    "payload": {
-                        "kind": j.payload.kind,
-                        "message": j.payload.message,
-                        "deliver": j.payload.deliver,
-                        "channel": j.payload.channel,
-                        "to": j.payload.to,
-                    },
-                    "state": {
-                        "nextRunAtMs": j.state.next_run_at_ms,
-                        "lastRunAtMs": j.state.last_run_at_ms,
-                        "lastStatus": j.state.last_status,
-                        "lastError": j.state.last_error,
-                    },
-                    "createdAtMs": j.created_at_ms,
-                    "updatedAtMs": j.updated_at_ms,
-                    "deleteAfterRun": j.delete_after_run,
-                }
-                for j in self._store.jobs
-            ]
-        }
-        
-        self.store_path.write_text(json.dumps(data, indent=2))
+        try:
+            self._journal.flush()
+            if self._journal.needs_compaction(len(self._store.jobs)):
+                self._journal.snapshot(self._store)
+        except OSError as e:
+            logger.error(f"Failed to save cron store: {e}")
+    
+    async def _flush_loop(self) -> None:
+        while self._running:
+            try:
+                await asyncio.sleep(self.flush_interval_s)
+                self._flush_store()
+            except asyncio.CancelledError:
+                break
     
     async def start(self) -> None:
         """Start the cron service."""
         self._running = True
         self._load_store()
         self._recompute_next_runs()
-        self._save_store()
-        self._arm_timer()
+        self._journal.snapshot(self._store)
+        self._timer_task = asyncio.create_task(self._run_loop())
+        self._flush_task = asyncio.create_task(self._flush_loop())
         logger.info(f"Cron service started with {len(self._store.jobs if self._store else [])} jobs")
     
     def stop(self) -> None:
-        """Stop the cron service."""
+        """Stop the cron service and cancel running jobs."""
         self._running = False
-        if self._timer_task:
-            self._timer_task.cancel()
-            self._timer_task = None
+        for task in (self._timer_task, self._flush_task):
+            if task:
+                task.cancel()
+        self._timer_task = None
+        self._flush_task = None
+        self._flush_store()
+        for tasks in list(self._running_jobs.values()):
+            for task in tasks:
+                task.cancel()
+        self._queued.clear()
     
     def _recompute_next_runs(self) -> None:
         """Recompute next run times for all enabled jobs."""
         if not self._store:
             return
         now = _now_ms()
-        for job in self._store.jobs:
+        for job in self._store.jobs.values():
             if job.enabled:
                 job.state.next_run_at_ms = _compute_next_run(job.schedule, now)
+            self._schedule(job)
+    
+    def _schedule(self, job: CronJob) -> None:
+        """(Re)insert a job into the heap at its next run time, or take it out."""
+        next_run = job.state.next_run_at_ms
+        if not job.enabled or not next_run:
+            self._scheduled.pop(job.id, None)
+            return
+        if self._scheduled.get(job.id, (None,))[0] == next_run:
+            return
+        entry = (next_run, next(self._seq))
+        self._scheduled[job.id] = entry
+        heapq.heappush(self._heap, (*entry, job.id))
+        # Rebuild once stale entries dominate, keeping the heap O(live jobs).
+        if len(self._heap) > 2 * len(self._scheduled) + 64:
+            self._heap = [(t, seq, job_id) for job_id, (t, seq) in self._scheduled.items()]
+            heapq.heapify(self._heap)
+    
+    def _is_live(self, entry: tuple[int, int, str]) -> bool:
+        return self._scheduled.get(entry[2]) == entry[:2]
     
     def _get_next_wake_ms(self) -> int | None:
         """Get the earliest next run time across all jobs."""
-        if not self._store:
-            return None
-        times = [j.state.next_run_at_ms for j in self._store.jobs 
-                 if j.enabled and j.state.next_run_at_ms]
-        return min(times) if times else None
+        while self._heap and not self._is_live(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
     
     def _arm_timer(self) -> None:
-        """Schedule the next timer tick."""
-        if self._timer_task:
-            self._timer_task.cancel()
-        
-        next_wake = self._get_next_wake_ms()
-        if not next_wake or not self._running:
-            return
-        
-        delay_ms = max(0, next_wake - _now_ms())
-        delay_s = delay_ms / 1000
-        
-        async def tick():
-            await asyncio.sleep(delay_s)
-            if self._running:
-                await self._on_timer()
-        
-        self._timer_task = asyncio.create_task(tick())
+        """Make the timer loop re-check the next wake time."""
+        self._wake.set()
+    
+    async def _run_loop(self) -> None:
+        """Sleep until the next job is due (or the schedule changes), then dispatch."""
+        while self._running:
+            try:
+                next_wake = self._get_next_wake_ms()
+                timeout = None if next_wake is None else max(0, next_wake - _now_ms()) / 1000
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                if self._running:
+                    await self._on_timer()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Cron timer error: {e}")
     
     async def _on_timer(self) -> None:
-        """Handle timer tick - run due jobs."""
+        """Handle timer tick - dispatch due jobs."""
         if not self._store:
             return
         
         now = _now_ms()
-        due_jobs = [
-            j for j in self._store.jobs
-            if j.enabled and j.state.next_run_at_ms and now >= j.state.next_run_at_ms
-        ]
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if not self._is_live(entry):
+                continue
+            del self._scheduled[entry[2]]
+            job = self._store.jobs.get(entry[2])
+            if job is not None:
+                self._dispatch(job)
+    
+    def _dispatch(self, job: CronJob) -> None:
+        """Start a due job according to its overlap policy and reschedule it."""
+        if not self._running_jobs.get(job.id) or job.overlap == "allow":
+            self._launch(job)
+        elif job.overlap == "queue":
+            self._queued.add(job.id)
+            logger.info(f"Cron: job '{job.name}' still running; queued the next run")
+        else:
+            logger.info(f"Cron: job '{job.name}' still running; skipped this run")
         
-        for job in due_jobs:
-            await self._execute_job(job)
+        if job.schedule.kind != "at":
+            job.state.next_run_at_ms = _compute_next_run(job.schedule, _now_ms())
+            self._schedule(job)
+            self._journal.mark(job)
+    
+    def _launch(self, job: CronJob) -> None:
+        task = asyncio.create_task(self._run_worker(job))
+        self._running_jobs.setdefault(job.id, set()).add(task)
         
-        self._save_store()
-        self._arm_timer()
+        def done(t: asyncio.Task) -> None:
+            tasks = self._running_jobs.get(job.id)
+            if tasks is not None:
+                tasks.discard(t)
+                if not tasks:
+                    del self._running_jobs[job.id]
+            if job.id in self._queued and not self._running_jobs.get(job.id) and self._running:
+                self._queued.discard(job.id)
+                if self._store and job.id in self._store.jobs:
+                    self._launch(job)
+        
+        task.add_done_callback(done)
+    
+    async def _run_worker(self, job: CronJob) -> None:
+        async with self._slots:
+            await self._execute_job(job)
+        if self._store and job.id in self._store.jobs:
+            self._journal.mark(job)
+        else:
+            self._journal.delete(job.id)
     
     async def _execute_job(self, job: CronJob) -> None:
         """Execute a single job."""
@@ -235,23 +275,21 @@ class CronService:
         job.state.last_run_at_ms = start_ms
         job.updated_at_ms = _now_ms()
         
-        # Handle one-shot jobs
+        # Handle one-shot jobs (recurring ones were rescheduled when dispatched)
         if job.schedule.kind == "at":
             if job.delete_after_run:
-                self._store.jobs = [j for j in self._store.jobs if j.id != job.id]
+                self._store.jobs.pop(job.id, None)
             else:
                 job.enabled = False
                 job.state.next_run_at_ms = None
-        else:
-            # Compute next run
-            job.state.next_run_at_ms = _compute_next_run(job.schedule, _now_ms())
+            self._schedule(job)
     
     # ========== Public API ==========
     
     def list_jobs(self, include_disabled: bool = False) -> list[CronJob]:
         """List all jobs."""
         store = self._load_store()
-        jobs = store.jobs if include_disabled else [j for j in store.jobs if j.enabled]
+        jobs = [j for j in store.jobs.values() if include_disabled or j.enabled]
         return sorted(jobs, key=lambda j: j.state.next_run_at_ms or float('inf'))
     
     def add_job(
@@ -263,8 +301,14 @@ class CronService:
         channel: str | None = None,
         to: str | None = None,
         delete_after_run: bool = False,
+        overlap: str = "skip",
+        stateless: bool = False,
     ) -> CronJob:
         """Add a new job."""
+        if overlap not in OVERLAP_POLICIES:
+            raise ValueError(
+                f"Unknown overlap policy '{overlap}' (expected one of: {', '.join(OVERLAP_POLICIES)})"
+            )
         store = self._load_store()
         now = _now_ms()
         
@@ -279,15 +323,18 @@ class CronService:
                 deliver=deliver,
                 channel=channel,
                 to=to,
+                stateless=stateless,
             ),
             state=CronJobState(next_run_at_ms=_compute_next_run(schedule, now)),
             created_at_ms=now,
             updated_at_ms=now,
             delete_after_run=delete_after_run,
+            overlap=overlap,
         )
         
-        store.jobs.append(job)
-        self._save_store()
+        store.jobs[job.id] = job
+        self._schedule(job)
+        self._journal.put(job)
         self._arm_timer()
         
         logger.info(f"Cron: added job '{name}' ({job.id})")
@@ -296,12 +343,12 @@ class CronService:
     def remove_job(self, job_id: str) -> bool:
         """Remove a job by ID."""
         store = self._load_store()
-        before = len(store.jobs)
-        store.jobs = [j for j in store.jobs if j.id != job_id]
-        removed = len(store.jobs) < before
+        removed = store.jobs.pop(job_id, None) is not None
         
         if removed:
-            self._save_store()
+            self._scheduled.pop(job_id, None)
+            self._queued.discard(job_id)
+            self._journal.delete(job_id)
             self._arm_timer()
             logger.info(f"Cron: removed job {job_id}")
         
@@ -310,31 +357,33 @@ class CronService:
     def enable_job(self, job_id: str, enabled: bool = True) -> CronJob | None:
         """Enable or disable a job."""
         store = self._load_store()
-        for job in store.jobs:
-            if job.id == job_id:
-                job.enabled = enabled
-                job.updated_at_ms = _now_ms()
-                if enabled:
-                    job.state.next_run_at_ms = _compute_next_run(job.schedule, _now_ms())
-                else:
-                    job.state.next_run_at_ms = None
-                self._save_store()
-                self._arm_timer()
-                return job
-        return None
+        job = store.jobs.get(job_id)
+        if job is None:
+            return None
+        job.enabled = enabled
+        job.updated_at_ms = _now_ms()
+        if enabled:
+            job.state.next_run_at_ms = _compute_next_run(job.schedule, _now_ms())
+        else:
+            job.state.next_run_at_ms = None
+        self._schedule(job)
+        self._journal.put(job)
+        self._arm_timer()
+        return job
     
     async def run_job(self, job_id: str, force: bool = False) -> bool:
         """Manually run a job."""
         store = self._load_store()
-        for job in store.jobs:
-            if job.id == job_id:
-                if not force and not job.enabled:
-                    return False
-                await self._execute_job(job)
-                self._save_store()
-                self._arm_timer()
-                return True
-        return False
+        job = store.jobs.get(job_id)
+        if job is None or (not force and not job.enabled):
+            return False
+        await self._execute_job(job)
+        if job.id in store.jobs:
+            self._journal.put(job)
+        else:
+            self._journal.delete(job.id)
+        self._arm_timer()
+        return True
     
     def status(self) -> dict:
         """Get service status."""
@@ -342,5 +391,8 @@ class CronService:
         return {
             "enabled": self._running,
             "jobs": len(store.jobs),
+            "running": sum(len(tasks) for tasks in self._running_jobs.values()),
+            "queued": len(self._queued),
+            "unsaved": self._journal.pending,
             "next_wake_at_ms": self._get_next_wake_ms(),
         }
@@ -0,0 +1,214 @@
+"""Crash-safe persistence for cron jobs: a snapshot plus an append-only journal."""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+from nanobot.cron.types import CronJob, CronJobState, CronPayload, CronSchedule, CronStore
+
+
+def job_to_dict(j: CronJob) -> dict[str, Any]:
+    """Serialize a job in the store's (camelCase) format."""
+    return {
+        "id": j.id,
+        "name": j.name,
+        "enabled": j.enabled,
+        "schedule": {
+            "kind": j.schedule.kind,
+            "atMs": j.schedule.at_ms,
+            "everyMs": j.schedule.every_ms,
+            "expr": j.schedule.expr,
+            "tz": j.schedule.tz,
+        },
+        "payload": {
+            "kind": j.payload.kind,
+            "message": j.payload.message,
+            "deliver": j.payload.deliver,
+            "channel": j.payload.channel,
+            "to": j.payload.to,
+            "stateless": j.payload.stateless,
+        },
+        "state": {
+            "nextRunAtMs": j.state.next_run_at_ms,
+            "lastRunAtMs": j.state.last_run_at_ms,
+            "lastStatus": j.state.last_status,
+            "lastError": j.state.last_error,
+        },
+        "createdAtMs": j.created_at_ms,
+        "updatedAtMs": j.updated_at_ms,
+        "deleteAfterRun": j.delete_after_run,
+        "overlap": j.overlap,
+    }
+
+
+def job_from_dict(j: dict[str, Any]) -> CronJob:
+    """Deserialize a job written by job_to_dict."""
+    return CronJob(
+        id=j["id"],
+        name=j["name"],
+        enabled=j.get("enabled", True),
+        schedule=CronSchedule(
+            kind=j["schedule"]["kind"],
+            at_ms=j["schedule"].get("atMs"),
+            every_ms=j["schedule"].get("everyMs"),
+            expr=j["schedule"].get("expr"),
+            tz=j["schedule"].get("tz"),
+        ),
+        payload=CronPayload(
+            kind=j["payload"].get("kind", "agent_turn"),
+            message=j["payload"].get("message", ""),
+            deliver=j["payload"].get("deliver", False),
+            channel=j["payload"].get("channel"),
+            to=j["payload"].get("to"),
+            stateless=j["payload"].get("stateless", False),
+        ),
+        state=CronJobState(
+            next_run_at_ms=j.get("state", {}).get("nextRunAtMs"),
+            last_run_at_ms=j.get("state", {}).get("lastRunAtMs"),
+            last_status=j.get("state", {}).get("lastStatus"),
+            last_error=j.get("state", {}).get("lastError"),
+        ),
+        created_at_ms=j.get("createdAtMs", 0),
+        updated_at_ms=j.get("updatedAtMs", 0),
+        delete_after_run=j.get("deleteAfterRun", False),
+        overlap=j.get("overlap", "skip"),
+    )
+
+
+class CronJournal:
+    """
+    Snapshot-plus-journal persistence for a CronStore.
+    
+    The snapshot (`jobs.json`) is only ever replaced atomically (write to a
+    temporary file, fsync, rename), so a crash leaves either the old or the
+    new version. Changes in between are appended to `jobs.json.journal` as
+    one JSON line each: a job's full record ("put") or its removal ("del").
+    Loading replays the journal over the snapshot; a torn last line from a
+    crash mid-append is ignored.
+    
+    Adding, removing or enabling a job is appended and fsynced right away.
+    Run-state updates (last run, status, next run) are only marked dirty and
+    written by flush(), one record per job however often it fired, so the
+    cost of a firing doesn't grow with the number of jobs. Once the journal
+    holds `compact_after` records (or one per job, if there are more jobs)
+    it is folded into a new snapshot.
+    """
+    
+    def __init__(self, path: Path, compact_after: int = 1000):
+        self.path = path
+        self.journal_path = path.with_name(path.name + ".journal")
+        self.compact_after = compact_after
+        self._seq = 0  # Sequence number of the last record written
+        self._records = 0  # Records in the journal since the last snapshot
+        self._dirty: dict[str, CronJob] = {}
+    
+    def load(self) -> CronStore:
+        """Read the snapshot and replay the journal."""
+        jobs: dict[str, CronJob] = {}
+        snapshot_seq = 0
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                snapshot_seq = data.get("seq", 0)
+                for j in data.get("jobs", []):
+                    job = job_from_dict(j)
+                    jobs[job.id] = job
+            except Exception as e:
+                # Keep the unreadable file for inspection instead of overwriting it.
+                aside = self.path.with_name(f"{self.path.name}.corrupt-{int(time.time())}")
+                logger.error(f"Failed to load cron store ({e}); moved it to {aside.name}")
+                os.replace(self.path, aside)
+        self._seq = snapshot_seq
+        
+        if self.journal_path.exists():
+            good = 0  # Byte offset after the last intact record
+            with open(self.journal_path, "rb") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    good += len(line)
+                    seq = record.get("seq", 0)
+                    self._seq = max(self._seq, seq)
+                    if seq <= snapshot_seq:
+                        continue  # Already in the snapshot
+                    self._records += 1
+                    if record.get("op") == "put":
+                        job = job_from_dict(record["job"])
+                        jobs[job.id] = job
+                    elif record.get("op") == "del":
+                        jobs.pop(record.get("id"), None)
+            if good < self.journal_path.stat().st_size:
+                # A crash mid-append; cut the torn tail so new records start on a clean line.
+                logger.warning("Dropping a torn record at the end of the cron journal")
+                os.truncate(self.journal_path, good)
+        return CronStore(jobs=jobs)
+    
+    def put(self, job: CronJob) -> None:
+        """Durably record a job's definition and state."""
+        self._dirty.pop(job.id, None)
+        self._append([{"op": "put", "job": job_to_dict(job)}])
+    
+    def delete(self, job_id: str) -> None:
+        """Durably record a job's removal."""
+        self._dirty.pop(job_id, None)
+        self._append([{"op": "del", "id": job_id}])
+    
+    def mark(self, job: CronJob) -> None:
+        """Note that a job's run state changed; written by the next flush()."""
+        self._dirty[job.id] = job
+    
+    @property
+    def pending(self) -> int:
+        """Jobs with run-state changes not yet written."""
+        return len(self._dirty)
+    
+    def flush(self) -> None:
+        """Write coalesced run-state changes."""
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, {}
+        self._append([{"op": "put", "job": job_to_dict(job)} for job in dirty.values()])
+    
+    def needs_compaction(self, jobs: int) -> bool:
+        """Check whether the journal has grown enough to fold into a snapshot."""
+        # Scaling with the job count keeps snapshot cost amortized O(1) per record.
+        return self._records >= max(self.compact_after, jobs)
+    
+    def snapshot(self, store: CronStore) -> None:
+        """Atomically write the whole store and start a fresh journal."""
+        self._dirty.clear()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": store.version,
+            "seq": self._seq,
+            "jobs": [job_to_dict(j) for j in store.jobs.values()],
+        }
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        # Records up to `seq` are now in the snapshot; a crash before this
+        # truncation just means they are skipped on the next load.
+        with open(self.journal_path, "w", encoding="utf-8"):
+            pass
+        self._records = 0
+    
+    def _append(self, records: list[dict[str, Any]]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lines = []
+        for record in records:
+            self._seq += 1
+            lines.append(json.dumps({"seq": self._seq, **record}, ensure_ascii=False, separators=(",", ":")))
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._records += len(records)
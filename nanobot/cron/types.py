@@ -27,6 +27,8 @@ class CronPayload:
     deliver: bool = False
     channel: str | None = None  # e.g. "whatsapp"
     to: str | None = None  # e.g. phone number
+    # Run without the job's earlier turns, so repeated runs can hit the LLM response cache
+    stateless: bool = False
 
 
 @dataclass
@@ -50,10 +52,12 @@ class CronJob:
     created_at_ms: int = 0
     updated_at_ms: int = 0
     delete_after_run: bool = False
+    # What to do when the job comes due while a previous run is still going
+    overlap: Literal["skip", "queue", "allow"] = "skip"
 
 
 @dataclass
 class CronStore:
     """Persistent store for cron jobs."""
     version: int = 1
-    jobs: list[CronJob] = field(default_factory=list)
+    jobs: dict[str, CronJob] = field(default_factory=dict)  # id -> job, in insertion order
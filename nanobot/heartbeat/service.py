@@ -1,11 +1,16 @@
 """Heartbeat service - periodic agent wake-up to check for tasks."""
 
 import asyncio
+import hashlib
+import json
+import time
 from pathlib import Path
 from typing import Any, Callable, Coroutine
 
 from loguru import logger
 
+from nanobot.providers.cache import llm_cache_bypass
+
 # Default interval: 30 minutes
 DEFAULT_HEARTBEAT_INTERVAL_S = 30 * 60
 
@@ -41,6 +46,16 @@ class HeartbeatService:
     
     The agent reads HEARTBEAT.md from the workspace and executes any
     tasks listed there. If nothing needs attention, it replies HEARTBEAT_OK.
+    
+    A version of HEARTBEAT.md the agent already answered HEARTBEAT_OK for
+    is not sent again (unless `recheck_s` has passed), so an idle file
+    costs no LLM calls. The `recheck_s` re-run of such a version bypasses
+    the LLM response cache, so the agent really looks at it again.
+    
+    While nothing happens the interval backs off by `backoff` up to
+    `max_interval_s`; a change or a completed task resets it. With `watch`
+    on, the file is polled (a cheap stat) every `watch_poll_s` and an edit
+    triggers a tick as soon as it settles.
     """
     
     def __init__(
@@ -49,18 +64,41 @@ class HeartbeatService:
         on_heartbeat: Callable[[str], Coroutine[Any, Any, str]] | None = None,
         interval_s: int = DEFAULT_HEARTBEAT_INTERVAL_S,
         enabled: bool = True,
+        max_interval_s: float | None = None,
+        backoff: float = 2.0,
+        recheck_s: float = 0.0,
+        watch: bool = False,
+        watch_poll_s: float = 2.0,
+        state_path: Path | None = None,
     ):
         self.workspace = workspace
         self.on_heartbeat = on_heartbeat
         self.interval_s = interval_s
         self.enabled = enabled
+        self.max_interval_s = max(interval_s, max_interval_s or interval_s)
+        self.backoff = max(1.0, backoff)
+        self.recheck_s = recheck_s
+        self.watch = watch
+        self.watch_poll_s = watch_poll_s
+        self.state_path = state_path
         self._running = False
         self._task: asyncio.Task | None = None
+        self._watch_task: asyncio.Task | None = None
+        self._wake = asyncio.Event()
+        self._interval = float(interval_s)  # Current (backed-off) interval
+        self._seen: tuple[int, int] | None = None  # (mtime_ns, size) the watcher last saw
+        # Last version handled: {"stat": [mtime_ns, size], "hash", "ok", "at"}
+        self._handled: dict[str, Any] = self._load_state()
     
     @property
     def heartbeat_file(self) -> Path:
         return self.workspace / "HEARTBEAT.md"
     
+    @property
+    def current_interval_s(self) -> float:
+        """Seconds until the next scheduled tick (after backoff)."""
+        return self._interval
+    
     def _read_heartbeat_file(self) -> str | None:
         """Read HEARTBEAT.md content."""
         if self.heartbeat_file.exists():
@@ -70,6 +108,31 @@ class HeartbeatService:
                 return None
         return None
     
+    def _stat(self) -> tuple[int, int] | None:
+        try:
+            st = self.heartbeat_file.stat()
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+    
+    def _load_state(self) -> dict[str, Any]:
+        if not self.state_path or not self.state_path.exists():
+            return {}
+        try:
+            return json.loads(self.state_path.read_text())
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable heartbeat state: {e}")
+            return {}
+    
+    def _save_state(self) -> None:
+        if not self.state_path:
+            return
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            self.state_path.write_text(json.dumps(self._handled))
+        except OSError as e:
+            logger.warning(f"Failed to save heartbeat state: {e}")
+    
     async def start(self) -> None:
         """Start the heartbeat service."""
         if not self.enabled:
@@ -78,20 +141,33 @@ class HeartbeatService:
         
         self._running = True
         self._task = asyncio.create_task(self._run_loop())
-        logger.info(f"Heartbeat started (every {self.interval_s}s)")
+        if self.watch:
+            self._seen = self._stat()
+            self._watch_task = asyncio.create_task(self._watch_loop())
+        logger.info(
+            f"Heartbeat started (every {self.interval_s}s, backing off to {self.max_interval_s:.0f}s"
+            f"{', watching HEARTBEAT.md' if self.watch else ''})"
+        )
     
     def stop(self) -> None:
         """Stop the heartbeat service."""
         self._running = False
-        if self._task:
-            self._task.cancel()
-            self._task = None
+        for task in (self._task, self._watch_task):
+            if task:
+                task.cancel()
+        self._task = None
+        self._watch_task = None
     
     async def _run_loop(self) -> None:
         """Main heartbeat loop."""
         while self._running:
             try:
-                await asyncio.sleep(self.interval_s)
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self._interval)
+                    logger.debug("Heartbeat: HEARTBEAT.md changed")
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
                 if self._running:
                     await self._tick()
             except asyncio.CancelledError:
@@ -99,29 +175,89 @@ class HeartbeatService:
             except Exception as e:
                 logger.error(f"Heartbeat error: {e}")
     
+    async def _watch_loop(self) -> None:
+        """Wake the heartbeat once an edit to HEARTBEAT.md has settled."""
+        pending: tuple[int, int] | None = None
+        while self._running:
+            try:
+                await asyncio.sleep(self.watch_poll_s)
+                current = self._stat()
+                if current == self._seen:
+                    pending = None
+                elif current == pending:
+                    # Unchanged for a whole poll: the edit is done.
+                    self._seen = current
+                    pending = None
+                    if current is not None:
+                        self._wake.set()
+                else:
+                    pending = current
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Heartbeat watch error: {e}")
+    
+    def _idle(self) -> None:
+        """Back off after a tick that needed no work."""
+        self._interval = min(self.max_interval_s, self._interval * self.backoff)
+    
+    def _already_handled(self, stat: tuple[int, int], content: str) -> tuple[bool, str]:
+        """Check whether this version was answered HEARTBEAT_OK; also returns its hash."""
+        handled = self._handled
+        if handled.get("stat") == list(stat):
+            digest = handled.get("hash", "")
+        else:
+            digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        if not handled.get("ok") or handled.get("hash") != digest:
+            return False, digest
+        if self.recheck_s > 0 and time.time() - handled.get("at", 0) >= self.recheck_s:
+            return False, digest
+        return True, digest
+    
     async def _tick(self) -> None:
         """Execute a single heartbeat tick."""
+        stat = self._stat()
         content = self._read_heartbeat_file()
         
         # Skip if HEARTBEAT.md is empty or doesn't exist
-        if _is_heartbeat_empty(content):
+        if stat is None or _is_heartbeat_empty(content):
             logger.debug("Heartbeat: no tasks (HEARTBEAT.md empty)")
+            self._idle()
             return
         
-        logger.info("Heartbeat: checking for tasks...")
+        handled, digest = self._already_handled(stat, content)
+        if handled:
+            logger.debug("Heartbeat: HEARTBEAT.md unchanged since last OK, skipping")
+            self._idle()
+            return
+        
+        # Same version as the last OK: this is a forced recheck.
+        recheck = bool(self._handled.get("ok")) and self._handled.get("hash") == digest
+        logger.info(f"Heartbeat: {'rechecking' if recheck else 'checking for'} tasks...")
         
         if self.on_heartbeat:
             try:
-                response = await self.on_heartbeat(HEARTBEAT_PROMPT)
+                if recheck:
+                    with llm_cache_bypass():
+                        response = await self.on_heartbeat(HEARTBEAT_PROMPT)
+                else:
+                    response = await self.on_heartbeat(HEARTBEAT_PROMPT)
                 
                 # Check if agent said "nothing to do"
-                if HEARTBEAT_OK_TOKEN.replace("_", "") in response.upper().replace("_", ""):
+                ok = HEARTBEAT_OK_TOKEN.replace("_", "") in response.upper().replace("_", "")
+                if ok:
                     logger.info("Heartbeat: OK (no action needed)")
                 else:
                     logger.info(f"Heartbeat: completed task")
+                self._handled = {"stat": list(stat), "hash": digest, "ok": ok, "at": time.time()}
+                self._save_state()
+                self._interval = float(self.interval_s)
                     
             except Exception as e:
                 logger.error(f"Heartbeat execution failed: {e}")
+            finally:
+                # The agent may edit the file itself; that shouldn't wake the watcher.
+                self._seen = self._stat()
     
     async def trigger_now(self) -> str | None:
         """Manually trigger a heartbeat."""
@@ -1,8 +1,38 @@
 """Base LLM provider interface."""
 
+import time
 from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
 from dataclasses import dataclass, field
-from typing import Any
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Mapping
+
+# Separates the stable prefix of a system prompt from its per-turn tail.
+# Providers turn it into a cache breakpoint where the API supports one and
+# into a plain section separator otherwise.
+PROMPT_CACHE_BREAK = "\n\n<!-- prompt-cache-break -->\n\n"
+
+
+def split_cache_break(text: str) -> tuple[str, str | None]:
+    """
+    Split a prompt at PROMPT_CACHE_BREAK.
+    
+    Returns:
+        (stable prefix, volatile tail), or (text, None) without a marker.
+    """
+    stable, sep, volatile = text.partition(PROMPT_CACHE_BREAK)
+    return (stable, volatile) if sep else (text, None)
+
+
+def strip_cache_break(messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Replace cache-break markers with plain separators for APIs without cache hints."""
+    out = []
+    for msg in messages:
+        content = msg.get("content")
+        if isinstance(content, str) and PROMPT_CACHE_BREAK in content:
+            msg = {**msg, "content": content.replace(PROMPT_CACHE_BREAK, "\n\n---\n\n")}
+        out.append(msg)
+    return out
 
 
 @dataclass
@@ -13,6 +43,76 @@ class ToolCallRequest:
     arguments: dict[str, Any]
 
 
+# Error kinds worth retrying against the same model after a pause.
+RETRYABLE_ERRORS = frozenset({"rate_limit", "server", "timeout", "connection"})
+# Error kinds where another model may succeed; anything else is a bad request.
+FAILOVER_ERRORS = RETRYABLE_ERRORS | {"auth", "config", "unknown"}
+
+
+@dataclass
+class LLMError:
+    """Why a provider call failed, classified for retry and failover decisions."""
+    kind: str  # rate_limit | server | timeout | connection | auth | config | context_length | bad_request | unknown
+    message: str = ""
+    status_code: int | None = None
+    retry_after: float | None = None  # Seconds the provider asked us to wait
+    
+    @property
+    def retryable(self) -> bool:
+        return self.kind in RETRYABLE_ERRORS
+    
+    @classmethod
+    def from_status(
+        cls,
+        status_code: int | None,
+        message: str = "",
+        headers: Mapping[str, str] | None = None,
+    ) -> "LLMError":
+        """Classify an HTTP error status (and its Retry-After header)."""
+        if status_code == 429:
+            kind = "rate_limit"
+        elif status_code is not None and (status_code >= 500 or status_code == 408):
+            kind = "server"
+        elif status_code in (401, 403):
+            kind = "auth"
+        elif status_code is not None and 400 <= status_code < 500:
+            lowered = message.lower()
+            context = "context length" in lowered or "context_length" in lowered or "too many tokens" in lowered
+            kind = "context_length" if context else "bad_request"
+        else:
+            kind = "unknown"
+        return cls(
+            kind=kind,
+            message=message,
+            status_code=status_code,
+            retry_after=parse_retry_after(headers),
+        )
+
+
+def parse_retry_after(headers: Mapping[str, str] | None) -> float | None:
+    """Read a Retry-After (or retry-after-ms) header as seconds from now."""
+    if not headers:
+        return None
+    headers = {k.lower(): v for k, v in headers.items()}
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
 @dataclass
 class LLMResponse:
     """Response from an LLM provider."""
@@ -20,6 +120,7 @@ class LLMResponse:
     tool_calls: list[ToolCallRequest] = field(default_factory=list)
     finish_reason: str = "stop"
     usage: dict[str, int] = field(default_factory=dict)
+    error: LLMError | None = None  # Set when finish_reason is "error"
     
     @property
     def has_tool_calls(self) -> bool:
@@ -27,6 +128,19 @@ class LLMResponse:
         return len(self.tool_calls) > 0
 
 
+@dataclass
+class LLMStreamChunk:
+    """An incremental piece of a streamed LLM response."""
+    content: str = ""  # Content delta since the previous chunk
+    tool_calls: list[ToolCallRequest] = field(default_factory=list)  # Tool calls assembled so far
+    response: LLMResponse | None = None  # Complete response, set on the final chunk only
+    
+    @property
+    def done(self) -> bool:
+        """Check if this is the final chunk."""
+        return self.response is not None
+
+
 class LLMProvider(ABC):
     """
     Abstract base class for LLM providers.
@@ -63,6 +177,57 @@ class LLMProvider(ABC):
         """
         pass
     
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[LLMStreamChunk]:
+        """
+        Send a chat completion request and stream the response.
+        
+        Yields content deltas as they arrive, followed by a final chunk whose
+        `response` holds the complete LLMResponse (including tool calls).
+        Providers without native streaming fall back to a single `chat` call.
+        
+        Args:
+            messages: List of message dicts with 'role' and 'content'.
+            tools: Optional list of tool definitions.
+            model: Model identifier (provider-specific).
+            max_tokens: Maximum tokens in response.
+            temperature: Sampling temperature.
+        """
+        response = await self.chat(
+            messages=messages,
+            tools=tools,
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+        )
+        if response.content and response.finish_reason != "error":
+            yield LLMStreamChunk(content=response.content)
+        yield LLMStreamChunk(tool_calls=response.tool_calls, response=response)
+    
+    @asynccontextmanager
+    async def admit(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[None]:
+        """
+        Wait until a call may be sent; the call is then made inside the block.
+        
+        Wrappers that queue calls (like RateLimitedProvider) wait here, so
+        a caller can start timing the call only once it is sent. The
+        default admits at once.
+        """
+        yield
+    
     @abstractmethod
     def get_default_model(self) -> str:
         """Get the default model for this provider."""
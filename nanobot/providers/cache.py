@@ -0,0 +1,356 @@
+"""Opt-in cache of LLM responses for repeated, deterministic requests."""
+
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from contextlib import aclosing, contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterator
+
+from loguru import logger
+
+from nanobot.config.schema import ResponseCacheConfig
+from nanobot.providers.base import (
+    LLMProvider,
+    LLMResponse,
+    LLMStreamChunk,
+    ToolCallRequest,
+    split_cache_break,
+)
+
+# Whether LLM calls made by the current task may be answered from the cache.
+_cacheable: ContextVar[bool] = ContextVar("llm_cacheable", default=False)
+# Whether they must be answered by the provider (the fresh answer is still stored).
+_bypass: ContextVar[bool] = ContextVar("llm_cache_bypass", default=False)
+
+
+@contextmanager
+def llm_cache(enabled: bool = True) -> Iterator[None]:
+    """Let (or stop) the LLM calls made inside the block be answered from the cache."""
+    token = _cacheable.set(enabled)
+    try:
+        yield
+    finally:
+        _cacheable.reset(token)
+
+
+@contextmanager
+def llm_cache_bypass() -> Iterator[None]:
+    """Make the LLM calls inside the block skip cache lookups (e.g. forced rechecks)."""
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def cache_key(
+    model: str,
+    messages: list[dict[str, Any]],
+    tools: list[dict[str, Any]] | None,
+    temperature: float,
+    max_tokens: int,
+    ignore_volatile: bool = False,
+) -> str:
+    """
+    Hash everything that determines a response.
+    
+    With `ignore_volatile`, the tail of system prompts after
+    PROMPT_CACHE_BREAK (current time, today's notes) is left out.
+    """
+    if ignore_volatile:
+        messages = [
+            {**msg, "content": split_cache_break(msg["content"])[0]}
+            if msg.get("role") == "system" and isinstance(msg.get("content"), str)
+            else msg
+            for msg in messages
+        ]
+    payload = json.dumps(
+        [model, messages, tools, temperature, max_tokens],
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _dump_response(response: LLMResponse) -> dict[str, Any]:
+    return {
+        "content": response.content,
+        "tool_calls": [
+            {"id": tc.id, "name": tc.name, "arguments": tc.arguments}
+            for tc in response.tool_calls
+        ],
+        "finish_reason": response.finish_reason,
+        "usage": response.usage,
+    }
+
+
+def _load_response(data: dict[str, Any]) -> LLMResponse:
+    return LLMResponse(
+        content=data.get("content"),
+        tool_calls=[ToolCallRequest(**tc) for tc in data.get("tool_calls", [])],
+        finish_reason=data.get("finish_reason", "stop"),
+        usage=data.get("usage", {}),
+    )
+
+
+class ResponseCache:
+    """
+    Two-level store of LLM responses: an in-memory LRU in front of a directory.
+    
+    Entries expire `ttl_s` after they are stored. The memory level holds up
+    to `max_entries` responses; the disk level (one JSON file per entry) is
+    kept under `max_disk_bytes` by deleting the least recently written
+    files. Disk entries survive restarts and are promoted to memory on a
+    hit.
+    """
+    
+    def __init__(
+        self,
+        path: Path | None = None,
+        ttl_s: float = 86400.0,
+        max_entries: int = 512,
+        max_disk_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.path = path
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._disk: OrderedDict[str, int] = OrderedDict()  # key -> file size, oldest first
+        self._disk_bytes = 0
+        self._counters = {
+            "hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0,
+            "stores": 0, "expired": 0, "evictions": 0,
+        }
+        if self.path is not None:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._scan_disk()
+    
+    def get(self, key: str) -> LLMResponse | None:
+        """Look up a response, or None if it is missing or expired."""
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                self._memory.move_to_end(key)
+                self._counters["hits"] += 1
+                self._counters["memory_hits"] += 1
+                return _load_response(entry[1])
+            self._counters["expired"] += 1
+            self._remove(key)
+        elif key in self._disk:
+            entry = self._read(key)
+            if entry is not None and entry[0] > now:
+                self._remember(key, entry)
+                self._counters["hits"] += 1
+                self._counters["disk_hits"] += 1
+                return _load_response(entry[1])
+            if entry is not None:
+                self._counters["expired"] += 1
+            self._remove(key)
+        self._counters["misses"] += 1
+        return None
+    
+    def put(self, key: str, response: LLMResponse) -> None:
+        """Store a response (errors are never cached)."""
+        if response.finish_reason == "error":
+            return
+        entry = (time.time() + self.ttl_s, _dump_response(response))
+        self._remember(key, entry)
+        self._write(key, entry)
+        self._counters["stores"] += 1
+    
+    def clear(self) -> None:
+        """Drop every entry from memory and disk."""
+        for key in list(self._disk):
+            self._remove(key)
+        self._memory.clear()
+    
+    def stats(self) -> dict[str, Any]:
+        """Hit/miss counters and the size of both levels."""
+        lookups = self._counters["hits"] + self._counters["misses"]
+        return {
+            **self._counters,
+            "hit_rate": self._counters["hits"] / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_entries": len(self._disk),
+            "disk_bytes": self._disk_bytes,
+        }
+    
+    def _remember(self, key: str, entry: tuple[float, dict[str, Any]]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+    
+    def _file(self, key: str) -> Path:
+        return self.path / f"{key}.json"
+    
+    def _scan_disk(self) -> None:
+        files = []
+        for file in self.path.glob("*.json"):
+            try:
+                stat = file.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, file.stem, stat.st_size))
+        for _, key, size in sorted(files):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._evict_disk()
+    
+    def _read(self, key: str) -> tuple[float, dict[str, Any]] | None:
+        try:
+            data = json.loads(self._file(key).read_text(encoding="utf-8"))
+            return float(data["expires"]), data["response"]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Dropping unreadable LLM cache entry {key}: {e}")
+            return None
+    
+    def _write(self, key: str, entry: tuple[float, dict[str, Any]]) -> None:
+        if self.path is None:
+            return
+        data = json.dumps({"expires": entry[0], "response": entry[1]}, ensure_ascii=False)
+        file = self._file(key)
+        tmp = file.with_suffix(".tmp")
+        try:
+            tmp.write_text(data, encoding="utf-8")
+            os.replace(tmp, file)
+        except OSError as e:
+            logger.warning(f"Failed to write LLM cache entry: {e}")
+            return
+        self._disk_bytes -= self._disk.pop(key, 0)
+        self._disk[key] = len(data.encode("utf-8"))
+        self._disk_bytes += self._disk[key]
+        self._evict_disk()
+    
+    def _evict_disk(self) -> None:
+        while self._disk and self._disk_bytes > self.max_disk_bytes:
+            key = next(iter(self._disk))
+            self._remove(key)
+            self._counters["evictions"] += 1
+    
+    def _remove(self, key: str) -> None:
+        self._memory.pop(key, None)
+        size = self._disk.pop(key, None)
+        if size is None:
+            return
+        self._disk_bytes -= size
+        try:
+            self._file(key).unlink()
+        except OSError:
+            pass
+
+
+class CachedProvider(LLMProvider):
+    """
+    Answers repeated requests from a ResponseCache.
+    
+    Only some calls are cached: those made inside an `llm_cache()` block,
+    those at temperature 0 (if `temperature_zero` is set), or every call
+    in replay mode. Calls inside `llm_cache_bypass()` always reach the
+    provider and refresh the entry. A cached answer reports no token usage,
+    since none was spent.
+    """
+    
+    def __init__(
+        self,
+        provider: LLMProvider,
+        cache: ResponseCache,
+        config: ResponseCacheConfig | None = None,
+    ):
+        super().__init__(provider.api_key, provider.api_base)
+        self.provider = provider
+        self.cache = cache
+        self.config = config or ResponseCacheConfig()
+    
+    def get_default_model(self) -> str:
+        return self.provider.get_default_model()
+    
+    def cacheable(self, temperature: float) -> bool:
+        """Check whether the current call may use the cache."""
+        return (
+            self.config.replay
+            or _cacheable.get()
+            or (self.config.temperature_zero and temperature == 0)
+        )
+    
+    def _key(
+        self,
+        model: str,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+        temperature: float,
+        max_tokens: int,
+    ) -> str:
+        ignore_volatile = self.config.background_ignore_volatile and _cacheable.get()
+        return cache_key(model, messages, tools, temperature, max_tokens, ignore_volatile)
+    
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        model = model or self.provider.get_default_model()
+        key = None
+        if self.cacheable(temperature):
+            key = self._key(model, messages, tools, temperature, max_tokens)
+            cached = None if _bypass.get() else self.cache.get(key)
+            if cached is not None:
+                cached.usage = {}
+                return cached
+        
+        response = await self.provider.chat(
+            messages=messages,
+            tools=tools,
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+        )
+        if key is not None:
+            self.cache.put(key, response)
+        return response
+    
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[LLMStreamChunk]:
+        model = model or self.provider.get_default_model()
+        key = None
+        if self.cacheable(temperature):
+            key = self._key(model, messages, tools, temperature, max_tokens)
+            cached = None if _bypass.get() else self.cache.get(key)
+            if cached is not None:
+                cached.usage = {}
+                if cached.content:
+                    yield LLMStreamChunk(content=cached.content)
+                yield LLMStreamChunk(tool_calls=cached.tool_calls, response=cached)
+                return
+        
+        stream = self.provider.chat_stream(
+            messages=messages,
+            tools=tools,
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+        )
+        async with aclosing(stream):
+            async for chunk in stream:
+                if chunk.response is not None and key is not None:
+                    self.cache.put(key, chunk.response)
+                yield chunk
+    
+    def stats(self) -> dict[str, Any]:
+        return self.cache.stats()
@@ -1,14 +1,150 @@
 """LiteLLM provider implementation for multi-provider support."""
 
+import asyncio
+import json
 import os
-from typing import Any
+from typing import Any, AsyncIterator
 
 import httpx
 
 import litellm
 from litellm import acompletion
 
-from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+from nanobot.providers.base import (
+    LLMError,
+    LLMProvider,
+    LLMResponse,
+    LLMStreamChunk,
+    ToolCallRequest,
+    split_cache_break,
+    strip_cache_break,
+)
+from nanobot.utils.http import HttpClientPool, http_client
+
+
+def _field(obj: Any, key: str) -> Any:
+    """Read a field from a dict (raw JSON) or an object (LiteLLM types)."""
+    if isinstance(obj, dict):
+        return obj.get(key)
+    return getattr(obj, key, None)
+
+
+def _parse_usage(usage: Any) -> dict[str, int]:
+    """
+    Normalize token usage, including prompt-cache counters.
+    
+    OpenAI-style APIs report cache hits under
+    prompt_tokens_details.cached_tokens; Anthropic reports
+    cache_read_input_tokens and cache_creation_input_tokens.
+    """
+    result = {
+        "prompt_tokens": _field(usage, "prompt_tokens") or 0,
+        "completion_tokens": _field(usage, "completion_tokens") or 0,
+        "total_tokens": _field(usage, "total_tokens") or 0,
+    }
+    details = _field(usage, "prompt_tokens_details")
+    cached = (_field(details, "cached_tokens") if details else None) or _field(
+        usage, "cache_read_input_tokens"
+    )
+    if cached:
+        result["cached_tokens"] = cached
+    created = _field(usage, "cache_creation_input_tokens")
+    if created:
+        result["cache_creation_tokens"] = created
+    return result
+
+
+class _StreamAssembler:
+    """Accumulates OpenAI-style streaming chunks into a complete LLMResponse."""
+    
+    def __init__(self):
+        self.content: list[str] = []
+        self.tool_calls: dict[int, dict[str, Any]] = {}
+        self.finish_reason = "stop"
+        self.usage: dict[str, int] = {}
+    
+    def feed(self, chunk: Any) -> str:
+        """Consume one chunk and return its content delta (may be empty)."""
+        usage = _field(chunk, "usage")
+        if usage:
+            self.usage = _parse_usage(usage)
+        
+        text = ""
+        for choice in _field(chunk, "choices") or []:
+            delta = _field(choice, "delta") or {}
+            piece = _field(delta, "content")
+            if piece:
+                text += piece
+            for tc in _field(delta, "tool_calls") or []:
+                index = _field(tc, "index") or 0
+                entry = self.tool_calls.setdefault(index, {"id": "", "name": "", "arguments": ""})
+                if _field(tc, "id"):
+                    entry["id"] = _field(tc, "id")
+                fn = _field(tc, "function") or {}
+                if _field(fn, "name"):
+                    entry["name"] += _field(fn, "name")
+                if _field(fn, "arguments"):
+                    entry["arguments"] += _field(fn, "arguments")
+            if _field(choice, "finish_reason"):
+                self.finish_reason = _field(choice, "finish_reason")
+        
+        if text:
+            self.content.append(text)
+        return text
+    
+    def build(self) -> LLMResponse:
+        """Build the final response from everything consumed so far."""
+        tool_calls = []
+        for index in sorted(self.tool_calls):
+            entry = self.tool_calls[index]
+            try:
+                args = json.loads(entry["arguments"]) if entry["arguments"] else {}
+            except json.JSONDecodeError:
+                args = {"raw": entry["arguments"]}
+            tool_calls.append(ToolCallRequest(id=entry["id"], name=entry["name"], arguments=args))
+        
+        return LLMResponse(
+            content="".join(self.content) or None,
+            tool_calls=tool_calls,
+            finish_reason=self.finish_reason,
+            usage=self.usage,
+        )
+
+
+def _error_response(e: Exception) -> LLMResponse:
+    """Turn a failed call into an error response with a classified LLMError."""
+    if isinstance(e, litellm.ContextWindowExceededError):
+        error = LLMError(kind="context_length", message=str(e), status_code=400)
+    elif isinstance(e, (litellm.Timeout, httpx.TimeoutException, asyncio.TimeoutError)):
+        error = LLMError(kind="timeout", message=str(e))
+    elif isinstance(e, (litellm.APIConnectionError, httpx.TransportError)):
+        error = LLMError(kind="connection", message=str(e))
+    else:
+        response = getattr(e, "response", None)
+        headers = getattr(e, "litellm_response_headers", None) or (
+            response.headers if isinstance(response, httpx.Response) else None
+        )
+        error = LLMError.from_status(getattr(e, "status_code", None), str(e), headers)
+    return LLMResponse(
+        content=f"Error calling LLM: {str(e)}",
+        finish_reason="error",
+        error=error,
+    )
+
+
+def _http_error_response(resp: httpx.Response) -> LLMResponse:
+    """Error response for a non-200 reply from a direct REST call."""
+    return LLMResponse(
+        content=f"Error calling LLM: Azure HTTP {resp.status_code} - {resp.text}",
+        finish_reason="error",
+        error=LLMError.from_status(resp.status_code, resp.text, resp.headers),
+    )
+
+
+def _supports_cache_control(model: str) -> bool:
+    """Whether a (resolved) model takes Anthropic-style cache_control hints."""
+    name = model.lower()
+    return "claude" in name or name.startswith("anthropic/")
 
 
 class LiteLLMProvider(LLMProvider):
@@ -24,11 +160,13 @@ class LiteLLMProvider(LLMProvider):
         api_key: str | None = None, 
         api_base: str | None = None,
         api_version: str | None = None,
-        default_model: str = "anthropic/claude-opus-4-5"
+        default_model: str = "anthropic/claude-opus-4-5",
+        http: HttpClientPool | None = None,
     ):
         super().__init__(api_key, api_base)
         self.default_model = default_model
         self.api_version = api_version
+        self.http = http  # Shared client pool for direct REST calls (Azure)
         
         # Detect OpenRouter by api_key prefix or explicit api_base
         self.is_openrouter = (
@@ -68,14 +206,12 @@ class LiteLLMProvider(LLMProvider):
             elif "groq" in default_model:
                 os.environ.setdefault("GROQ_API_KEY", api_key)
         
-        if api_base:
-            litellm.api_base = api_base
-            if self.is_azure:
-                os.environ.setdefault("AZURE_API_BASE", api_base)
-        if api_version:
-            litellm.api_version = api_version
-            if self.is_azure:
-                os.environ.setdefault("AZURE_API_VERSION", api_version)
+        # api_base/api_version go into each request's kwargs rather than
+        # LiteLLM's globals, so several providers can coexist (e.g. a backup model).
+        if api_base and self.is_azure:
+            os.environ.setdefault("AZURE_API_BASE", api_base)
+        if api_version and self.is_azure:
+            os.environ.setdefault("AZURE_API_VERSION", api_version)
         
         # Disable LiteLLM logging noise
         litellm.suppress_debug_info = True
@@ -113,6 +249,62 @@ class LiteLLMProvider(LLMProvider):
                 temperature=temperature,
             )
         
+        kwargs = self._build_kwargs(messages, tools, model, max_tokens, temperature)
+        
+        try:
+            response = await acompletion(**kwargs)
+            return self._parse_response(response)
+        except Exception as e:
+            # Return error as content for graceful handling
+            return _error_response(e)
+
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[LLMStreamChunk]:
+        """
+        Send a chat completion request via LiteLLM and stream the response.
+        
+        Yields content deltas as they arrive, then a final chunk carrying the
+        complete LLMResponse with the assembled tool calls.
+        """
+        model = model or self.default_model
+
+        if self.is_azure:
+            async for chunk in self._chat_stream_azure_direct(
+                messages=messages,
+                tools=tools,
+                model=model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+            ):
+                yield chunk
+            return
+        
+        kwargs = self._build_kwargs(messages, tools, model, max_tokens, temperature)
+        kwargs["stream"] = True
+        kwargs["stream_options"] = {"include_usage": True}
+        
+        assembler = _StreamAssembler()
+        try:
+            stream = await acompletion(**kwargs)
+            async for raw in stream:
+                delta = assembler.feed(raw)
+                if delta:
+                    yield LLMStreamChunk(content=delta)
+        except Exception as e:
+            yield LLMStreamChunk(response=_error_response(e))
+            return
+        
+        response = assembler.build()
+        yield LLMStreamChunk(tool_calls=response.tool_calls, response=response)
+
+    def _resolve_model(self, model: str) -> str:
+        """Apply the provider-specific prefix LiteLLM expects for a model name."""
         # For OpenRouter, prefix model name if not already prefixed
         if self.is_openrouter and not model.startswith("openrouter/"):
             model = f"openrouter/{model}"
@@ -139,9 +331,21 @@ class LiteLLMProvider(LLMProvider):
         if "gemini" in model.lower() and not model.startswith("gemini/"):
             model = f"gemini/{model}"
         
+        return model
+
+    def _build_kwargs(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+        model: str,
+        max_tokens: int,
+        temperature: float,
+    ) -> dict[str, Any]:
+        """Build LiteLLM completion kwargs."""
+        model = self._resolve_model(model)
         kwargs: dict[str, Any] = {
             "model": model,
-            "messages": messages,
+            "messages": self._prepare_messages(messages, model),
             "max_tokens": max_tokens,
             "temperature": temperature,
         }
@@ -156,42 +360,81 @@ class LiteLLMProvider(LLMProvider):
             kwargs["tools"] = tools
             kwargs["tool_choice"] = "auto"
         
-        try:
-            response = await acompletion(**kwargs)
-            return self._parse_response(response)
-        except Exception as e:
-            # Return error as content for graceful handling
-            return LLMResponse(
-                content=f"Error calling LLM: {str(e)}",
-                finish_reason="error",
-            )
+        return kwargs
 
-    async def _chat_azure_direct(
-        self,
-        messages: list[dict[str, Any]],
-        tools: list[dict[str, Any]] | None,
-        model: str,
-        max_tokens: int,
-        temperature: float,
-    ) -> LLMResponse:
+    def _prepare_messages(self, messages: list[dict[str, Any]], model: str) -> list[dict[str, Any]]:
+        """
+        Turn cache-break markers into what the target API understands.
+        
+        Anthropic models only cache up to an explicit cache_control
+        breakpoint, so the system prompt is split into a cached prefix block
+        and an uncached tail. OpenAI-style APIs cache matching prefixes
+        automatically and just get the marker replaced.
+        """
+        if not _supports_cache_control(model):
+            return strip_cache_break(messages)
+        
+        prepared = []
+        for msg in messages:
+            content = msg.get("content")
+            if msg.get("role") == "system" and isinstance(content, str):
+                stable, volatile = split_cache_break(content)
+                if volatile is not None:
+                    blocks: list[dict[str, Any]] = [
+                        {"type": "text", "text": stable, "cache_control": {"type": "ephemeral"}},
+                    ]
+                    if volatile:
+                        blocks.append({"type": "text", "text": volatile})
+                    msg = {**msg, "content": blocks}
+            prepared.append(msg)
+        return prepared
+
+    def _azure_config_error(self) -> LLMResponse | None:
+        """Return an error response if the Azure settings are incomplete."""
         if not self.api_base or not self.api_key:
             return LLMResponse(
                 content="Error calling LLM: missing Azure API base or key",
                 finish_reason="error",
+                error=LLMError(kind="config", message="missing Azure API base or key"),
             )
         if not self.api_version:
             return LLMResponse(
                 content="Error calling LLM: missing Azure API version",
                 finish_reason="error",
+                error=LLMError(kind="config", message="missing Azure API version"),
             )
+        return None
 
+    def _azure_url(self, model: str) -> str:
+        """Chat completions URL for an Azure deployment."""
         deployment = model.removeprefix("azure/") if model.startswith("azure/") else model
-        endpoint = self.api_base.rstrip("/")
-        url = (
+        endpoint = (self.api_base or "").rstrip("/")
+        return (
             f"{endpoint}/openai/deployments/{deployment}/chat/completions"
             f"?api-version={self.api_version}"
         )
 
+    async def _azure_send(
+        self,
+        client: httpx.AsyncClient,
+        model: str,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+        max_tokens: int,
+        temperature: float,
+        stream: bool = False,
+    ) -> httpx.Response:
+        """
+        POST a chat completion to Azure.
+        
+        Retries with adjusted parameters when the deployment rejects
+        max_tokens/max_completion_tokens or temperature. When `stream` is
+        true, a successful response is returned unread and must be closed
+        by the caller.
+        """
+        url = self._azure_url(model)
+        messages = strip_cache_break(messages)
+
         def build_body(use_max_completion: bool, include_temperature: bool = True) -> dict[str, Any]:
             payload: dict[str, Any] = {
                 "messages": messages,
@@ -205,56 +448,81 @@ class LiteLLMProvider(LLMProvider):
             if tools:
                 payload["tools"] = tools
                 payload["tool_choice"] = "auto"
+            if stream:
+                payload["stream"] = True
+                payload["stream_options"] = {"include_usage": True}
             return payload
 
         headers = {
             "Content-Type": "application/json",
-            "api-key": self.api_key,
+            "api-key": self.api_key or "",
         }
 
-        try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                # Prefer max_completion_tokens for newer Azure models (e.g., gpt-5.1)
-                use_max_completion = True
-                include_temperature = True
+        async def post(body: dict[str, Any]) -> httpx.Response:
+            request = client.build_request("POST", url, json=body, headers=headers, timeout=60.0)
+            resp = await client.send(request, stream=stream)
+            if stream and resp.status_code != 200:
+                # Error bodies are small; read them so callers can inspect them.
+                await resp.aread()
+                await resp.aclose()
+            return resp
+
+        # Prefer max_completion_tokens for newer Azure models (e.g., gpt-5.1)
+        use_max_completion = True
+        include_temperature = True
+        body = build_body(use_max_completion, include_temperature)
+        resp = await post(body)
+
+        if resp.status_code == 400:
+            try:
+                err = resp.json().get("error", {})
+                param = err.get("param")
+                msg = err.get("message", "")
+            except Exception:
+                param = None
+                msg = ""
+
+            needs_retry = (
+                param in ("max_tokens", "max_completion_tokens")
+                or "max_tokens" in msg
+                or "max_completion_tokens" in msg
+            )
+            temp_unsupported = (
+                param == "temperature"
+                or "temperature" in msg
+            )
+            if needs_retry:
+                use_max_completion = not use_max_completion
+                body = build_body(use_max_completion, include_temperature)
+                resp = await post(body)
+            if resp.status_code == 400 and temp_unsupported:
+                include_temperature = False
                 body = build_body(use_max_completion, include_temperature)
-                resp = await client.post(url, json=body, headers=headers)
+                resp = await post(body)
 
-                if resp.status_code == 400:
-                    try:
-                        err = resp.json().get("error", {})
-                        param = err.get("param")
-                        msg = err.get("message", "")
-                    except Exception:
-                        param = None
-                        msg = ""
+        return resp
 
-                    needs_retry = (
-                        param in ("max_tokens", "max_completion_tokens")
-                        or "max_tokens" in msg
-                        or "max_completion_tokens" in msg
-                    )
-                    temp_unsupported = (
-                        param == "temperature"
-                        or "temperature" in msg
-                    )
-                    if needs_retry:
-                        use_max_completion = not use_max_completion
-                        body = build_body(use_max_completion, include_temperature)
-                        resp = await client.post(url, json=body, headers=headers)
-                    if resp.status_code == 400 and temp_unsupported:
-                        include_temperature = False
-                        body = build_body(use_max_completion, include_temperature)
-                        resp = await client.post(url, json=body, headers=headers)
+    async def _chat_azure_direct(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+        model: str,
+        max_tokens: int,
+        temperature: float,
+    ) -> LLMResponse:
+        config_error = self._azure_config_error()
+        if config_error:
+            return config_error
 
-            if resp.status_code != 200:
-                return LLMResponse(
-                    content=(
-                        f"Error calling LLM: Azure HTTP {resp.status_code} - {resp.text}"
-                    ),
-                    finish_reason="error",
+        try:
+            async with http_client(self.http, timeout=60.0) as client:
+                resp = await self._azure_send(
+                    client, model, messages, tools, max_tokens, temperature
                 )
 
+            if resp.status_code != 200:
+                return _http_error_response(resp)
+
             data = resp.json()
             choice = (data.get("choices") or [{}])[0]
             message = choice.get("message") or {}
@@ -265,9 +533,7 @@ class LiteLLMProvider(LLMProvider):
                 args = tc.get("function", {}).get("arguments")
                 if isinstance(args, str):
                     try:
-                        import json as _json
-
-                        args = _json.loads(args)
+                        args = json.loads(args)
                     except Exception:
                         args = {"raw": args}
                 tool_calls.append(
@@ -282,12 +548,56 @@ class LiteLLMProvider(LLMProvider):
                 content=content,
                 tool_calls=tool_calls,
                 finish_reason=choice.get("finish_reason") or "stop",
+                usage=_parse_usage(data["usage"]) if data.get("usage") else {},
             )
         except Exception as e:
-            return LLMResponse(
-                content=f"Error calling LLM: {str(e)}",
-                finish_reason="error",
-            )
+            return _error_response(e)
+
+    async def _chat_stream_azure_direct(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+        model: str,
+        max_tokens: int,
+        temperature: float,
+    ) -> AsyncIterator[LLMStreamChunk]:
+        config_error = self._azure_config_error()
+        if config_error:
+            yield LLMStreamChunk(response=config_error)
+            return
+
+        assembler = _StreamAssembler()
+        error: LLMResponse | None = None
+        try:
+            async with http_client(self.http, timeout=60.0) as client:
+                resp = await self._azure_send(
+                    client, model, messages, tools, max_tokens, temperature, stream=True
+                )
+                if resp.status_code != 200:
+                    error = _http_error_response(resp)
+                else:
+                    try:
+                        # Server-sent events: "data: {...}" lines, terminated by "data: [DONE]"
+                        async for line in resp.aiter_lines():
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[5:].strip()
+                            if data == "[DONE]":
+                                break
+                            delta = assembler.feed(json.loads(data))
+                            if delta:
+                                yield LLMStreamChunk(content=delta)
+                    finally:
+                        await resp.aclose()
+        except Exception as e:
+            error = _error_response(e)
+
+        if error:
+            yield LLMStreamChunk(response=error)
+            return
+
+        response = assembler.build()
+        yield LLMStreamChunk(tool_calls=response.tool_calls, response=response)
     
     def _parse_response(self, response: Any) -> LLMResponse:
         """Parse LiteLLM response into our standard format."""
@@ -300,7 +610,6 @@ class LiteLLMProvider(LLMProvider):
                 # Parse arguments from JSON string if needed
                 args = tc.function.arguments
                 if isinstance(args, str):
-                    import json
                     try:
                         args = json.loads(args)
                     except json.JSONDecodeError:
@@ -314,11 +623,7 @@ class LiteLLMProvider(LLMProvider):
         
         usage = {}
         if hasattr(response, "usage") and response.usage:
-            usage = {
-                "prompt_tokens": response.usage.prompt_tokens,
-                "completion_tokens": response.usage.completion_tokens,
-                "total_tokens": response.usage.total_tokens,
-            }
+            usage = _parse_usage(response.usage)
         
         return LLMResponse(
             content=message.content,
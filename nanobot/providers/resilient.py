@@ -0,0 +1,349 @@
+"""Resilient provider: retries, circuit breakers, failover and hedging."""
+
+import asyncio
+import random
+import time
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import Any, AsyncIterator
+
+from loguru import logger
+
+from nanobot.config.schema import ResilienceConfig
+from nanobot.providers.base import (
+    FAILOVER_ERRORS,
+    LLMError,
+    LLMProvider,
+    LLMResponse,
+    LLMStreamChunk,
+)
+
+
+@dataclass
+class _Breaker:
+    """Circuit breaker state for one model."""
+    failures: int = 0  # Consecutive failures
+    opened_at: float | None = None  # When the circuit opened (None = closed)
+    probing: bool = False  # A half-open trial request is in flight
+
+
+class ResilientProvider(LLMProvider):
+    """
+    Wraps providers with retries, per-model circuit breakers and failover.
+    
+    A call goes to the requested (primary) model first. Rate limits, 5xx
+    responses, timeouts and connection errors are retried with jittered
+    exponential backoff, waiting at least as long as a Retry-After header
+    asks. When retries are exhausted (or the error is one retrying can't
+    fix, like bad credentials), the call fails over to the fallback
+    models in order. Errors caused by the request itself (bad request,
+    context too long) are returned immediately.
+    
+    After `breaker_failures` consecutive failures a model's circuit opens
+    and calls skip it for `breaker_cooldown_s`; then one trial call is let
+    through, and its outcome closes or re-opens the circuit.
+    
+    With `hedge_after_s` set, a non-streaming call that is still running
+    after that long is also sent to the next model, and whichever answers
+    first wins.
+    
+    Time a call spends waiting for admission (see LLMProvider.admit, e.g.
+    queued behind a rate limit) counts neither against `timeout_s` nor
+    towards `hedge_after_s`.
+    """
+    
+    def __init__(
+        self,
+        primary: LLMProvider,
+        fallbacks: list[tuple[LLMProvider, str]] | None = None,
+        config: ResilienceConfig | None = None,
+    ):
+        super().__init__(primary.api_key, primary.api_base)
+        self.primary = primary
+        self.fallbacks = list(fallbacks or [])  # (provider, model) pairs, in order
+        self.config = config or ResilienceConfig()
+        self._breakers: dict[str, _Breaker] = {}
+        self._counters = {"calls": 0, "errors": 0, "retries": 0, "failovers": 0, "hedges": 0}
+    
+    def get_default_model(self) -> str:
+        return self.primary.get_default_model()
+    
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        request = {
+            "messages": messages,
+            "tools": tools,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+        self._counters["calls"] += 1
+        targets = self._targets(model)
+        if self.config.hedge_after_s > 0 and len(targets) > 1:
+            response = await self._chat_hedged(targets, request)
+        else:
+            response = await self._chat_targets(targets, request)
+        if response.finish_reason == "error":
+            self._counters["errors"] += 1
+        return response
+    
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[LLMStreamChunk]:
+        """
+        Stream a response, retrying and failing over until content arrives.
+        
+        Once a delta has been yielded the stream can't be restarted, so an
+        error after that point is passed through as is.
+        """
+        request = {
+            "messages": messages,
+            "tools": tools,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+        self._counters["calls"] += 1
+        last: LLMResponse | None = None
+        for index, (provider, target) in enumerate(self._targets(model)):
+            if index:
+                self._counters["failovers"] += 1
+                logger.warning(f"Failing over to {target}")
+            attempt = 0
+            while True:
+                started = False
+                failed: LLMResponse | None = None
+                self._begin(target)
+                try:
+                    async with aclosing(provider.chat_stream(model=target, **request)) as stream:
+                        async for chunk in stream:
+                            response = chunk.response
+                            if response is not None and response.finish_reason == "error" and not started:
+                                failed = response
+                                break
+                            started = started or bool(chunk.content)
+                            if response is not None:
+                                self._record(target, _error_of(response))
+                            yield chunk
+                except (asyncio.CancelledError, GeneratorExit):
+                    # Cancelled or closed early by the consumer: no outcome to record.
+                    self._abandon(target)
+                    raise
+                if failed is None:
+                    return
+                
+                last = failed
+                error = _error_of(failed)
+                self._record(target, error)
+                delay = self._retry_delay(target, error, attempt)
+                if delay is None:
+                    break
+                attempt += 1
+                self._counters["retries"] += 1
+                await asyncio.sleep(delay)
+            if error.kind not in FAILOVER_ERRORS:
+                break
+        
+        self._counters["errors"] += 1
+        yield LLMStreamChunk(response=last or LLMResponse(content=None, finish_reason="error"))
+    
+    def stats(self) -> dict[str, Any]:
+        """Call counters and the circuit state of every model seen so far."""
+        return {
+            **self._counters,
+            "circuits": {
+                model: {"state": self._state(breaker), "failures": breaker.failures}
+                for model, breaker in self._breakers.items()
+            },
+        }
+    
+    def _targets(self, model: str | None) -> list[tuple[LLMProvider, str]]:
+        """Models to try in order, skipping those with an open circuit."""
+        targets = [(self.primary, model or self.primary.get_default_model())]
+        for provider, fallback in self.fallbacks:
+            if all(fallback != t for _, t in targets):
+                targets.append((provider, fallback))
+        allowed = [t for t in targets if self._allow(t[1])]
+        # With every circuit open, trying anyway beats failing without a call.
+        return allowed or targets
+    
+    async def _chat_targets(
+        self,
+        targets: list[tuple[LLMProvider, str]],
+        request: dict[str, Any],
+        admitted: asyncio.Event | None = None,
+    ) -> LLMResponse:
+        """Try each target in order until one answers; `admitted` is set once a call is sent."""
+        response = LLMResponse(content=None, finish_reason="error")
+        for index, (provider, target) in enumerate(targets):
+            if index:
+                self._counters["failovers"] += 1
+                logger.warning(f"Failing over to {target}")
+            response = await self._chat_with_retries(provider, target, request, admitted)
+            if response.finish_reason != "error":
+                return response
+            if _error_of(response).kind not in FAILOVER_ERRORS:
+                break
+        return response
+    
+    async def _chat_hedged(
+        self,
+        targets: list[tuple[LLMProvider, str]],
+        request: dict[str, Any],
+    ) -> LLMResponse:
+        """Run the normal chain, adding a parallel request to the next model if it is slow."""
+        admitted = asyncio.Event()
+        tasks = {asyncio.create_task(self._chat_targets(targets, request, admitted))}
+        first_error: LLMResponse | None = None
+        try:
+            # The hedge clock starts once the first call is sent, not while it is queued.
+            admission = asyncio.create_task(admitted.wait())
+            try:
+                await asyncio.wait(tasks | {admission}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                admission.cancel()
+            done, _ = await asyncio.wait(tasks, timeout=self.config.hedge_after_s)
+            if not done:
+                self._counters["hedges"] += 1
+                logger.info(f"{targets[0][1]} is slow; hedging with {targets[1][1]}")
+                tasks.add(asyncio.create_task(self._chat_targets(targets[1:], request)))
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    response = task.result()
+                    if response.finish_reason != "error":
+                        return response
+                    first_error = first_error or response
+            return first_error or LLMResponse(content=None, finish_reason="error")
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def _chat_with_retries(
+        self,
+        provider: LLMProvider,
+        model: str,
+        request: dict[str, Any],
+        admitted: asyncio.Event | None = None,
+    ) -> LLMResponse:
+        attempt = 0
+        while True:
+            response = await self._attempt(provider, model, request, admitted)
+            error = _error_of(response) if response.finish_reason == "error" else None
+            self._record(model, error)
+            if error is None:
+                return response
+            delay = self._retry_delay(model, error, attempt)
+            if delay is None:
+                return response
+            attempt += 1
+            self._counters["retries"] += 1
+            logger.warning(
+                f"LLM call to {model} failed ({error.kind}); retry {attempt} in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+    
+    async def _attempt(
+        self,
+        provider: LLMProvider,
+        model: str,
+        request: dict[str, Any],
+        admitted: asyncio.Event | None = None,
+    ) -> LLMResponse:
+        timeout = self.config.timeout_s
+        self._begin(model)
+        try:
+            # The timeout starts once the provider admits the call.
+            async with provider.admit(model=model, **request):
+                if admitted is not None:
+                    admitted.set()
+                if timeout > 0:
+                    return await asyncio.wait_for(provider.chat(model=model, **request), timeout)
+                return await provider.chat(model=model, **request)
+        except asyncio.CancelledError:
+            # E.g. the losing side of a hedge: no outcome to record.
+            self._abandon(model)
+            raise
+        except asyncio.TimeoutError:
+            return LLMResponse(
+                content=f"Error calling LLM: {model} timed out after {timeout:.0f}s",
+                finish_reason="error",
+                error=LLMError(kind="timeout", message=f"timed out after {timeout}s"),
+            )
+    
+    def _retry_delay(self, model: str, error: LLMError, attempt: int) -> float | None:
+        """Seconds to wait before retrying the same model, or None to give up on it."""
+        if not error.retryable or attempt >= self.config.max_retries:
+            return None
+        breaker = self._breakers.get(model)
+        if breaker is not None and breaker.opened_at is not None:
+            return None  # The circuit just opened
+        backoff = random.uniform(0, min(self.config.max_delay_s, self.config.base_delay_s * 2 ** attempt))
+        if error.retry_after is None:
+            return backoff
+        if error.retry_after > self.config.max_retry_after_s:
+            return None
+        return error.retry_after + backoff / 2
+    
+    def _allow(self, model: str) -> bool:
+        """Check a model's circuit: closed, or cooled down with no trial call in flight."""
+        breaker = self._breakers.get(model)
+        if breaker is None or breaker.opened_at is None:
+            return True
+        if breaker.probing:
+            return False
+        return time.monotonic() - breaker.opened_at >= self.config.breaker_cooldown_s
+    
+    def _begin(self, model: str) -> None:
+        """Mark a call to a model whose circuit is open as its trial call."""
+        breaker = self._breakers.get(model)
+        if breaker is not None and breaker.opened_at is not None:
+            breaker.probing = True
+    
+    def _abandon(self, model: str) -> None:
+        """Release a model's trial call that ended without an outcome."""
+        breaker = self._breakers.get(model)
+        if breaker is not None:
+            breaker.probing = False
+    
+    def _record(self, model: str, error: LLMError | None) -> None:
+        """Update a model's circuit after a call."""
+        breaker = self._breakers.setdefault(model, _Breaker())
+        if error is None or error.kind not in FAILOVER_ERRORS:
+            # The model answered (a bad request is the caller's fault, not an outage).
+            if breaker.opened_at is not None:
+                logger.info(f"Circuit for {model} closed")
+            breaker.failures = 0
+            breaker.opened_at = None
+            breaker.probing = False
+            return
+        breaker.failures += 1
+        if breaker.probing or (
+            breaker.opened_at is None and breaker.failures >= self.config.breaker_failures
+        ):
+            logger.warning(f"Circuit for {model} opened after {breaker.failures} failures")
+            breaker.opened_at = time.monotonic()
+        breaker.probing = False
+    
+    def _state(self, breaker: _Breaker) -> str:
+        if breaker.opened_at is None:
+            return "closed"
+        if time.monotonic() - breaker.opened_at >= self.config.breaker_cooldown_s:
+            return "half_open"
+        return "open"
+
+
+def _error_of(response: LLMResponse) -> LLMError | None:
+    """The error of a failed response (classified as unknown if the provider didn't say)."""
+    if response.finish_reason != "error":
+        return None
+    return response.error or LLMError(kind="unknown", message=response.content or "")
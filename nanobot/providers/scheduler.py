@@ -0,0 +1,347 @@
+"""Client-side rate limiting and prioritization of LLM calls."""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from contextlib import aclosing, asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Iterator
+
+from loguru import logger
+
+from nanobot.bus.queue import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, PRIORITY_SYSTEM
+from nanobot.config.schema import RateLimitConfig
+from nanobot.providers.base import LLMProvider, LLMResponse, LLMStreamChunk
+
+# Priority class of the LLM calls made by the current task (see nanobot.bus.queue).
+_priority: ContextVar[int] = ContextVar("llm_priority", default=PRIORITY_INTERACTIVE)
+
+_PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_SYSTEM: "system",
+    PRIORITY_BACKGROUND: "background",
+}
+
+
+@contextmanager
+def llm_priority(priority: int) -> Iterator[None]:
+    """Run the LLM calls made inside the block at the given priority class."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    """Get the priority class of LLM calls made by the current task."""
+    return _priority.get()
+
+
+@dataclass
+class _Admission:
+    """A reservation made by RateLimitedProvider.admit() for the call inside the block."""
+    provider: "RateLimitedProvider"
+    model: str
+    reserved: int
+    used: bool = False
+
+
+_admission: ContextVar[_Admission | None] = ContextVar("llm_admission", default=None)
+
+
+class _Bucket:
+    """A token bucket holding up to one minute's worth of budget."""
+    
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0  # Refill per second
+        self.level = self.capacity
+        self.updated = time.monotonic()
+    
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def delay(self, amount: float) -> float:
+        """Seconds until `amount` can be taken (0 if it can be taken now)."""
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+
+class _ModelLimiter:
+    """Buckets, waiters and queue-wait samples for one model."""
+    
+    def __init__(self, limits: RateLimitConfig):
+        self.requests = _Bucket(limits.rpm) if limits.rpm > 0 else None
+        self.tokens = _Bucket(limits.tpm) if limits.tpm > 0 else None
+        self.cond = asyncio.Condition()
+        self.waiters: list[tuple[int, int]] = []  # Heap of (priority, arrival)
+        self.waits: deque[float] = deque(maxlen=1000)
+        self.counters = {"requests": 0, "throttled": 0, "tokens_reserved": 0, "tokens_used": 0}
+    
+    def delay(self, tokens: int) -> float:
+        now = time.monotonic()
+        delay = 0.0
+        if self.requests:
+            self.requests.refill(now)
+            delay = max(delay, self.requests.delay(1))
+        if self.tokens:
+            self.tokens.refill(now)
+            delay = max(delay, self.tokens.delay(tokens))
+        return delay
+    
+    def take(self, tokens: int) -> int:
+        """Take one request and `tokens` from the buckets; returns the tokens reserved."""
+        if self.requests:
+            self.requests.level -= 1
+        if not self.tokens:
+            return 0
+        tokens = min(tokens, int(self.tokens.capacity))
+        self.tokens.level -= tokens
+        return tokens
+
+
+class RateLimiter:
+    """
+    Shared requests-per-minute and tokens-per-minute budgets, per model.
+    
+    Each model with limits gets two token buckets that refill continuously
+    and hold up to a minute's worth of budget, so a quiet model can serve a
+    short burst at once. A call reserves one request plus its estimated
+    prompt tokens and `max_tokens`; once it returns, the reservation is
+    settled against the usage the provider reported, refunding what was
+    over-estimated (or going into debt if it was under).
+    
+    Calls that don't fit the budget wait in a per-model queue ordered by
+    priority class and then arrival, so an interactive turn is sent before
+    any queued cron, heartbeat or subagent work. Only the head of the queue
+    is admitted; lower-priority calls never slip ahead of it.
+    
+    Limits are looked up by exact model name, then by the name without its
+    provider prefix, then under "*". Models without limits are not queued.
+    """
+    
+    def __init__(self, limits: dict[str, RateLimitConfig] | None = None):
+        self.limits = dict(limits or {})
+        self._models: dict[str, _ModelLimiter] = {}
+        self._arrivals = itertools.count()
+    
+    def limits_for(self, model: str) -> RateLimitConfig | None:
+        """Get the limits that apply to a model, if any."""
+        for key in (model, model.split("/", 1)[-1], "*"):
+            limits = self.limits.get(key)
+            if limits is not None and (limits.rpm > 0 or limits.tpm > 0):
+                return limits
+        return None
+    
+    async def acquire(self, model: str, tokens: int, priority: int | None = None) -> int:
+        """
+        Wait until a call to `model` fits the budget and reserve it.
+        
+        Args:
+            model: Model the call goes to.
+            tokens: Estimated tokens for the call (prompt plus reply).
+            priority: Priority class; defaults to that of the current task.
+        
+        Returns:
+            Tokens reserved, to be passed to settle() when the call is done.
+        """
+        state = self._state(model)
+        if state is None:
+            return 0
+        if priority is None:
+            priority = current_priority()
+        
+        entry = (priority, next(self._arrivals))
+        started = time.monotonic()
+        async with state.cond:
+            heapq.heappush(state.waiters, entry)
+            try:
+                while True:
+                    delay: float | None = None
+                    if state.waiters[0] == entry:
+                        delay = state.delay(tokens)
+                        if delay <= 0:
+                            break
+                    try:
+                        await asyncio.wait_for(state.cond.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                reserved = state.take(tokens)
+            finally:
+                state.waiters.remove(entry)
+                heapq.heapify(state.waiters)
+                state.cond.notify_all()
+        
+        waited = time.monotonic() - started
+        state.waits.append(waited)
+        state.counters["requests"] += 1
+        state.counters["tokens_reserved"] += reserved
+        if waited >= 0.001:
+            state.counters["throttled"] += 1
+            logger.debug(f"LLM call to {model} waited {waited:.2f}s for its rate limit")
+        return reserved
+    
+    async def settle(self, model: str, reserved: int, response: LLMResponse | None) -> None:
+        """
+        Correct a reservation with the tokens the call actually used.
+        
+        A call that failed without reporting usage is refunded in full; one
+        that was cancelled or gave no usage keeps its reservation.
+        """
+        state = self._models.get(model)
+        if state is None or response is None:
+            return
+        used = response.usage.get("total_tokens") or 0
+        state.counters["tokens_used"] += used
+        if not used and response.finish_reason != "error":
+            return
+        if state.tokens is None or used == reserved:
+            return
+        async with state.cond:
+            state.tokens.level = min(state.tokens.capacity, state.tokens.level + reserved - used)
+            state.cond.notify_all()
+    
+    def stats(self) -> dict[str, Any]:
+        """Queue depth, counters and recent queue-wait times per model."""
+        result = {}
+        for model, state in self._models.items():
+            waits = sorted(state.waits)
+            result[model] = {
+                "depth": len(state.waiters),
+                "waiting": {
+                    name: sum(1 for p, _ in state.waiters if p == level)
+                    for level, name in _PRIORITY_NAMES.items()
+                },
+                **state.counters,
+                "wait_s": {
+                    "samples": len(waits),
+                    "avg": sum(waits) / len(waits) if waits else 0.0,
+                    "p95": waits[int(len(waits) * 0.95)] if waits else 0.0,
+                    "max": waits[-1] if waits else 0.0,
+                },
+            }
+        return result
+    
+    def _state(self, model: str) -> _ModelLimiter | None:
+        state = self._models.get(model)
+        if state is None:
+            limits = self.limits_for(model)
+            if limits is None:
+                return None
+            state = self._models[model] = _ModelLimiter(limits)
+        return state
+
+
+def estimate_tokens(
+    messages: list[dict[str, Any]],
+    tools: list[dict[str, Any]] | None,
+    max_tokens: int,
+) -> int:
+    """Estimate the tokens a call can use: its prompt plus the longest reply allowed."""
+    # Imported here: the agent package imports this module for llm_priority.
+    from nanobot.agent.tokens import count_message_tokens, count_tools_tokens, heuristic_tokens
+    
+    prompt = sum(count_message_tokens(m, heuristic_tokens) for m in messages)
+    return prompt + count_tools_tokens(tools, heuristic_tokens) + max_tokens
+
+
+class RateLimitedProvider(LLMProvider):
+    """
+    Sends a provider's calls through a shared RateLimiter.
+    
+    A call made inside `admit()` uses the reservation the block waited for
+    instead of queueing again.
+    """
+    
+    def __init__(self, provider: LLMProvider, limiter: RateLimiter):
+        super().__init__(provider.api_key, provider.api_base)
+        self.provider = provider
+        self.limiter = limiter
+    
+    def get_default_model(self) -> str:
+        return self.provider.get_default_model()
+    
+    @asynccontextmanager
+    async def admit(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[None]:
+        model = model or self.provider.get_default_model()
+        reserved = await self.limiter.acquire(model, estimate_tokens(messages, tools, max_tokens))
+        token = _admission.set(_Admission(self, model, reserved))
+        try:
+            yield
+        finally:
+            _admission.reset(token)
+    
+    async def _reserve(
+        self,
+        model: str,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+        max_tokens: int,
+    ) -> int:
+        """Take the reservation admitted for this call, or wait for one."""
+        admission = _admission.get()
+        if admission is not None and admission.provider is self and admission.model == model and not admission.used:
+            admission.used = True
+            return admission.reserved
+        return await self.limiter.acquire(model, estimate_tokens(messages, tools, max_tokens))
+    
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        model = model or self.provider.get_default_model()
+        reserved = await self._reserve(model, messages, tools, max_tokens)
+        response: LLMResponse | None = None
+        try:
+            response = await self.provider.chat(
+                messages=messages,
+                tools=tools,
+                model=model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+            )
+            return response
+        finally:
+            await self.limiter.settle(model, reserved, response)
+    
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[LLMStreamChunk]:
+        model = model or self.provider.get_default_model()
+        reserved = await self._reserve(model, messages, tools, max_tokens)
+        response: LLMResponse | None = None
+        try:
+            stream = self.provider.chat_stream(
+                messages=messages,
+                tools=tools,
+                model=model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+            )
+            async with aclosing(stream):
+                async for chunk in stream:
+                    response = chunk.response or response
+                    yield chunk
+        finally:
+            await self.limiter.settle(model, reserved, response)
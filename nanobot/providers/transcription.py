@@ -4,9 +4,10 @@ import os
 from pathlib import Path
 from typing import Any
 
-import httpx
 from loguru import logger
 
+from nanobot.utils.http import HttpClientPool, http_client
+
 
 class GroqTranscriptionProvider:
     """
@@ -15,8 +16,9 @@ class GroqTranscriptionProvider:
     Groq offers extremely fast transcription with a generous free tier.
     """
     
-    def __init__(self, api_key: str | None = None):
+    def __init__(self, api_key: str | None = None, http: HttpClientPool | None = None):
         self.api_key = api_key or os.environ.get("GROQ_API_KEY")
+        self.http = http
         self.api_url = "https://api.groq.com/openai/v1/audio/transcriptions"
     
     async def transcribe(self, file_path: str | Path) -> str:
@@ -39,7 +41,7 @@ class GroqTranscriptionProvider:
             return ""
         
         try:
-            async with httpx.AsyncClient() as client:
+            async with http_client(self.http) as client:
                 with open(path, "rb") as f:
                     files = {
                         "file": (path.name, f),
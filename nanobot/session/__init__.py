@@ -1,5 +1,5 @@
 """Session management module."""
 
-from nanobot.session.manager import SessionManager, Session
+from nanobot.session.manager import SessionManager, Session, SessionChange
 
-__all__ = ["SessionManager", "Session"]
+__all__ = ["SessionManager", "Session", "SessionChange"]
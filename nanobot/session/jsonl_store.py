@@ -0,0 +1,327 @@
+"""Append-only JSONL session store (one file per session)."""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Any, Iterator
+
+from loguru import logger
+
+from nanobot.config.schema import SessionsConfig
+from nanobot.session.store import SessionStore
+from nanobot.utils.helpers import ensure_dir, safe_filename
+
+_READ_BLOCK = 64 * 1024
+
+
+class JsonlSessionStore(SessionStore):
+    """
+    Sessions as append-only JSONL files.
+    
+    Each session is one file with a message per line, plus a small
+    ``.meta.json`` sidecar for metadata. Appends never rewrite earlier
+    lines; a clear is recorded as a marker line. Records made dead by
+    clears (and legacy metadata lines) are removed by ``compact()``.
+    
+    In "interval" fsync mode, appends to a file are fsynced at most once
+    per ``fsync_interval_s``; a file whose append skipped its fsync is
+    synced by the next ``flush()``. Files that replace another (the
+    sidecar, compacted files) are always fsynced first.
+    """
+    
+    def __init__(self, sessions_dir: Path, config: SessionsConfig | None = None):
+        super().__init__(config)
+        self.sessions_dir = ensure_dir(sessions_dir)
+        self._dead: dict[str, int] = {}  # key -> dead records in its file
+        self._dead_lock = threading.Lock()  # compact_pending reads _dead from a worker thread
+        self._locks: dict[str, threading.Lock] = {}  # Guards each file against compaction
+        self._last_fsync: dict[Path, float] = {}  # path -> when it was last fsynced
+        self._unsynced: set[Path] = set()  # Appended to without an fsync since
+        self._sync_lock = threading.Lock()  # flush() runs in a worker thread
+    
+    def _get_session_path(self, key: str) -> Path:
+        """Get the file path for a session."""
+        safe_key = safe_filename(key.replace(":", "_"))
+        return self.sessions_dir / f"{safe_key}.jsonl"
+    
+    def _get_meta_path(self, key: str) -> Path:
+        """Get the metadata sidecar path for a session."""
+        return self._get_session_path(key).with_suffix(".meta.json")
+    
+    def _lock(self, key: str) -> threading.Lock:
+        return self._locks.setdefault(key, threading.Lock())
+    
+    def read_meta(self, key: str) -> dict[str, Any] | None:
+        path = self._get_meta_path(key)
+        if path.exists():
+            try:
+                return json.loads(path.read_text(encoding="utf-8"))
+            except Exception as e:
+                logger.warning(f"Failed to read metadata for session {key}: {e}")
+        
+        session_path = self._get_session_path(key)
+        if not session_path.exists():
+            return None
+        legacy = _read_legacy_meta(session_path)
+        if legacy is None:
+            return None
+        return {
+            "key": key,
+            "created_at": legacy.get("created_at"),
+            "updated_at": legacy.get("updated_at"),
+            "metadata": legacy.get("metadata", {}),
+        }
+    
+    def read_tail(self, key: str, skip: int, limit: int) -> tuple[list[dict[str, Any]], bool]:
+        path = self._get_session_path(key)
+        if not path.exists():
+            return [], False
+        
+        found: list[dict[str, Any]] = []
+        skipped = 0
+        with self._lock(key):
+            for line in _reverse_lines(path):
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                except ValueError:
+                    continue  # Torn line from a crash mid-append
+                record_type = data.get("_type")
+                if record_type == "clear":
+                    # Dead records precede the marker; let the compactor drop them.
+                    self._mark_dead(key)
+                    return found[::-1], False
+                if record_type == "metadata":
+                    continue
+                if skipped < skip:
+                    skipped += 1
+                    continue
+                if len(found) == limit:
+                    return found[::-1], True
+                found.append(data)
+        return found[::-1], False
+    
+    def iter_messages(self, key: str) -> Iterator[dict[str, Any]]:
+        path = self._get_session_path(key)
+        if not path.exists():
+            return
+        with open(path, "rb") as f:
+            f.seek(_live_offset(path))
+            for line in f:
+                try:
+                    data = json.loads(line)
+                except ValueError:
+                    continue
+                if data.get("_type") is None:
+                    yield data
+    
+    def append(
+        self,
+        key: str,
+        messages: list[dict[str, Any]],
+        meta: dict[str, Any],
+        cleared: bool = False,
+    ) -> None:
+        path = self._get_session_path(key)
+        records: list[dict[str, Any]] = []
+        if cleared:
+            records.append({"_type": "clear", "timestamp": datetime.now().isoformat()})
+        records.extend(messages)
+        
+        with self._lock(key):
+            if records:
+                data = "".join(json.dumps(r) + "\n" for r in records).encode("utf-8")
+                with open(path, "ab+") as f:
+                    if f.tell() > 0:
+                        # Don't glue new records onto a line torn by a crash.
+                        f.seek(-1, os.SEEK_END)
+                        if f.read(1) != b"\n":
+                            data = b"\n" + data
+                    f.write(data)
+                    self._sync(f, path)
+            self._write_meta(key, meta)
+        
+        if cleared:
+            self._mark_dead(key)
+    
+    def _mark_dead(self, key: str) -> None:
+        """Schedule a cleared session file for compaction."""
+        with self._dead_lock:
+            self._dead[key] = max(self._dead.get(key, 0), self.config.compact_min_dead)
+    
+    def _write_meta(self, key: str, meta: dict[str, Any]) -> None:
+        """Atomically replace the metadata sidecar."""
+        path = self._get_meta_path(key)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+            if self.config.fsync != "never":
+                # Never rate-limited: the replace must not expose an unsynced file.
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+    
+    def _sync(self, f: IO[Any], path: Path) -> None:
+        """Flush an append to disk according to the fsync policy."""
+        policy = self.config.fsync
+        if policy == "never":
+            return
+        now = time.monotonic()
+        with self._sync_lock:
+            last = self._last_fsync.get(path)
+            if policy == "interval" and last is not None and now - last < self.config.fsync_interval_s:
+                self._unsynced.add(path)
+                return
+            self._unsynced.discard(path)
+            self._last_fsync[path] = now
+        f.flush()
+        os.fsync(f.fileno())
+    
+    def flush(self) -> int:
+        with self._sync_lock:
+            paths, self._unsynced = self._unsynced, set()
+        for path in paths:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except FileNotFoundError:
+                continue  # Deleted since
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            with self._sync_lock:
+                self._last_fsync[path] = time.monotonic()
+        return len(paths)
+    
+    def close(self) -> None:
+        self.flush()
+    
+    def compact(self, key: str) -> bool:
+        """
+        Rewrite a session file without its dead records.
+        
+        The live records (everything after the last clear marker, minus
+        legacy metadata and torn lines) are copied to a temporary file that
+        then replaces the original, so a crash never leaves a partial file.
+        
+        Args:
+            key: Session key.
+        
+        Returns:
+            True if the file was rewritten.
+        """
+        path = self._get_session_path(key)
+        with self._lock(key):
+            if not path.exists():
+                with self._dead_lock:
+                    self._dead.pop(key, None)
+                return False
+            
+            tmp = path.with_suffix(".jsonl.tmp")
+            with open(path, "rb") as src, open(tmp, "wb") as dst:
+                src.seek(_live_offset(path))
+                for line in src:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # Blank or torn line
+                    if record.get("_type") == "metadata":
+                        continue
+                    dst.write(line if line.endswith(b"\n") else line + b"\n")
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.replace(tmp, path)
+            with self._dead_lock:
+                self._dead[key] = 0
+        
+        logger.debug(f"Compacted session {key}")
+        return True
+    
+    def compact_pending(self) -> int:
+        with self._dead_lock:
+            keys = [k for k, dead in self._dead.items() if dead >= self.config.compact_min_dead]
+        compacted = 0
+        for key in keys:
+            try:
+                compacted += self.compact(key)
+            except Exception as e:
+                logger.warning(f"Failed to compact session {key}: {e}")
+        return compacted
+    
+    def delete(self, key: str) -> bool:
+        with self._dead_lock:
+            self._dead.pop(key, None)
+        path = self._get_session_path(key)
+        with self._lock(key):
+            self._get_meta_path(key).unlink(missing_ok=True)
+            if path.exists():
+                path.unlink()
+                return True
+        return False
+    
+    def list_sessions(self, limit: int | None = None, offset: int = 0) -> list[dict[str, Any]]:
+        sessions = []
+        
+        for path in self.sessions_dir.glob("*.jsonl"):
+            try:
+                meta_path = path.with_suffix(".meta.json")
+                if meta_path.exists():
+                    data = json.loads(meta_path.read_text(encoding="utf-8"))
+                else:
+                    data = _read_legacy_meta(path)
+                    if data is None:
+                        continue
+                sessions.append({
+                    # Legacy files don't record their key; channel names have no "_".
+                    "key": data.get("key") or path.stem.replace("_", ":", 1),
+                    "created_at": data.get("created_at"),
+                    "updated_at": data.get("updated_at"),
+                    "path": str(path)
+                })
+            except Exception:
+                continue
+        
+        sessions.sort(key=lambda x: x.get("updated_at") or "", reverse=True)
+        return sessions[offset:offset + limit if limit is not None else None]
+
+
+def _read_legacy_meta(path: Path) -> dict[str, Any] | None:
+    """Read the metadata line at the start of a legacy session file."""
+    with open(path, encoding="utf-8") as f:
+        first_line = f.readline().strip()
+    try:
+        data = json.loads(first_line) if first_line else {}
+    except ValueError:
+        return None
+    return data if data.get("_type") == "metadata" else None
+
+
+def _live_offset(path: Path) -> int:
+    """Byte offset just past the last clear marker (0 if there is none)."""
+    live_from = 0
+    with open(path, "rb") as f:
+        offset = 0
+        for line in f:
+            offset += len(line)
+            if line.startswith(b'{"_type": "clear"'):
+                live_from = offset
+    return live_from
+
+
+def _reverse_lines(path: Path) -> Iterator[bytes]:
+    """Yield the lines of a file from last to first, reading blocks from the end."""
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        partial = b""
+        while pos > 0:
+            size = min(_READ_BLOCK, pos)
+            pos -= size
+            f.seek(pos)
+            lines = (f.read(size) + partial).split(b"\n")
+            partial = lines[0]
+            yield from reversed(lines[1:])
+        yield partial
@@ -1,14 +1,18 @@
 """Session management for conversation history."""
 
-import json
+from collections import OrderedDict
 from pathlib import Path
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any
+from typing import Any, Callable
 
 from loguru import logger
 
-from nanobot.utils.helpers import ensure_dir, safe_filename
+from nanobot.config.schema import SessionsConfig
+from nanobot.session.store import SessionStore, create_store
+
+# Session metadata holding the rolling summary of older history (see nanobot.agent.history).
+DIGEST_KEY = "history_digest"
 
 
 @dataclass
@@ -24,6 +28,9 @@ class Session:
     created_at: datetime = field(default_factory=datetime.now)
     updated_at: datetime = field(default_factory=datetime.now)
     metadata: dict[str, Any] = field(default_factory=dict)
+    _persisted: int = field(default=0, repr=False, compare=False)  # Messages already on disk
+    _cleared: bool = field(default=False, repr=False, compare=False)  # clear() not yet on disk
+    _has_older: bool = field(default=False, repr=False, compare=False)  # Older messages only on disk
     
     def add_message(self, role: str, content: str, **kwargs: Any) -> None:
         """Add a message to the session."""
@@ -40,6 +47,8 @@ class Session:
         """
         Get message history for LLM context.
         
+        Only resident messages are considered; see SessionManager.load_older.
+        
         Args:
             max_messages: Maximum messages to return.
         
@@ -53,27 +62,73 @@ class Session:
         return [{"role": m["role"], "content": m["content"]} for m in recent]
     
     def clear(self) -> None:
-        """Clear all messages in the session."""
+        """Clear all messages in the session (and the digest that summarizes them)."""
         self.messages = []
+        self.metadata.pop(DIGEST_KEY, None)
+        self._cleared = True
         self.updated_at = datetime.now()
 
 
+@dataclass
+class SessionChange:
+    """A persisted change to a session, delivered to SessionManager subscribers."""
+    
+    key: str
+    messages: list[dict[str, Any]]  # Messages appended by this change
+    cleared: bool = False  # Earlier history was cleared (or the session deleted)
+
+
 class SessionManager:
     """
     Manages conversation sessions.
     
-    Sessions are stored as JSONL files in the sessions directory.
+    Persistence is delegated to a SessionStore (append-only JSONL files
+    or SQLite, see ``sessions.backend``). Saving a session appends only
+    the messages added since the last save.
+    
+    Only the tail of a session is read from storage and kept in memory
+    (``resident_messages``); older messages are paged in on demand with
+    ``load_older()``. Cached sessions are evicted least recently used
+    first once the entry or memory limit is exceeded.
+    
+    One manager is shared by everything in the process that reads or
+    writes sessions; components that need to react to changes use
+    ``subscribe()`` instead of re-reading storage.
     """
     
-    def __init__(self, workspace: Path):
+    def __init__(
+        self,
+        workspace: Path,
+        config: SessionsConfig | None = None,
+        store: SessionStore | None = None,
+    ):
         self.workspace = workspace
-        self.sessions_dir = ensure_dir(Path.home() / ".nanobot" / "sessions")
-        self._cache: dict[str, Session] = {}
+        self.config = config or SessionsConfig()
+        self.store = store or create_store(self.config)
+        self._cache: OrderedDict[str, Session] = OrderedDict()
+        self._cache_sizes: dict[str, int] = {}  # key -> approximate bytes resident
+        self._cache_bytes = 0
+        self._subscribers: list[Callable[[SessionChange], None]] = []
     
-    def _get_session_path(self, key: str) -> Path:
-        """Get the file path for a session."""
-        safe_key = safe_filename(key.replace(":", "_"))
-        return self.sessions_dir / f"{safe_key}.jsonl"
+    def subscribe(self, callback: Callable[[SessionChange], None]) -> None:
+        """
+        Get notified after each saved change to any session.
+        
+        Callbacks run synchronously inside save()/delete() and must not block.
+        """
+        self._subscribers.append(callback)
+    
+    def unsubscribe(self, callback: Callable[[SessionChange], None]) -> None:
+        """Stop receiving session change notifications."""
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+    
+    def _notify(self, change: SessionChange) -> None:
+        for callback in list(self._subscribers):
+            try:
+                callback(change)
+            except Exception as e:
+                logger.warning(f"Session subscriber failed for {change.key}: {e}")
     
     def get_or_create(self, key: str, *, refresh: bool = False) -> Session:
         """
@@ -88,73 +143,138 @@ class SessionManager:
         """
         # Check cache
         if not refresh and key in self._cache:
+            self._cache.move_to_end(key)
             return self._cache[key]
-        if refresh:
-            self._cache.pop(key, None)
         
         # Try to load from disk
         session = self._load(key)
         if session is None:
             session = Session(key=key)
         
-        self._cache[key] = session
+        self._remember(session)
         return session
     
     def _load(self, key: str) -> Session | None:
-        """Load a session from disk."""
-        path = self._get_session_path(key)
-        
-        if not path.exists():
-            return None
-        
+        """Load the tail of a session from storage."""
         try:
-            messages = []
-            metadata = {}
-            created_at = None
-            
-            with open(path) as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    
-                    data = json.loads(line)
-                    
-                    if data.get("_type") == "metadata":
-                        metadata = data.get("metadata", {})
-                        created_at = datetime.fromisoformat(data["created_at"]) if data.get("created_at") else None
-                    else:
-                        messages.append(data)
-            
+            meta = self.store.read_meta(key)
+            messages, has_older = self.store.read_tail(
+                key, skip=0, limit=self.config.resident_messages
+            )
+            if meta is None and not messages:
+                return None
+            meta = meta or {}
             return Session(
                 key=key,
                 messages=messages,
-                created_at=created_at or datetime.now(),
-                metadata=metadata
+                created_at=_parse_time(meta.get("created_at")) or datetime.now(),
+                updated_at=_parse_time(meta.get("updated_at")) or datetime.now(),
+                metadata=meta.get("metadata", {}),
+                _persisted=len(messages),
+                _has_older=has_older,
             )
         except Exception as e:
             logger.warning(f"Failed to load session {key}: {e}")
             return None
     
+    def load_older(self, session: Session, count: int) -> int:
+        """
+        Page older messages of a session from storage into memory.
+        
+        The extra messages stay resident until the next save trims the
+        session back to its window.
+        
+        Args:
+            session: A session obtained from this manager.
+            count: Maximum number of messages to load.
+        
+        Returns:
+            Number of messages prepended to session.messages.
+        """
+        if count <= 0 or session._cleared or not session._has_older:
+            return 0
+        older, has_older = self.store.read_tail(session.key, skip=session._persisted, limit=count)
+        session.messages[:0] = older
+        session._persisted += len(older)
+        session._has_older = has_older
+        return len(older)
+    
     def save(self, session: Session) -> None:
-        """Save a session to disk."""
-        path = self._get_session_path(session.key)
-        
-        with open(path, "w") as f:
-            # Write metadata first
-            metadata_line = {
-                "_type": "metadata",
-                "created_at": session.created_at.isoformat(),
-                "updated_at": session.updated_at.isoformat(),
-                "metadata": session.metadata
-            }
-            f.write(json.dumps(metadata_line) + "\n")
-            
-            # Write messages
-            for msg in session.messages:
-                f.write(json.dumps(msg) + "\n")
-        
-        self._cache[session.key] = session
+        """
+        Save a session.
+        
+        Appends the messages added since the last save (dropping the stored
+        history first if the session was cleared) and updates its metadata.
+        """
+        cleared = session._cleared
+        appended = session.messages[0 if cleared else session._persisted:]
+        meta = {
+            "key": session.key,
+            "created_at": session.created_at.isoformat(),
+            "updated_at": session.updated_at.isoformat(),
+            "metadata": session.metadata,
+        }
+        self.store.append(session.key, appended, meta, cleared=cleared)
+        
+        if cleared:
+            session._cleared = False
+            session._has_older = False
+        
+        # Everything is stored now; keep only the resident window in memory.
+        excess = len(session.messages) - self.config.resident_messages
+        if excess > 0:
+            del session.messages[:excess]
+            session._has_older = True
+        session._persisted = len(session.messages)
+        self._remember(session)
+        if appended or cleared:
+            self._notify(SessionChange(key=session.key, messages=appended, cleared=cleared))
+    
+    def _remember(self, session: Session) -> None:
+        """Cache a session as most recently used and enforce the cache limits."""
+        key = session.key
+        self._cache[key] = session
+        self._cache.move_to_end(key)
+        size = _approx_size(session)
+        self._cache_bytes += size - self._cache_sizes.get(key, 0)
+        self._cache_sizes[key] = size
+        
+        max_bytes = self.config.cache_max_mb * 1024 * 1024
+        while len(self._cache) > 1 and (
+            len(self._cache) > self.config.cache_max_sessions or self._cache_bytes > max_bytes
+        ):
+            # Least recently used first; unsaved sessions must stay.
+            victim = next(
+                (k for k, s in self._cache.items()
+                 if k != key and not s._cleared and s._persisted == len(s.messages)),
+                None,
+            )
+            if victim is None:
+                break
+            self._forget(victim)
+    
+    def _forget(self, key: str) -> None:
+        """Drop a session from the cache."""
+        self._cache.pop(key, None)
+        self._cache_bytes -= self._cache_sizes.pop(key, 0)
+    
+    def compact_pending(self) -> int:
+        """
+        Let the store reclaim space left by cleared history.
+        
+        Returns:
+            Number of sessions compacted.
+        """
+        return self.store.compact_pending()
+    
+    def flush(self) -> int:
+        """
+        Sync appends whose fsync the "interval" policy deferred.
+        
+        Returns:
+            Number of files synced.
+        """
+        return self.store.flush()
     
     def delete(self, key: str) -> bool:
         """
@@ -167,39 +287,37 @@ class SessionManager:
             True if deleted, False if not found.
         """
         # Remove from cache
-        self._cache.pop(key, None)
+        self._forget(key)
         
-        # Remove file
-        path = self._get_session_path(key)
-        if path.exists():
-            path.unlink()
-            return True
-        return False
+        existed = self.store.delete(key)
+        self._notify(SessionChange(key=key, messages=[], cleared=True))
+        return existed
     
-    def list_sessions(self) -> list[dict[str, Any]]:
+    def list_sessions(self, limit: int | None = None, offset: int = 0) -> list[dict[str, Any]]:
         """
-        List all sessions.
+        List sessions, most recently updated first.
+        
+        Args:
+            limit: Maximum number of sessions to return (None for all).
+            offset: Number of sessions to skip (for paging).
         
         Returns:
             List of session info dicts.
         """
-        sessions = []
-        
-        for path in self.sessions_dir.glob("*.jsonl"):
-            try:
-                # Read just the metadata line
-                with open(path) as f:
-                    first_line = f.readline().strip()
-                    if first_line:
-                        data = json.loads(first_line)
-                        if data.get("_type") == "metadata":
-                            sessions.append({
-                                "key": path.stem.replace("_", ":"),
-                                "created_at": data.get("created_at"),
-                                "updated_at": data.get("updated_at"),
-                                "path": str(path)
-                            })
-            except Exception:
-                continue
-        
-        return sorted(sessions, key=lambda x: x.get("updated_at", ""), reverse=True)
+        return self.store.list_sessions(limit=limit, offset=offset)
+    
+    def close(self) -> None:
+        """Close the underlying store."""
+        self.store.close()
+
+
+def _parse_time(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _approx_size(session: Session) -> int:
+    """Rough memory footprint of a session's resident messages."""
+    return sum(
+        200 + (len(m["content"]) if isinstance(m.get("content"), str) else 0)
+        for m in session.messages
+    )
@@ -0,0 +1,152 @@
+"""SQLite session store (WAL mode)."""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Iterator
+
+from nanobot.config.schema import SessionsConfig
+from nanobot.session.store import SessionStore
+from nanobot.utils.helpers import ensure_dir
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    key TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    metadata TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_key TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_session ON messages (session_key, id);
+"""
+
+# fsync policy -> SQLite synchronous mode. In WAL mode NORMAL never corrupts
+# the database; it may only lose the last commits on power loss.
+_SYNCHRONOUS = {"always": "FULL", "interval": "NORMAL", "never": "OFF"}
+
+_PAGE_SIZE = 500
+
+
+class SqliteSessionStore(SessionStore):
+    """
+    Sessions in a single SQLite database.
+    
+    Session keys are stored verbatim and indexed, and listing is ordered by
+    an index on ``updated_at``. Reading a session's tail walks the
+    ``(session_key, id)`` index backwards, so its cost depends on the page
+    size rather than on how much history or how many chats exist. Each
+    save is a single transaction.
+    """
+    
+    def __init__(self, path: Path, config: SessionsConfig | None = None):
+        super().__init__(config)
+        ensure_dir(path.parent)
+        self.path = path
+        self._lock = threading.Lock()  # Shared by the event loop and compaction threads
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={_SYNCHRONOUS[self.config.fsync]}")
+        self._conn.executescript(_SCHEMA)
+    
+    def read_meta(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created_at, updated_at, metadata FROM sessions WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "key": key,
+            "created_at": row[0],
+            "updated_at": row[1],
+            "metadata": json.loads(row[2]),
+        }
+    
+    def read_tail(self, key: str, skip: int, limit: int) -> tuple[list[dict[str, Any]], bool]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM messages WHERE session_key = ? ORDER BY id DESC LIMIT ? OFFSET ?",
+                (key, min(limit, 2**62) + 1, skip),
+            ).fetchall()
+        has_older = len(rows) > limit
+        return [json.loads(r[0]) for r in reversed(rows[:limit])], has_older
+    
+    def iter_messages(self, key: str) -> Iterator[dict[str, Any]]:
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, data FROM messages WHERE session_key = ? AND id > ? "
+                    "ORDER BY id LIMIT ?",
+                    (key, last_id, _PAGE_SIZE),
+                ).fetchall()
+            if not rows:
+                return
+            for row_id, data in rows:
+                yield json.loads(data)
+            last_id = rows[-1][0]
+    
+    def append(
+        self,
+        key: str,
+        messages: list[dict[str, Any]],
+        meta: dict[str, Any],
+        cleared: bool = False,
+    ) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                if cleared:
+                    self._conn.execute("DELETE FROM messages WHERE session_key = ?", (key,))
+                self._conn.executemany(
+                    "INSERT INTO messages (session_key, data) VALUES (?, ?)",
+                    [(key, json.dumps(m)) for m in messages],
+                )
+                self._conn.execute(
+                    "INSERT INTO sessions (key, created_at, updated_at, metadata) "
+                    "VALUES (?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+                    "updated_at = excluded.updated_at, metadata = excluded.metadata",
+                    (
+                        key,
+                        meta.get("created_at") or meta.get("updated_at") or "",
+                        meta.get("updated_at") or "",
+                        json.dumps(meta.get("metadata", {})),
+                    ),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+    
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("DELETE FROM messages WHERE session_key = ?", (key,))
+                existed = self._conn.execute(
+                    "DELETE FROM sessions WHERE key = ?", (key,)
+                ).rowcount > 0
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return existed
+    
+    def list_sessions(self, limit: int | None = None, offset: int = 0) -> list[dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, created_at, updated_at FROM sessions "
+                "ORDER BY updated_at DESC LIMIT ? OFFSET ?",
+                (-1 if limit is None else limit, offset),
+            ).fetchall()
+        return [{"key": k, "created_at": c, "updated_at": u} for k, c, u in rows]
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,139 @@
+"""Storage backends for session history."""
+
+import sys
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Iterator
+
+from nanobot.config.schema import SessionsConfig
+from nanobot.utils.helpers import get_data_path, get_sessions_path
+
+
+class SessionStore(ABC):
+    """
+    Persistent storage for session messages and metadata.
+    
+    Metadata is a dict with "key", "created_at", "updated_at" (ISO
+    strings) and "metadata". Messages are only ever appended, or dropped
+    all at once when a session is cleared.
+    """
+    
+    def __init__(self, config: SessionsConfig | None = None):
+        self.config = config or SessionsConfig()
+    
+    @abstractmethod
+    def read_meta(self, key: str) -> dict[str, Any] | None:
+        """Read a session's metadata, or None if it has none."""
+        pass
+    
+    @abstractmethod
+    def read_tail(self, key: str, skip: int, limit: int) -> tuple[list[dict[str, Any]], bool]:
+        """
+        Read the newest messages of a session.
+        
+        Args:
+            key: Session key.
+            skip: Number of newest messages to skip (already resident).
+            limit: Maximum messages to return.
+        
+        Returns:
+            (messages oldest first, whether older messages remain).
+        """
+        pass
+    
+    @abstractmethod
+    def append(
+        self,
+        key: str,
+        messages: list[dict[str, Any]],
+        meta: dict[str, Any],
+        cleared: bool = False,
+    ) -> None:
+        """
+        Append messages to a session and replace its metadata.
+        
+        Args:
+            key: Session key.
+            messages: New messages, oldest first.
+            meta: Session metadata.
+            cleared: Drop all earlier messages first.
+        """
+        pass
+    
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """Delete a session. Returns True if it existed."""
+        pass
+    
+    @abstractmethod
+    def list_sessions(self, limit: int | None = None, offset: int = 0) -> list[dict[str, Any]]:
+        """List sessions, most recently updated first."""
+        pass
+    
+    def iter_messages(self, key: str) -> Iterator[dict[str, Any]]:
+        """Iterate over all messages of a session, oldest first."""
+        messages, _ = self.read_tail(key, 0, sys.maxsize)
+        yield from messages
+    
+    def compact_pending(self) -> int:
+        """Reclaim space left by cleared history. Returns sessions compacted."""
+        return 0
+    
+    def flush(self) -> int:
+        """Sync writes whose fsync the policy deferred. Returns files synced."""
+        return 0
+    
+    def close(self) -> None:
+        """Release resources held by the store."""
+        pass
+
+
+def create_store(config: SessionsConfig) -> SessionStore:
+    """Create the session store selected by the configuration."""
+    if config.backend == "jsonl":
+        from nanobot.session.jsonl_store import JsonlSessionStore
+        return JsonlSessionStore(get_sessions_path(), config)
+    from nanobot.session.sqlite_store import SqliteSessionStore
+    return SqliteSessionStore(sqlite_path(config), config)
+
+
+def sqlite_path(config: SessionsConfig) -> Path:
+    """Get the SQLite database path for a configuration."""
+    if config.sqlite_path:
+        return Path(config.sqlite_path).expanduser()
+    return get_data_path() / "sessions.db"
+
+
+def migrate_sessions(src: SessionStore, dst: SessionStore, batch_size: int = 500) -> int:
+    """
+    Copy every session from one store to another.
+    
+    Sessions already in the destination are replaced, so an interrupted
+    migration can simply be run again.
+    
+    Returns:
+        Number of sessions copied.
+    """
+    copied = 0
+    for info in src.list_sessions():
+        key = info["key"]
+        meta = src.read_meta(key) or {
+            "key": key,
+            "created_at": info.get("created_at"),
+            "updated_at": info.get("updated_at"),
+            "metadata": {},
+        }
+        meta["key"] = key
+        
+        first = True
+        batch: list[dict[str, Any]] = []
+        for msg in src.iter_messages(key):
+            batch.append(msg)
+            if len(batch) >= batch_size:
+                dst.append(key, batch, meta, cleared=first)
+                first = False
+                batch = []
+        if batch or first:
+            dst.append(key, batch, meta, cleared=first)
+        copied += 1
+    return copied
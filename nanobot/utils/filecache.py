@@ -0,0 +1,97 @@
+"""Memoized file reads invalidated by mtime/size."""
+
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+
+@dataclass
+class _Entry:
+    signature: tuple[int, int] | None  # (mtime_ns, size); None if missing
+    value: Any
+    checked_at: float
+
+
+class FileCache:
+    """
+    Cache of file contents and directory listings.
+
+    An entry is re-validated with a single stat() once it is older than
+    `check_interval_s`, and re-read only if the file's mtime or size
+    changed. Within the interval, lookups do no I/O at all.
+    """
+
+    def __init__(self, check_interval_s: float = 1.0, which_ttl_s: float = 60.0):
+        self.check_interval_s = check_interval_s
+        self.which_ttl_s = which_ttl_s
+        self._entries: dict[tuple[str, Path], _Entry] = {}
+        self._which: dict[tuple[str, str], tuple[str | None, float]] = {}
+
+    def read_text(self, path: Path) -> str | None:
+        """Get a file's text, or None if it doesn't exist."""
+        return self._get("text", path, _read_text)
+
+    def list_dir(self, path: Path) -> list[Path]:
+        """Get a directory's entries (sorted), or [] if it doesn't exist."""
+        return self._get("dir", path, _list_dir) or []
+
+    def which(self, name: str) -> str | None:
+        """shutil.which() with results cached per PATH for `which_ttl_s`."""
+        key = (name, os.environ.get("PATH", ""))
+        now = time.monotonic()
+        cached = self._which.get(key)
+        if cached is not None and now - cached[1] < self.which_ttl_s:
+            return cached[0]
+        found = shutil.which(name)
+        self._which[key] = (found, now)
+        return found
+
+    def invalidate(self, path: Path | None = None) -> None:
+        """Forget one path (or everything), forcing a re-read on next access."""
+        if path is None:
+            self._entries.clear()
+            self._which.clear()
+            return
+        for kind in ("text", "dir"):
+            self._entries.pop((kind, path), None)
+
+    def _get(self, kind: str, path: Path, load: Callable[[Path], Any]) -> Any:
+        key = (kind, path)
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and now - entry.checked_at < self.check_interval_s:
+            return entry.value
+
+        signature = _signature(path)
+        if entry is not None and entry.signature == signature:
+            entry.checked_at = now
+            return entry.value
+
+        value = load(path) if signature is not None else None
+        self._entries[key] = _Entry(signature=signature, value=value, checked_at=now)
+        return value
+
+
+def _signature(path: Path) -> tuple[int, int] | None:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _read_text(path: Path) -> str | None:
+    try:
+        return path.read_text(encoding="utf-8")
+    except OSError:
+        return None
+
+
+def _list_dir(path: Path) -> list[Path]:
+    try:
+        return sorted(path.iterdir())
+    except OSError:
+        return []
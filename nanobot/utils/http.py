@@ -0,0 +1,161 @@
+"""Shared, long-lived HTTP clients with connection pooling."""
+
+import asyncio
+import importlib.util
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable
+
+import httpx
+from loguru import logger
+
+from nanobot.config.schema import HttpPoolConfig
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response stream that releases a per-host slot once the response is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+        self._released = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._released:
+                self._released = True
+                self._release()
+
+
+class _HostLimitedClient(httpx.AsyncClient):
+    """
+    AsyncClient that caps in-flight requests (and thus connections) per host.
+
+    Buffered requests hold their slot for the whole send; streamed requests
+    hold it until the response is closed.
+    """
+
+    def __init__(self, *, max_per_host: int, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._max_per_host = max_per_host
+        self._slots: dict[str, asyncio.Semaphore] = {}
+
+    async def send(self, request: httpx.Request, *, stream: bool = False, **kwargs: Any) -> httpx.Response:
+        slot = self._slots.setdefault(request.url.host, asyncio.Semaphore(self._max_per_host))
+        await slot.acquire()
+        if not stream:
+            try:
+                return await super().send(request, stream=False, **kwargs)
+            finally:
+                slot.release()
+
+        try:
+            response = await super().send(request, stream=True, **kwargs)
+        except BaseException:
+            slot.release()
+            raise
+        if response.is_closed:
+            # Body was already buffered by the transport; nothing holds the connection.
+            slot.release()
+        else:
+            response.stream = _ReleasingStream(response.stream, slot.release)
+        return response
+
+
+class HttpClientPool:
+    """
+    Pool of long-lived httpx clients shared across providers and tools.
+
+    Reusing clients keeps TCP/TLS connections alive between LLM calls and
+    web fetches instead of paying a new handshake per request. Clients are
+    created lazily by name; the owner (the gateway or the agent command)
+    closes them on shutdown.
+    """
+
+    def __init__(
+        self,
+        config: HttpPoolConfig | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.config = config or HttpPoolConfig()
+        self._transport = transport  # Overrides the pooled transport (tests, proxies)
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._http2 = self.config.http2 and self._h2_available()
+
+    @staticmethod
+    def _h2_available() -> bool:
+        if importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 requested but 'h2' is not installed; using HTTP/1.1")
+            return False
+        return True
+
+    def client(self, name: str = "default", **options: Any) -> httpx.AsyncClient:
+        """
+        Get a named shared client, creating it on first use.
+
+        Args:
+            name: Client name. Components needing client-level settings
+                (e.g. redirect limits) use their own name.
+            **options: Extra httpx.AsyncClient options, only applied when
+                the client is created.
+
+        Returns:
+            The shared client. Callers must not close it.
+        """
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._create_client(**options)
+            self._clients[name] = client
+        return client
+
+    def _create_client(self, **options: Any) -> httpx.AsyncClient:
+        cfg = self.config
+        transport = self._transport or httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=cfg.max_connections,
+                max_keepalive_connections=cfg.max_keepalive_connections,
+                keepalive_expiry=cfg.keepalive_expiry,
+            ),
+            http2=self._http2,
+        )
+        options.setdefault("timeout", cfg.timeout)
+        if cfg.max_connections_per_host > 0:
+            return _HostLimitedClient(
+                max_per_host=cfg.max_connections_per_host, transport=transport, **options
+            )
+        return httpx.AsyncClient(transport=transport, **options)
+
+    async def aclose(self) -> None:
+        """Close all clients and their connections."""
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.debug(f"Error closing HTTP client: {e}")
+
+
+@asynccontextmanager
+async def http_client(
+    pool: HttpClientPool | None,
+    name: str = "default",
+    **options: Any,
+) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Borrow a client from the pool, or use a one-off client if there is no pool.
+
+    Args:
+        pool: Shared pool, or None for standalone use (CLI, tests).
+        name: Pooled client name.
+        **options: httpx.AsyncClient options (see HttpClientPool.client).
+    """
+    if pool is not None:
+        yield pool.client(name, **options)
+        return
+    async with httpx.AsyncClient(**options) as client:
+        yield client
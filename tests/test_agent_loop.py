@@ -0,0 +1,142 @@
+import asyncio
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.bus.events import InboundMessage
+from nanobot.bus.queue import PRIORITY_BACKGROUND, MessageBus
+from nanobot.config.schema import BusConfig
+from nanobot.providers.base import LLMProvider, LLMResponse
+
+
+class _SlowProvider(LLMProvider):
+    def __init__(self, delay: float = 0.2):
+        super().__init__()
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        return LLMResponse(content=f"echo: {messages[-1]['content']}")
+
+    def get_default_model(self) -> str:
+        return "mock"
+
+
+async def _collect(bus: MessageBus, n: int) -> list[str]:
+    out = []
+    for _ in range(n):
+        msg = await asyncio.wait_for(bus.consume_outbound(), timeout=5)
+        out.append(f"{msg.chat_id}:{msg.content}")
+    return out
+
+
+@pytest.mark.asyncio
+async def test_sessions_run_concurrently_but_ordered(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    bus = MessageBus()
+    provider = _SlowProvider()
+    agent = AgentLoop(
+        bus=bus, provider=provider, workspace=tmp_path, model="mock", max_concurrent_sessions=2
+    )
+    task = asyncio.create_task(agent.run())
+    try:
+        for chat_id, content in [("a", "1"), ("b", "1"), ("a", "2"), ("c", "1")]:
+            await bus.publish_inbound(
+                InboundMessage(channel="web", sender_id="u", chat_id=chat_id, content=content)
+            )
+        results = await _collect(bus, 4)
+    finally:
+        agent.stop()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    assert provider.max_active == 2
+    a_msgs = [r for r in results if r.startswith("a:")]
+    assert a_msgs == ["a:echo: 1", "a:echo: 2"]
+
+
+@pytest.mark.asyncio
+async def test_tool_context_is_per_task(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    bus = MessageBus()
+    agent = AgentLoop(bus=bus, provider=_SlowProvider(0), workspace=tmp_path, model="mock")
+    message_tool = agent.tools.get("message")
+
+    async def send_as(chat_id: str) -> str:
+        message_tool.set_context("web", chat_id)
+        await asyncio.sleep(0.01)
+        return await message_tool.execute(content="hi")
+
+    results = await asyncio.gather(send_as("one"), send_as("two"))
+    assert results == ["Message sent to web:one", "Message sent to web:two"]
+
+
+@pytest.mark.asyncio
+async def test_stop_lets_in_flight_turn_finish(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    bus = MessageBus()
+    agent = AgentLoop(bus=bus, provider=_SlowProvider(0.3), workspace=tmp_path, model="mock")
+    task = asyncio.create_task(agent.run())
+    await bus.publish_inbound(InboundMessage(channel="web", sender_id="u", chat_id="a", content="1"))
+    await asyncio.sleep(0.1)
+
+    agent.stop()
+    await asyncio.wait_for(task, timeout=5)
+
+    reply = bus.outbound.get_nowait()
+    assert reply.content == "echo: 1"
+    assert agent.sessions.get_or_create("web:a").messages[-1]["content"] == "echo: 1"
+
+
+@pytest.mark.asyncio
+async def test_backlog_stays_in_bus_while_slots_are_busy(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    bus = MessageBus(BusConfig(inbound_max_size=2, overflow="reject", busy_message="busy"))
+    agent = AgentLoop(
+        bus=bus, provider=_SlowProvider(0.3), workspace=tmp_path, model="mock",
+        max_concurrent_sessions=1,
+    )
+    task = asyncio.create_task(agent.run())
+    try:
+        await bus.publish_inbound(InboundMessage(channel="web", sender_id="u", chat_id="a", content="1"))
+        await asyncio.sleep(0.1)
+        await bus.publish_inbound(InboundMessage(
+            channel="cron", sender_id="u", chat_id="job", content="bg",
+            metadata={"priority": PRIORITY_BACKGROUND},
+        ))
+        await bus.publish_inbound(InboundMessage(channel="web", sender_id="u", chat_id="b", content="1"))
+        await bus.publish_inbound(InboundMessage(channel="web", sender_id="u", chat_id="c", content="1"))
+        assert bus.inbound_size == 2
+        assert bus.stats()["inbound"]["rejected"] == 1
+
+        results = await _collect(bus, 4)
+    finally:
+        agent.stop()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    assert results == ["c:busy", "a:echo: 1", "b:echo: 1", "job:echo: bg"]
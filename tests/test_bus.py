@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+
+from nanobot.bus.events import InboundMessage
+from nanobot.bus.queue import PRIORITY_BACKGROUND, MessageBus
+from nanobot.config.schema import BusConfig
+
+
+def _msg(channel: str, chat_id: str, content: str = "", **metadata) -> InboundMessage:
+    return InboundMessage(
+        channel=channel, sender_id="u", chat_id=chat_id, content=content, metadata=metadata
+    )
+
+
+async def _drain(bus: MessageBus) -> list[str]:
+    out = []
+    while bus.inbound_size:
+        msg = await bus.consume_inbound()
+        out.append(f"{msg.channel}:{msg.content}")
+    return out
+
+
+@pytest.mark.asyncio
+async def test_priority_then_channel_fairness() -> None:
+    bus = MessageBus()
+    await bus.publish_inbound(_msg("cron", "job", "c", priority=PRIORITY_BACKGROUND))
+    await bus.publish_inbound(_msg("system", "web:a", "s"))
+    for i in range(3):
+        await bus.publish_inbound(_msg("telegram", "group", f"t{i}"))
+    await bus.publish_inbound(_msg("web", "a", "w0"))
+
+    assert await _drain(bus) == [
+        "telegram:t0", "web:w0", "telegram:t1", "telegram:t2", "system:s", "cron:c",
+    ]
+    stats = bus.stats()
+    assert stats["inbound"]["consumed"] == 6
+    assert stats["wait_s"]["samples"] == 6
+
+
+@pytest.mark.asyncio
+async def test_drop_oldest_sheds_busiest_low_priority_and_replies_busy() -> None:
+    bus = MessageBus(BusConfig(inbound_max_size=3, overflow="drop_oldest", busy_message="busy"))
+    await bus.publish_inbound(_msg("telegram", "group", "t0"))
+    await bus.publish_inbound(_msg("telegram", "group", "t1"))
+    await bus.publish_inbound(_msg("web", "a", "w0"))
+    await bus.publish_inbound(_msg("web", "b", "w1"))
+
+    assert await _drain(bus) == ["telegram:t1", "web:w0", "web:w1"]
+    reply = bus.outbound.get_nowait()
+    assert (reply.channel, reply.chat_id, reply.content) == ("telegram", "group", "busy")
+    assert bus.stats()["inbound"]["dropped"] == 1
+
+
+@pytest.mark.asyncio
+async def test_reject_and_block_policies() -> None:
+    bus = MessageBus(BusConfig(inbound_max_size=1, overflow="reject", busy_message="busy"))
+    await bus.publish_inbound(_msg("web", "a", "1"))
+    await bus.publish_inbound(_msg("web", "a", "2"))
+    assert await _drain(bus) == ["web:1"]
+    assert bus.outbound.get_nowait().content == "busy"
+    assert bus.stats()["inbound"]["rejected"] == 1
+
+    bus = MessageBus(BusConfig(inbound_max_size=1))
+    await bus.publish_inbound(_msg("web", "a", "1"))
+    blocked = asyncio.create_task(bus.publish_inbound(_msg("web", "a", "2")))
+    await asyncio.sleep(0.05)
+    assert not blocked.done()
+    assert (await bus.consume_inbound()).content == "1"
+    await asyncio.wait_for(blocked, timeout=1)
+    assert (await bus.consume_inbound()).content == "2"
+
+
+@pytest.mark.asyncio
+async def test_consume_skips_rejected_messages_until_notified() -> None:
+    bus = MessageBus()
+    await bus.publish_inbound(_msg("web", "a", "a1"))
+    await bus.publish_inbound(_msg("web", "b", "b1"))
+    await bus.publish_inbound(_msg("web", "a", "a2"))
+    busy = {"web:a"}
+
+    first = await bus.consume_inbound(accept=lambda m: m.session_key not in busy)
+    assert first.content == "b1"
+    waiting = asyncio.create_task(bus.consume_inbound(accept=lambda m: m.session_key not in busy))
+    await asyncio.sleep(0.05)
+    assert not waiting.done()
+
+    busy.clear()
+    await bus.notify_inbound()
+    assert (await asyncio.wait_for(waiting, timeout=1)).content == "a1"
+    assert (await bus.consume_inbound()).content == "a2"
+
+
+def test_unknown_overflow_policy_is_rejected_by_config() -> None:
+    with pytest.raises(ValidationError):
+        BusConfig.model_validate({"overflow": "drop_newest"})
@@ -0,0 +1,99 @@
+from pathlib import Path
+from typing import Any
+
+import pytest
+from pydantic import ValidationError
+
+from nanobot.agent.compaction import ToolResultCompactor
+from nanobot.agent.loop import AgentLoop
+from nanobot.agent.tools.base import Tool
+from nanobot.bus.queue import MessageBus
+from nanobot.config.schema import ToolCompactionConfig, ToolResultPolicy
+from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+
+
+class _BigTool(Tool):
+    name = "big"
+    description = "Returns a lot of text."
+    parameters = {"type": "object", "properties": {}}
+
+    async def execute(self, **kwargs: Any) -> str:
+        return "A" * 10_000 + "B" * 10_000
+
+
+class _ToolChainProvider(LLMProvider):
+    """Calls a tool `rounds` times, then expands the first result and stops."""
+
+    def __init__(self, rounds: int, tool: str = "big"):
+        super().__init__()
+        self.rounds = rounds
+        self.tool = tool
+        self.prompt_chars: list[int] = []
+        self.requests: list[list[dict[str, Any]]] = []
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        self.requests.append([dict(m) for m in messages])
+        self.prompt_chars.append(sum(len(str(m.get("content") or "")) for m in messages))
+        n = len(self.prompt_chars)
+        if n <= self.rounds:
+            return LLMResponse(content=None, tool_calls=[ToolCallRequest(id=f"call_{n}", name=self.tool, arguments={})])
+        if n == self.rounds + 1:
+            return LLMResponse(content=None, tool_calls=[
+                ToolCallRequest(id="expand", name="expand_result", arguments={"handle": "call_1", "limit": 50_000})
+            ])
+        return LLMResponse(content="done")
+
+    def get_default_model(self) -> str:
+        return "mock"
+
+
+def test_truncate_keeps_head_and_tail_of_older_results() -> None:
+    compactor = ToolResultCompactor(ToolCompactionConfig(
+        default=ToolResultPolicy(max_chars=100, head_chars=10, tail_chars=5), per_tool={}
+    ))
+    messages: list[dict[str, Any]] = [{"role": "user", "content": "hi"}]
+    for i in range(2):
+        messages.append({"role": "assistant", "content": "", "tool_calls": [{"id": f"c{i}"}]})
+        messages.append({"role": "tool", "tool_call_id": f"c{i}", "name": "exec", "content": "x" * 10 + "y" * 200 + "z" * 5})
+
+    saved = compactor.compact(messages)
+
+    assert messages[2]["content"] == "x" * 10 + "\n\n[... 200 characters omitted ...]\n\n" + "z" * 5
+    assert saved == 215 - len(messages[2]["content"])
+    assert len(messages[4]["content"]) == 215  # Newest round is left for the model to read
+    assert compactor.compact(messages) == 0
+
+
+@pytest.mark.asyncio
+async def test_tool_chain_prompt_grows_linearly_and_handles_expand(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    provider = _ToolChainProvider(rounds=6)
+    config = ToolCompactionConfig(per_tool={"big": ToolResultPolicy(mode="handle")})
+    agent = AgentLoop(
+        bus=MessageBus(), provider=provider, workspace=tmp_path, model="mock",
+        context_window=200_000, compaction_config=config,
+    )
+    agent.tools.register(_BigTool())
+
+    assert await agent.process_direct("go", "cli:t") == "done"
+
+    # Each round adds one full 20k result; earlier ones shrink to a ~2k preview.
+    growth = [b - a for a, b in zip(provider.prompt_chars[1:], provider.prompt_chars[2:])]
+    assert all(g < 20_000 + 2_500 for g in growth)
+    assert provider.prompt_chars[6] < 2 * 20_000 + 6 * 2_500
+
+    expanded = provider.requests[-1][-1]
+    assert expanded["tool_call_id"] == "expand"
+    assert expanded["content"] == "A" * 10_000 + "B" * 10_000
+
+
+def test_unknown_result_mode_is_rejected_by_config() -> None:
+    with pytest.raises(ValidationError):
+        ToolCompactionConfig.model_validate({"per_tool": {"exec": {"mode": "drop"}}})
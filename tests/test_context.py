@@ -0,0 +1,56 @@
+from pathlib import Path
+
+import pytest
+
+from nanobot.agent.context import ContextBuilder
+
+
+def test_system_prompt_is_served_from_cache(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    (tmp_path / "SOUL.md").write_text("be kind")
+    skill = tmp_path / "skills" / "demo" / "SKILL.md"
+    skill.parent.mkdir(parents=True)
+    skill.write_text('---\ndescription: Demo skill\nmetadata: {"nanobot": {"requires": {"bins": ["nope-xyz"]}}}\n---\nbody')
+
+    builder = ContextBuilder(tmp_path)
+    first = builder.build_system_prompt()
+    assert "be kind" in first and "Demo skill" in first and "CLI: nope-xyz" in first
+
+    calls: list[str] = []
+
+    def spy(name: str):
+        original = getattr(Path, name)
+
+        def wrapper(self: Path, *args, **kwargs):
+            calls.append(name)
+            return original(self, *args, **kwargs)
+        return wrapper
+
+    for name in ("stat", "read_text", "iterdir"):
+        monkeypatch.setattr(Path, name, spy(name))
+    monkeypatch.setattr("shutil.which", lambda *a, **k: calls.append("which"))
+
+    assert builder.build_system_prompt() == first
+    assert calls == []
+
+    # Once the check interval passes, only changed files are re-read.
+    builder.files.check_interval_s = 0
+    (tmp_path / "SOUL.md").write_text("be very kind")
+    calls.clear()
+    assert "be very kind" in builder.build_system_prompt()
+    assert calls.count("read_text") == 1
+
+
+def test_system_prompt_keeps_volatile_data_after_stable_prefix(tmp_path: Path) -> None:
+    from nanobot.providers.base import split_cache_break
+
+    builder = ContextBuilder(tmp_path)
+    builder.memory.write_long_term("likes tea")
+    builder.memory.append_today("met Bob")
+
+    stable, volatile = split_cache_break(builder.build_system_prompt())
+    assert volatile is not None
+    assert "likes tea" in stable and "met Bob" not in stable and "Current Time" not in stable
+    assert "Current Time" in volatile and "met Bob" in volatile
+
+    builder.memory.append_today("met Alice")
+    assert split_cache_break(builder.build_system_prompt())[0] == stable
@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+
+from nanobot.cron.service import CronService, _now_ms
+from nanobot.cron.types import CronJob, CronSchedule
+
+
+def _at(delay_ms: int) -> CronSchedule:
+    return CronSchedule(kind="at", at_ms=_now_ms() + delay_ms)
+
+
+@pytest.mark.asyncio
+async def test_due_jobs_run_concurrently_up_to_worker_limit(tmp_path) -> None:
+    active = 0
+    peak = 0
+    done: list[str] = []
+
+    async def on_job(job: CronJob) -> str:
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.1)
+        active -= 1
+        done.append(job.name)
+        return "ok"
+
+    service = CronService(tmp_path / "jobs.json", on_job=on_job, max_workers=3)
+    await service.start()
+    try:
+        for i in range(6):
+            service.add_job(f"job{i}", _at(30), "hi")
+        await asyncio.sleep(0.5)
+    finally:
+        service.stop()
+
+    assert sorted(done) == [f"job{i}" for i in range(6)]
+    assert peak == 3
+    assert all(not j.enabled for j in service.list_jobs(include_disabled=True))
+
+
+@pytest.mark.asyncio
+async def test_overlap_policies(tmp_path) -> None:
+    runs = {"skip": 0, "queue": 0, "allow": 0}
+
+    async def on_job(job: CronJob) -> str:
+        runs[job.name] += 1
+        await asyncio.sleep(0.25)
+        return "ok"
+
+    service = CronService(tmp_path / "jobs.json", on_job=on_job, max_workers=10)
+    await service.start()
+    try:
+        for policy in runs:
+            service.add_job(policy, CronSchedule(kind="every", every_ms=100), "hi", overlap=policy)
+        await asyncio.sleep(0.33)  # Due at 0.1, 0.2 and 0.3s; the first run lasts until 0.35s
+        snapshot = dict(runs)
+        await asyncio.sleep(0.05)
+        after_first = dict(runs)
+    finally:
+        service.stop()
+
+    assert snapshot == {"skip": 1, "queue": 1, "allow": 3}
+    # The queued run starts as soon as the first one finishes.
+    assert after_first["queue"] == 2 and after_first["skip"] == 1
+
+
+def test_heap_tracks_removed_and_disabled_jobs(tmp_path) -> None:
+    service = CronService(tmp_path / "jobs.json")
+    first = service.add_job("first", _at(1000), "hi")
+    second = service.add_job("second", _at(2000), "hi")
+    assert service.status()["next_wake_at_ms"] == first.state.next_run_at_ms
+
+    service.enable_job(first.id, enabled=False)
+    assert service.status()["next_wake_at_ms"] == second.state.next_run_at_ms
+    service.remove_job(second.id)
+    assert service.status()["next_wake_at_ms"] is None
+
+    reloaded = CronService(tmp_path / "jobs.json")
+    assert [j.name for j in reloaded.list_jobs(include_disabled=True)] == ["first"]
+
+
+def test_unknown_overlap_policy_is_rejected(tmp_path) -> None:
+    service = CronService(tmp_path / "jobs.json")
+    with pytest.raises(ValueError):
+        service.add_job("x", _at(1000), "hi", overlap="sometimes")
+
+
+@pytest.mark.asyncio
+async def test_run_state_is_coalesced_into_the_journal(tmp_path) -> None:
+    async def on_job(job: CronJob) -> str:
+        return "ok"
+
+    path = tmp_path / "jobs.json"
+    service = CronService(path, on_job=on_job, flush_interval_s=3600)
+    await service.start()
+    try:
+        job = service.add_job("tick", CronSchedule(kind="every", every_ms=10), "hi")
+        journal = path.with_name("jobs.json.journal")
+        lines_after_add = len(journal.read_text().splitlines())
+        await asyncio.sleep(0.2)  # Fires many times
+        assert len(journal.read_text().splitlines()) == lines_after_add
+        assert service.status()["unsaved"] == 1
+    finally:
+        service.stop()  # Flushes
+
+    lines = journal.read_text().splitlines()
+    assert len(lines) == lines_after_add + 1
+    reloaded = CronService(path).list_jobs()[0]
+    assert reloaded.id == job.id and reloaded.state.last_status == "ok"
+
+
+def test_journal_survives_torn_write_and_compacts(tmp_path) -> None:
+    path = tmp_path / "jobs.json"
+    service = CronService(path, compact_after=5)
+    ids = [service.add_job(f"job{i}", _at(60_000), "hi").id for i in range(3)]
+    journal = path.with_name("jobs.json.journal")
+    with open(journal, "a") as f:
+        f.write('{"seq": 99, "op": "del", "id"')  # Crash mid-append
+
+    service = CronService(path, compact_after=5)
+    assert [j.id for j in service.list_jobs()] == ids
+    service.remove_job(ids[0])  # Appends on a clean line after the torn tail is cut
+    service._flush_store()
+    assert not path.exists()  # 4 records, below the threshold
+
+    service.add_job("job3", _at(60_000), "hi")
+    service._flush_store()
+    assert path.exists() and journal.read_text() == ""
+    assert [j.name for j in CronService(path).list_jobs()] == ["job1", "job2", "job3"]
+
+
+def test_unreadable_snapshot_is_kept_aside(tmp_path) -> None:
+    path = tmp_path / "jobs.json"
+    path.write_text("{not json")
+
+    service = CronService(path)
+    assert service.list_jobs() == []
+    assert len(list(tmp_path.glob("jobs.json.corrupt-*"))) == 1
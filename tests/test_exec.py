@@ -0,0 +1,170 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from nanobot.agent.tools.shell import ExecTool, _OutputBuffer
+
+
+def test_output_buffer_keeps_head_and_tail() -> None:
+    buffer = _OutputBuffer(10)
+    for chunk in (b"abc", b"defghij", b"klmnopqrstuvwxyz"):
+        buffer.feed(chunk)
+    assert buffer.total == 26 and buffer.omitted == 16
+    assert buffer.text() == "abcde\n... (16 bytes omitted) ...\nvwxyz"
+
+    small = _OutputBuffer(10)
+    small.feed("é".encode() * 4)  # Split across head and tail
+    assert small.text() == "éééé"
+
+
+@pytest.mark.asyncio
+async def test_large_output_is_bounded(tmp_path) -> None:
+    tool = ExecTool(working_dir=str(tmp_path), max_output_chars=1000)
+    result = await tool.execute("head -c 5000000 /dev/zero | tr '\\0' x; echo; echo done")
+    assert result.startswith("x" * 500)
+    assert "bytes omitted" in result
+    assert result.rstrip().endswith("done")
+    assert len(result) < 1200
+
+
+@pytest.mark.asyncio
+async def test_runaway_output_is_killed(tmp_path) -> None:
+    tool = ExecTool(working_dir=str(tmp_path), max_output_chars=100, max_output_bytes=1_000_000)
+    start = time.monotonic()
+    result = await tool.execute("yes")
+    assert time.monotonic() - start < 5
+    assert "killed after writing more than 1000000 bytes" in result
+    assert result.startswith("y\ny\n")
+
+
+@pytest.mark.asyncio
+async def test_timeout_reports_partial_output_and_usage(tmp_path) -> None:
+    tool = ExecTool(timeout=1, working_dir=str(tmp_path))
+    result = await tool.execute("echo started; echo oops >&2; sleep 10")
+    assert result.startswith("started")
+    assert "STDERR:\noops" in result
+    assert "timed out after 1 seconds" in result
+    assert "Resource use: CPU time" in result and "peak RSS" in result
+
+
+@pytest.mark.asyncio
+async def test_exit_code_and_stderr(tmp_path) -> None:
+    tool = ExecTool(working_dir=str(tmp_path))
+    assert await tool.execute("true") == "(no output)"
+    result = await tool.execute("echo out; echo err >&2; exit 3")
+    assert result == "out\n\nSTDERR:\nerr\n\n\nExit code: 3"
+
+
+@pytest.mark.asyncio
+async def test_persistent_shell_keeps_state_per_session(tmp_path) -> None:
+    (tmp_path / "sub").mkdir()
+    tool = ExecTool(working_dir=str(tmp_path), persistent_shell=True)
+    try:
+        tool.set_context("cli:a")
+        assert await tool.execute("cd sub && export GREETING=hi") == "(no output)"
+        assert await tool.execute("pwd; echo $GREETING") == f"{tmp_path / 'sub'}\nhi\n"
+        assert await tool.execute("printf 'no newline'; false") == "no newline\n\nExit code: 1"
+        assert (await tool.execute("echo unterminated '")).startswith("STDERR:")
+        assert (await tool.execute("pwd")).strip() == str(tmp_path / "sub")
+
+        tool.set_context("cli:b")
+        assert (await tool.execute("pwd; echo ${GREETING:-unset}")).split() == [str(tmp_path), "unset"]
+    finally:
+        await tool.close_all()
+
+
+@pytest.mark.asyncio
+async def test_persistent_shell_restarts_after_timeout_and_exit(tmp_path) -> None:
+    tool = ExecTool(timeout=1, working_dir=str(tmp_path), persistent_shell=True)
+    tool.set_context("cli:a")
+    try:
+        await tool.execute("export X=1")
+        result = await tool.execute("echo partial; sleep 10")
+        assert result.startswith("partial") and "timed out" in result and "new shell" in result
+        assert (await tool.execute("echo ${X:-reset}")).strip() == "reset"
+
+        assert "ended the shell session" in await tool.execute("exit 0")
+        assert (await tool.execute("echo again")).strip() == "again"
+    finally:
+        await tool.close_all()
+
+
+@pytest.mark.asyncio
+async def test_idle_shells_are_reaped(tmp_path) -> None:
+    tool = ExecTool(working_dir=str(tmp_path), persistent_shell=True, shell_idle_s=0.1)
+    tool.set_context("cli:a")
+    await tool.execute("true")
+    process = tool._sessions["cli:a"].process
+    await asyncio.sleep(0.3)
+    assert "cli:a" not in tool._sessions and process.returncode is not None
+
+
+@pytest.mark.asyncio
+async def test_persistent_shell_is_kept_in_the_workspace(tmp_path) -> None:
+    tool = ExecTool(working_dir=str(tmp_path), persistent_shell=True, restrict_to_workspace=True)
+    tool.set_context("cli:a")
+    try:
+        assert "left the workspace" in await tool.execute("cd ..")
+        assert (await tool.execute("pwd")).strip() == str(tmp_path)
+    finally:
+        await tool.close_all()
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    with open(f"/proc/{pid}/stat") as f:
+        return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+
+
+@pytest.mark.asyncio
+async def test_timeout_kills_the_whole_process_group(tmp_path) -> None:
+    tool = ExecTool(timeout=1, working_dir=str(tmp_path))
+    result = await tool.execute("sleep 30 & echo $! > child.pid; wait")
+    assert "timed out" in result
+    await asyncio.sleep(0.1)
+    assert not _alive(int((tmp_path / "child.pid").read_text()))
+
+
+@pytest.mark.asyncio
+async def test_cancellation_kills_the_command(tmp_path) -> None:
+    tool = ExecTool(working_dir=str(tmp_path))
+    task = asyncio.create_task(tool.execute("echo $$ > shell.pid; sleep 30"))
+    await asyncio.sleep(0.3)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await asyncio.sleep(0.1)
+    assert not _alive(int((tmp_path / "shell.pid").read_text()))
+
+
+@pytest.mark.asyncio
+async def test_rlimits_apply_to_commands(tmp_path) -> None:
+    tool = ExecTool(working_dir=str(tmp_path), open_files_limit=64, cpu_limit_s=1)
+    assert (await tool.execute("ulimit -n; ulimit -t")).split() == ["64", "1"]
+    result = await tool.execute("while :; do :; done")
+    assert "Exit code" in result and "timed out" not in result
+
+
+@pytest.mark.asyncio
+async def test_rlimits_apply_to_persistent_shell(tmp_path) -> None:
+    tool = ExecTool(working_dir=str(tmp_path), persistent_shell=True, open_files_limit=64, process_limit=500)
+    tool.set_context("s1")
+    try:
+        assert (await tool.execute("ulimit -n")).strip() == "64"
+        assert (await tool.execute("ulimit -u")).strip() == "500"
+    finally:
+        await tool.close_all()
+
+
+@pytest.mark.asyncio
+async def test_shared_slots_cap_concurrent_commands(tmp_path) -> None:
+    slots = asyncio.Semaphore(2)
+    tools = [ExecTool(working_dir=str(tmp_path), slots=slots) for _ in range(2)]
+    start = time.monotonic()
+    await asyncio.gather(*(tools[i % 2].execute("sleep 0.3") for i in range(4)))
+    assert time.monotonic() - start >= 0.6
@@ -0,0 +1,123 @@
+import asyncio
+import os
+
+import pytest
+
+from nanobot.config.schema import ResponseCacheConfig
+from nanobot.heartbeat.service import HeartbeatService
+from nanobot.providers.base import LLMProvider, LLMResponse
+from nanobot.providers.cache import CachedProvider, ResponseCache, llm_cache
+
+
+class _Agent:
+    def __init__(self, reply: str = "HEARTBEAT_OK"):
+        self.reply = reply
+        self.calls = 0
+
+    async def __call__(self, prompt: str) -> str:
+        self.calls += 1
+        return self.reply
+
+
+def _service(tmp_path, agent: _Agent, **kwargs) -> HeartbeatService:
+    return HeartbeatService(
+        workspace=tmp_path,
+        on_heartbeat=agent,
+        interval_s=60,
+        max_interval_s=480,
+        state_path=tmp_path / "state.json",
+        **kwargs,
+    )
+
+
+@pytest.mark.asyncio
+async def test_unchanged_file_is_skipped_after_ok_and_backs_off(tmp_path) -> None:
+    (tmp_path / "HEARTBEAT.md").write_text("- check the build\n")
+    agent = _Agent()
+    service = _service(tmp_path, agent)
+
+    await service._tick()
+    assert agent.calls == 1 and service.current_interval_s == 60
+
+    for expected in (120, 240, 480, 480):
+        await service._tick()
+        assert service.current_interval_s == expected
+    assert agent.calls == 1
+
+    # The handled version survives a restart.
+    restarted = _service(tmp_path, agent)
+    await restarted._tick()
+    assert agent.calls == 1
+
+    # An edit is handled again and resets the interval.
+    (tmp_path / "HEARTBEAT.md").write_text("- check the build\n- water the plants\n")
+    await service._tick()
+    assert agent.calls == 2 and service.current_interval_s == 60
+
+
+@pytest.mark.asyncio
+async def test_file_is_rechecked_until_agent_says_ok(tmp_path) -> None:
+    (tmp_path / "HEARTBEAT.md").write_text("- send the report\n")
+    agent = _Agent(reply="Sent the report.")
+    service = _service(tmp_path, agent)
+
+    await service._tick()
+    await service._tick()
+    assert agent.calls == 2
+
+    agent.reply = "HEARTBEAT_OK"
+    await service._tick()
+    await service._tick()
+    assert agent.calls == 3
+
+
+class _OkProvider(LLMProvider):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7) -> LLMResponse:
+        self.calls += 1
+        return LLMResponse(content="HEARTBEAT_OK")
+
+    def get_default_model(self) -> str:
+        return "mock"
+
+
+@pytest.mark.asyncio
+async def test_recheck_is_not_answered_from_response_cache(tmp_path) -> None:
+    (tmp_path / "HEARTBEAT.md").write_text("- check the build\n")
+    inner = _OkProvider()
+    provider = CachedProvider(inner, ResponseCache(), ResponseCacheConfig(enabled=True))
+
+    async def on_heartbeat(prompt: str) -> str:
+        with llm_cache():
+            response = await provider.chat([{"role": "user", "content": prompt}])
+        return response.content
+
+    service = HeartbeatService(workspace=tmp_path, on_heartbeat=on_heartbeat, recheck_s=60)
+    await service._tick()
+    service._handled["at"] -= 60
+    await service._tick()
+    assert inner.calls == 2
+    assert service._handled["ok"]
+
+
+@pytest.mark.asyncio
+async def test_watch_triggers_tick_on_edit(tmp_path) -> None:
+    path = tmp_path / "HEARTBEAT.md"
+    path.write_text("# Tasks\n")
+    agent = _Agent()
+    service = _service(tmp_path, agent, watch=True, watch_poll_s=0.02)
+
+    await service.start()
+    try:
+        path.write_text("# Tasks\n- renew the domain\n")
+        os.utime(path, ns=(1, 1))  # Make sure the mtime changes on coarse filesystems
+        for _ in range(100):
+            if agent.calls:
+                break
+            await asyncio.sleep(0.02)
+        assert agent.calls == 1  # Well before the 60s interval
+    finally:
+        service.stop()
@@ -0,0 +1,105 @@
+from typing import Any
+
+import pytest
+from pydantic import ValidationError
+
+from nanobot.agent.history import DIGEST_KEY, HistoryWindow
+from nanobot.agent.tokens import heuristic_tokens
+from nanobot.config.schema import AgentDefaults
+from nanobot.providers.base import LLMProvider, LLMResponse
+from nanobot.session.manager import Session
+
+
+class _Summarizer(LLMProvider):
+    def __init__(self):
+        super().__init__()
+        self.requests: list[list[dict[str, Any]]] = []
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        self.requests.append(messages)
+        return LLMResponse(content=f"summary #{len(self.requests)}")
+
+    def get_default_model(self) -> str:
+        return "mock"
+
+
+def _session(n: int, size: int = 400) -> Session:
+    session = Session(key="web:1")
+    for i in range(n):
+        session.add_message("user" if i % 2 == 0 else "assistant", f"{i:04d}" + "x" * size)
+        session.messages[-1]["timestamp"] = f"2026-01-01T00:00:{i:02d}"
+    return session
+
+
+def _window(provider: LLMProvider, digest: bool = True) -> HistoryWindow:
+    return HistoryWindow(
+        provider=provider,
+        model="mock",
+        tokenizer=heuristic_tokens,
+        context_window=4000,
+        max_tokens=1000,
+        digest=digest,
+        digest_max_tokens=200,
+        safety_ratio=0,
+    )
+
+
+def test_heuristic_counts_cjk_per_character() -> None:
+    assert heuristic_tokens("abcd" * 10) == 10
+    assert heuristic_tokens("你好世界") == 4
+
+
+@pytest.mark.asyncio
+async def test_history_fills_budget_newest_first() -> None:
+    window = _window(_Summarizer(), digest=False)
+    session = _session(40)  # ~105 tokens each, far more than fits
+
+    history = await window.select(session, reserved=800)
+
+    budget = window.budget(800)
+    assert budget == 4000 - 1000 - 800
+    assert history[-1]["content"].startswith("0039")
+    assert sum(heuristic_tokens(m["content"]) + 4 for m in history) <= budget
+    assert len(history) == budget // 105
+
+
+@pytest.mark.asyncio
+async def test_overflow_is_folded_into_rolling_digest() -> None:
+    provider = _Summarizer()
+    window = _window(provider)
+    session = _session(40)
+
+    history = await window.select(session, reserved=800)
+
+    assert len(provider.requests) == 1
+    digest = session.metadata[DIGEST_KEY]
+    assert digest["summary"] == "summary #1"
+    # Only about half the budget is kept verbatim, leaving headroom for new turns.
+    assert sum(heuristic_tokens(m["content"]) + 4 for m in history) <= window.budget(800) // 2
+    assert history[0]["content"][:4] == f"{int(digest['until'][-2:]) + 1:04d}"
+
+    # A couple of new turns fit into the headroom without another summary.
+    session.add_message("user", "short")
+    assert (await window.select(session, reserved=800))[-1]["content"] == "short"
+    assert len(provider.requests) == 1
+
+    # Once it overflows again, the previous summary is merged into the new one.
+    for i in range(40, 60):
+        session.add_message("user", f"{i:04d}" + "x" * 400)
+        session.messages[-1]["timestamp"] = f"2026-01-01T00:01:{i:02d}"
+    await window.select(session, reserved=800)
+    assert len(provider.requests) == 2
+    assert "summary #1" in provider.requests[1][1]["content"]
+    assert session.metadata[DIGEST_KEY]["summary"] == "summary #2"
+
+
+def test_unknown_tokenizer_is_rejected_by_config() -> None:
+    with pytest.raises(ValidationError):
+        AgentDefaults.model_validate({"tokenizer": "sentencepiece"})
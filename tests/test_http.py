@@ -0,0 +1,69 @@
+import asyncio
+
+import httpx
+import pytest
+
+from nanobot.config.schema import HttpPoolConfig
+from nanobot.utils.http import HttpClientPool, http_client
+
+
+class _ChunkedStream(httpx.AsyncByteStream):
+    async def __aiter__(self):
+        yield b"o"
+        yield b"k"
+
+
+class _CountingHandler:
+    def __init__(self) -> None:
+        self.active = 0
+        self.peak = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.05)
+        self.active -= 1
+        return httpx.Response(200, text="ok")
+
+
+@pytest.mark.asyncio
+async def test_pool_reuses_client_and_limits_per_host() -> None:
+    handler = _CountingHandler()
+    pool = HttpClientPool(
+        HttpPoolConfig(max_connections_per_host=2), transport=httpx.MockTransport(handler)
+    )
+
+    client = pool.client()
+    assert pool.client() is client
+
+    responses = await asyncio.wait_for(
+        asyncio.gather(*(client.get("http://example.com/") for _ in range(5))), timeout=5
+    )
+    assert all(r.text == "ok" for r in responses)
+    assert handler.peak == 2
+
+    await pool.aclose()
+    assert client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_streamed_response_releases_slot_on_close() -> None:
+    pool = HttpClientPool(
+        HttpPoolConfig(max_connections_per_host=1),
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, stream=_ChunkedStream())),
+    )
+    client = pool.client()
+
+    for _ in range(3):
+        async with client.stream("GET", "http://example.com/") as resp:
+            assert await resp.aread() == b"ok"
+    r = await asyncio.wait_for(client.get("http://example.com/"), timeout=5)
+    assert r.text == "ok"
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_http_client_without_pool_uses_one_off_client() -> None:
+    async with http_client(None) as client:
+        assert isinstance(client, httpx.AsyncClient)
+    assert client.is_closed
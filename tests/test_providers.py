@@ -0,0 +1,93 @@
+from typing import Any
+
+import pytest
+
+import nanobot.providers.litellm_provider as litellm_provider
+from nanobot.providers.litellm_provider import LiteLLMProvider
+
+
+def _chunk(content: str | None = None, tool_call: dict[str, Any] | None = None,
+           finish_reason: str | None = None) -> dict[str, Any]:
+    delta: dict[str, Any] = {}
+    if content is not None:
+        delta["content"] = content
+    if tool_call is not None:
+        delta["tool_calls"] = [tool_call]
+    return {"choices": [{"delta": delta, "finish_reason": finish_reason}]}
+
+
+@pytest.mark.asyncio
+async def test_chat_stream_yields_deltas_and_assembles_tool_calls(monkeypatch: pytest.MonkeyPatch) -> None:
+    chunks = [
+        _chunk("Let me "),
+        _chunk("check."),
+        _chunk(tool_call={"index": 0, "id": "call_1", "function": {"name": "read_file", "arguments": '{"pa'}}),
+        _chunk(tool_call={"index": 0, "function": {"arguments": 'th": "a.txt"}'}}),
+        _chunk(finish_reason="tool_calls"),
+        {"choices": [], "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}},
+    ]
+
+    async def fake_acompletion(**kwargs: Any) -> Any:
+        assert kwargs["stream"] is True
+
+        async def gen():
+            for c in chunks:
+                yield c
+        return gen()
+
+    monkeypatch.setattr(litellm_provider, "acompletion", fake_acompletion)
+    provider = LiteLLMProvider(default_model="openai/gpt-4o")
+
+    deltas = []
+    final = None
+    async for chunk in provider.chat_stream(messages=[{"role": "user", "content": "hi"}]):
+        if chunk.content:
+            deltas.append(chunk.content)
+        if chunk.done:
+            final = chunk.response
+
+    assert deltas == ["Let me ", "check."]
+    assert final is not None
+    assert final.content == "Let me check."
+    assert final.finish_reason == "tool_calls"
+    assert final.usage["total_tokens"] == 15
+    assert len(final.tool_calls) == 1
+    assert final.tool_calls[0].name == "read_file"
+    assert final.tool_calls[0].arguments == {"path": "a.txt"}
+
+
+
+@pytest.mark.asyncio
+async def test_chat_marks_system_prefix_for_prompt_caching(monkeypatch: pytest.MonkeyPatch) -> None:
+    from types import SimpleNamespace
+
+    from nanobot.providers.base import PROMPT_CACHE_BREAK
+
+    sent: list[dict[str, Any]] = []
+
+    async def fake_acompletion(**kwargs: Any) -> Any:
+        sent.append(kwargs)
+        usage = SimpleNamespace(
+            prompt_tokens=100, completion_tokens=5, total_tokens=105,
+            prompt_tokens_details=None, cache_read_input_tokens=90, cache_creation_input_tokens=0,
+        )
+        message = SimpleNamespace(content="ok", tool_calls=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")], usage=usage)
+
+    monkeypatch.setattr(litellm_provider, "acompletion", fake_acompletion)
+    messages = [
+        {"role": "system", "content": f"stable{PROMPT_CACHE_BREAK}volatile"},
+        {"role": "user", "content": "hi"},
+    ]
+
+    response = await LiteLLMProvider(default_model="anthropic/claude-sonnet-4-5").chat(messages)
+    assert sent[0]["messages"][0]["content"] == [
+        {"type": "text", "text": "stable", "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": "volatile"},
+    ]
+    assert response.usage["cached_tokens"] == 90
+    assert "cache_creation_tokens" not in response.usage
+
+    await LiteLLMProvider(default_model="openai/gpt-4o").chat(messages)
+    assert sent[1]["messages"][0]["content"] == "stable\n\n---\n\nvolatile"
+    assert messages[0]["content"] == f"stable{PROMPT_CACHE_BREAK}volatile"
@@ -0,0 +1,188 @@
+import asyncio
+from typing import Any
+
+import httpx
+import litellm
+import pytest
+
+import nanobot.providers.litellm_provider as litellm_provider
+from nanobot.config.schema import RateLimitConfig, ResilienceConfig
+from nanobot.providers.base import LLMError, LLMProvider, LLMResponse
+from nanobot.providers.litellm_provider import LiteLLMProvider
+from nanobot.providers.resilient import ResilientProvider
+from nanobot.providers.scheduler import RateLimitedProvider, RateLimiter
+
+
+class _ScriptedProvider(LLMProvider):
+    """Plays back a list of outcomes: LLMError to fail, a float to be slow, str to answer."""
+
+    def __init__(self, model: str, script: list[Any], default: Any = "ok"):
+        super().__init__()
+        self.model = model
+        self.script = list(script)
+        self.default = default
+        self.calls = 0
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        assert model == self.model
+        self.calls += 1
+        outcome = self.script.pop(0) if self.script else self.default
+        if isinstance(outcome, float):
+            await asyncio.sleep(outcome)
+            outcome = f"{self.model} (slow)"
+        if isinstance(outcome, LLMError):
+            return LLMResponse(content=f"Error calling LLM: {outcome.kind}", finish_reason="error", error=outcome)
+        return LLMResponse(content=f"{outcome} from {self.model}")
+
+    def get_default_model(self) -> str:
+        return self.model
+
+
+def _config(**overrides: Any) -> ResilienceConfig:
+    values = {"base_delay_s": 0.001, "max_delay_s": 0.01, "timeout_s": 5.0, **overrides}
+    return ResilienceConfig(**values)
+
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+@pytest.mark.asyncio
+async def test_retries_rate_limit_honoring_retry_after() -> None:
+    primary = _ScriptedProvider("a", [LLMError("rate_limit", retry_after=0.05), LLMError("server")])
+    provider = ResilientProvider(primary, config=_config())
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    response = await provider.chat(MESSAGES)
+
+    assert response.content == "ok from a"
+    assert primary.calls == 3
+    assert loop.time() - start >= 0.05
+    assert provider.stats()["retries"] == 2
+
+
+@pytest.mark.asyncio
+async def test_fails_over_and_opens_circuit() -> None:
+    primary = _ScriptedProvider("a", [], default=LLMError("server", status_code=503))
+    backup = _ScriptedProvider("b", [])
+    provider = ResilientProvider(
+        primary, [(backup, "b")], _config(max_retries=1, breaker_failures=4, breaker_cooldown_s=0.1)
+    )
+
+    assert (await provider.chat(MESSAGES)).content == "ok from b"
+    assert (await provider.chat(MESSAGES)).content == "ok from b"
+    assert primary.calls == 4
+    assert provider.stats()["circuits"]["a"]["state"] == "open"
+
+    # While the circuit is open the primary is skipped entirely.
+    assert (await provider.chat(MESSAGES)).content == "ok from b"
+    assert primary.calls == 4
+
+    # After the cooldown one trial call goes through and closes the circuit.
+    primary.default = "ok"
+    await asyncio.sleep(0.1)
+    assert (await provider.chat(MESSAGES)).content == "ok from a"
+    assert provider.stats()["circuits"]["a"]["state"] == "closed"
+
+
+@pytest.mark.asyncio
+async def test_bad_request_is_returned_without_retry_or_failover() -> None:
+    primary = _ScriptedProvider("a", [LLMError("context_length", status_code=400)])
+    backup = _ScriptedProvider("b", [])
+    provider = ResilientProvider(primary, [(backup, "b")], _config())
+
+    response = await provider.chat(MESSAGES)
+
+    assert response.finish_reason == "error"
+    assert primary.calls == 1 and backup.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_hedges_slow_primary() -> None:
+    primary = _ScriptedProvider("a", [1.0])
+    backup = _ScriptedProvider("b", [])
+    provider = ResilientProvider(primary, [(backup, "b")], _config(hedge_after_s=0.05))
+
+    response = await asyncio.wait_for(provider.chat(MESSAGES), timeout=0.5)
+
+    assert response.content == "ok from b"
+    assert provider.stats()["hedges"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_trial_call_does_not_disable_model() -> None:
+    primary = _ScriptedProvider("a", [LLMError("server"), 1.0])
+    backup = _ScriptedProvider("b", [])
+    provider = ResilientProvider(
+        primary,
+        [(backup, "b")],
+        _config(max_retries=0, breaker_failures=1, breaker_cooldown_s=0.05, hedge_after_s=0.05),
+    )
+    assert (await provider.chat(MESSAGES)).content == "ok from b"
+    assert provider.stats()["circuits"]["a"]["state"] == "open"
+    await asyncio.sleep(0.05)
+
+    # The half-open trial call is slow, so the hedge wins and cancels it.
+    assert (await provider.chat(MESSAGES)).content == "ok from b"
+    assert primary.calls == 2
+    await asyncio.sleep(0.01)  # Let the cancellation land
+
+    assert (await provider.chat(MESSAGES)).content == "ok from a"
+    assert provider.stats()["circuits"]["a"]["state"] == "closed"
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_queue_wait_is_not_a_timeout() -> None:
+    # 600 rpm = one request every 0.1s once the burst is spent.
+    limiter = RateLimiter({"a": RateLimitConfig(rpm=600)})
+    limiter._state("a").requests.level = 0
+    primary = _ScriptedProvider("a", [])
+    backup = _ScriptedProvider("b", [])
+    provider = ResilientProvider(
+        RateLimitedProvider(primary, limiter),
+        [(backup, "b")],
+        _config(timeout_s=0.05, hedge_after_s=0.05, breaker_failures=1),
+    )
+
+    responses = await asyncio.gather(*(provider.chat(MESSAGES) for _ in range(5)))
+
+    assert [r.content for r in responses] == ["ok from a"] * 5
+    assert primary.calls == 5 and backup.calls == 0
+    stats = provider.stats()
+    assert stats["hedges"] == 0 and stats["retries"] == 0
+    assert stats["circuits"]["a"]["state"] == "closed"
+    assert limiter.stats()["a"]["requests"] == 5
+
+
+@pytest.mark.asyncio
+async def test_stream_fails_over_before_first_delta() -> None:
+    primary = _ScriptedProvider("a", [], default=LLMError("auth", status_code=401))
+    backup = _ScriptedProvider("b", [])
+    provider = ResilientProvider(primary, [(backup, "b")], _config())
+
+    chunks = [c async for c in provider.chat_stream(MESSAGES)]
+
+    assert primary.calls == 1
+    assert chunks[-1].response is not None and chunks[-1].response.content == "ok from b"
+
+
+@pytest.mark.asyncio
+async def test_litellm_errors_are_classified(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def fake_acompletion(**kwargs: Any) -> Any:
+        response = httpx.Response(429, headers={"Retry-After": "7"}, request=httpx.Request("POST", "http://x"))
+        raise litellm.RateLimitError("slow down", "openai", "gpt-4o", response=response)
+
+    monkeypatch.setattr(litellm_provider, "acompletion", fake_acompletion)
+    response = await LiteLLMProvider(default_model="openai/gpt-4o").chat(MESSAGES)
+
+    assert response.finish_reason == "error"
+    assert response.error is not None
+    assert response.error.kind == "rate_limit"
+    assert response.error.retry_after == 7.0
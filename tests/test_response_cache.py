@@ -0,0 +1,183 @@
+import os
+from typing import Any
+
+import pytest
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.bus.queue import MessageBus
+from nanobot.config.schema import ResponseCacheConfig
+from nanobot.providers.base import PROMPT_CACHE_BREAK, LLMProvider, LLMResponse, ToolCallRequest
+from nanobot.providers.cache import (
+    CachedProvider,
+    ResponseCache,
+    cache_key,
+    llm_cache,
+    llm_cache_bypass,
+)
+
+
+class _Counting(LLMProvider):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        self.calls += 1
+        return LLMResponse(
+            content=f"answer {self.calls}",
+            tool_calls=[ToolCallRequest(id="t1", name="read_file", arguments={"path": "a"})],
+            usage={"total_tokens": 42},
+        )
+
+    def get_default_model(self) -> str:
+        return "mock"
+
+
+MESSAGES = [{"role": "user", "content": "HEARTBEAT"}]
+
+
+@pytest.mark.asyncio
+async def test_only_opted_in_calls_are_cached(tmp_path) -> None:
+    inner = _Counting()
+    provider = CachedProvider(inner, ResponseCache(tmp_path), ResponseCacheConfig(enabled=True))
+
+    await provider.chat(MESSAGES)
+    await provider.chat(MESSAGES)
+    assert inner.calls == 2  # temperature 0.7, not opted in
+
+    with llm_cache():
+        first = await provider.chat(MESSAGES)
+        second = await provider.chat(MESSAGES)
+    assert inner.calls == 3
+    assert second.content == first.content == "answer 3"
+    assert second.tool_calls[0].arguments == {"path": "a"}
+    assert second.usage == {} and first.usage == {"total_tokens": 42}
+
+    await provider.chat(MESSAGES, temperature=0)
+    await provider.chat(MESSAGES, temperature=0)
+    assert inner.calls == 4
+
+    stats = provider.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 2 and stats["stores"] == 2
+
+
+@pytest.mark.asyncio
+async def test_stream_replays_cached_response(tmp_path) -> None:
+    inner = _Counting()
+    provider = CachedProvider(inner, ResponseCache(tmp_path), ResponseCacheConfig(replay=True))
+
+    for _ in range(2):
+        chunks = [c async for c in provider.chat_stream(MESSAGES)]
+        assert "".join(c.content for c in chunks) == "answer 1"
+        assert chunks[-1].response.tool_calls[0].name == "read_file"
+    assert inner.calls == 1
+
+
+def test_disk_level_survives_restart_and_expires(tmp_path) -> None:
+    key = cache_key("mock", MESSAGES, None, 0, 100)
+    ResponseCache(tmp_path).put(key, LLMResponse(content="stored"))
+
+    cache = ResponseCache(tmp_path)
+    assert cache.get(key).content == "stored"
+    assert cache.stats()["disk_hits"] == 1
+
+    expired = ResponseCache(tmp_path, ttl_s=-1)
+    expired.put(key, LLMResponse(content="stale"))
+    assert ResponseCache(tmp_path).get(key) is None
+    assert not (tmp_path / f"{key}.json").exists()
+
+
+def test_disk_evicts_oldest_entries_over_budget(tmp_path) -> None:
+    cache = ResponseCache(tmp_path, max_entries=1, max_disk_bytes=1000)
+    for i in range(10):
+        cache.put(f"k{i}", LLMResponse(content="x" * 200))
+
+    stats = cache.stats()
+    assert stats["disk_bytes"] <= 1000
+    assert stats["evictions"] == 10 - stats["disk_entries"]
+    assert stats["memory_entries"] == 1
+    assert cache.get("k9").content == "x" * 200
+    assert cache.get("k0") is None
+
+
+def test_errors_are_not_cached(tmp_path) -> None:
+    cache = ResponseCache(tmp_path)
+    cache.put("k", LLMResponse(content="Error", finish_reason="error"))
+    assert cache.get("k") is None
+    assert not os.listdir(tmp_path)
+
+
+def _with_time(now: str) -> list[dict[str, Any]]:
+    return [
+        {"role": "system", "content": f"identity{PROMPT_CACHE_BREAK}time {now}"},
+        {"role": "user", "content": "HEARTBEAT"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_volatile_prompt_tail_is_keyed_unless_opted_out() -> None:
+    inner = _Counting()
+    provider = CachedProvider(inner, ResponseCache(), ResponseCacheConfig(enabled=True))
+    with llm_cache():
+        await provider.chat(_with_time("10:00"))
+        await provider.chat(_with_time("10:01"))
+    assert inner.calls == 2
+
+    provider.config = ResponseCacheConfig(enabled=True, background_ignore_volatile=True)
+    with llm_cache():
+        await provider.chat(_with_time("10:00"))
+        await provider.chat(_with_time("10:01"))
+    assert inner.calls == 3
+
+    # Only background calls ignore the tail.
+    await provider.chat(_with_time("10:02"), temperature=0)
+    await provider.chat(_with_time("10:03"), temperature=0)
+    assert inner.calls == 5
+
+
+@pytest.mark.asyncio
+async def test_bypass_skips_lookup_and_refreshes_entry() -> None:
+    inner = _Counting()
+    provider = CachedProvider(inner, ResponseCache(), ResponseCacheConfig(enabled=True))
+    with llm_cache():
+        await provider.chat(MESSAGES)
+        with llm_cache_bypass():
+            fresh = await provider.chat(MESSAGES)
+        cached = await provider.chat(MESSAGES)
+    assert inner.calls == 2
+    assert fresh.content == cached.content == "answer 2"
+
+
+class _Echo(_Counting):
+    async def chat(self, *args: Any, **kwargs: Any) -> LLMResponse:
+        self.calls += 1
+        return LLMResponse(content=f"done {self.calls}")
+
+
+@pytest.mark.asyncio
+async def test_stateless_cron_runs_hit_through_agent_loop(monkeypatch, tmp_path) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    inner = _Echo()
+    provider = CachedProvider(
+        inner, ResponseCache(), ResponseCacheConfig(enabled=True, background_ignore_volatile=True)
+    )
+    agent = AgentLoop(bus=MessageBus(), provider=provider, workspace=tmp_path, model="mock")
+
+    async def run(key: str, with_history: bool) -> str:
+        with llm_cache():
+            return await agent.process_direct(f"check the {key} feeds", session_key=key, with_history=with_history)
+
+    # With history, the second run's request includes the first run's turn.
+    assert [await run("cron:a", True), await run("cron:a", True)] == ["done 1", "done 2"]
+
+    assert [await run("cron:b", False), await run("cron:b", False)] == ["done 3", "done 3"]
+    assert inner.calls == 3
+    assert provider.stats()["hits"] == 1
+    assert len(agent.sessions.get_or_create("cron:b").messages) == 4
@@ -0,0 +1,100 @@
+import asyncio
+from typing import Any
+
+import pytest
+
+from nanobot.bus.queue import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+from nanobot.config.schema import RateLimitConfig
+from nanobot.providers.base import LLMProvider, LLMResponse
+from nanobot.providers.scheduler import RateLimitedProvider, RateLimiter, llm_priority
+
+
+class _Echo(LLMProvider):
+    def __init__(self, usage: int = 0):
+        super().__init__()
+        self.usage = usage
+        self.calls: list[str] = []
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        self.calls.append(messages[-1]["content"])
+        usage = {"total_tokens": self.usage} if self.usage else {}
+        return LLMResponse(content="ok", usage=usage)
+
+    def get_default_model(self) -> str:
+        return "openai/gpt-test"
+
+
+@pytest.mark.asyncio
+async def test_interactive_calls_jump_the_queue() -> None:
+    # 600 rpm = one request every 0.1s once the burst of 600 is spent.
+    limiter = RateLimiter({"gpt-test": RateLimitConfig(rpm=600)})
+    state = limiter._state("openai/gpt-test")
+    state.requests.level = 0
+    provider = RateLimitedProvider(_Echo(), limiter)
+
+    async def call(text: str, priority: int) -> None:
+        with llm_priority(priority):
+            await provider.chat([{"role": "user", "content": text}])
+
+    tasks = [asyncio.create_task(call(f"bg{i}", PRIORITY_BACKGROUND)) for i in range(3)]
+    await asyncio.sleep(0.01)
+    tasks.append(asyncio.create_task(call("user", PRIORITY_INTERACTIVE)))
+    await asyncio.sleep(0.01)
+    assert limiter.stats()["openai/gpt-test"]["waiting"] == {
+        "interactive": 1, "system": 0, "background": 3,
+    }
+    await asyncio.gather(*tasks)
+
+    assert provider.provider.calls == ["user", "bg0", "bg1", "bg2"]
+    stats = limiter.stats()["openai/gpt-test"]
+    assert stats["requests"] == 4 and stats["throttled"] == 4 and stats["depth"] == 0
+    assert stats["wait_s"]["samples"] == 4
+    assert 0.3 <= stats["wait_s"]["max"] < 1.0
+
+
+@pytest.mark.asyncio
+async def test_token_reservations_are_settled_with_actual_usage() -> None:
+    limiter = RateLimiter({"*": RateLimitConfig(tpm=6000)})
+    provider = RateLimitedProvider(_Echo(usage=100), limiter)
+
+    await provider.chat([{"role": "user", "content": "hi"}], max_tokens=1000)
+
+    bucket = limiter._models["openai/gpt-test"].tokens
+    # Reserved ~1000 tokens, refunded all but the 100 actually used.
+    assert 5890 <= bucket.level <= 5900
+    stats = limiter.stats()["openai/gpt-test"]
+    assert stats["tokens_used"] == 100 and stats["tokens_reserved"] > 1000
+    assert stats["throttled"] == 0
+
+
+@pytest.mark.asyncio
+async def test_unlimited_models_are_not_queued() -> None:
+    limiter = RateLimiter({"other-model": RateLimitConfig(rpm=1)})
+    provider = RateLimitedProvider(_Echo(), limiter)
+
+    for _ in range(3):
+        await provider.chat([{"role": "user", "content": "hi"}])
+
+    assert limiter.stats() == {}
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_queue() -> None:
+    limiter = RateLimiter({"gpt-test": RateLimitConfig(rpm=60)})
+    limiter._state("gpt-test").requests.level = 0
+
+    waiter = asyncio.create_task(limiter.acquire("gpt-test", 10))
+    await asyncio.sleep(0.01)
+    assert limiter.stats()["gpt-test"]["depth"] == 1
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert limiter.stats()["gpt-test"]["depth"] == 0
@@ -0,0 +1,218 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+from pydantic import ValidationError
+
+from nanobot.config.schema import SessionsConfig
+from nanobot.session.manager import DIGEST_KEY, SessionManager
+from nanobot.session.sqlite_store import SqliteSessionStore
+from nanobot.session.store import migrate_sessions
+
+
+@pytest.fixture
+def manager(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> SessionManager:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    return SessionManager(tmp_path, SessionsConfig(fsync="never", compact_min_dead=1))
+
+
+def _lines(path: Path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+
+
+def test_save_appends_only_new_messages(manager: SessionManager) -> None:
+    session = manager.get_or_create("web:a")
+    for i in range(500):
+        session.add_message("user", f"message {i}")
+    manager.save(session)
+    path = manager.store._get_session_path("web:a")
+    size = path.stat().st_size
+
+    session.add_message("assistant", "reply")
+    manager.save(session)
+
+    assert path.stat().st_size - size < 200
+    assert _lines(path)[-1]["content"] == "reply"
+    assert manager.store._get_meta_path("web:a").exists()
+
+
+def test_clear_marker_and_compaction(manager: SessionManager) -> None:
+    session = manager.get_or_create("web:a")
+    session.add_message("user", "old")
+    session.metadata["topic"] = "x"
+    manager.save(session)
+    session.clear()
+    session.add_message("user", "new")
+    manager.save(session)
+
+    reloaded = manager.get_or_create("web:a", refresh=True)
+    assert [m["content"] for m in reloaded.messages] == ["new"]
+    assert reloaded.metadata == {"topic": "x"}
+
+    assert manager.compact_pending() == 1
+    assert [r["content"] for r in _lines(manager.store._get_session_path("web:a"))] == ["new"]
+
+
+def test_clear_drops_history_digest(manager: SessionManager) -> None:
+    session = manager.get_or_create("web:a")
+    session.add_message("user", "old")
+    session.metadata[DIGEST_KEY] = {"summary": "the old conversation", "until": "x"}
+    session.metadata["topic"] = "x"
+    manager.save(session)
+
+    session.clear()
+    manager.save(session)
+
+    reloaded = manager.get_or_create("web:a", refresh=True)
+    assert DIGEST_KEY not in reloaded.metadata
+    assert reloaded.metadata == {"topic": "x"}
+
+
+def test_interval_fsync_is_per_file_and_deferred_writes_are_flushed(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    manager = SessionManager(tmp_path, SessionsConfig(fsync="interval", fsync_interval_s=60))
+    synced: list[str] = []
+    real_fsync = os.fsync
+
+    def fsync(fd: int) -> None:
+        synced.append(Path(os.readlink(f"/proc/self/fd/{fd}")).name)
+        real_fsync(fd)
+
+    monkeypatch.setattr(os, "fsync", fsync)
+    session = manager.get_or_create("web:a")
+    for text in ("one", "two"):
+        session.add_message("user", text)
+        manager.save(session)
+
+    # The second append is within the interval; its sidecar is still synced before the replace.
+    assert synced == ["web_a.jsonl", "web_a.meta.tmp", "web_a.meta.tmp"]
+    assert manager.flush() == 1
+    assert synced[-1] == "web_a.jsonl"
+    assert manager.flush() == 0
+
+
+def test_legacy_file_and_torn_line(manager: SessionManager) -> None:
+    path = manager.store._get_session_path("telegram:1")
+    path.write_text(
+        json.dumps({"_type": "metadata", "created_at": "2025-01-01T00:00:00", "metadata": {"a": 1}}) + "\n"
+        + json.dumps({"role": "user", "content": "hi"}) + "\n"
+        + '{"role": "assistant", "cont'
+    )
+
+    session = manager.get_or_create("telegram:1")
+    assert [m["content"] for m in session.messages] == ["hi"]
+    assert session.metadata == {"a": 1}
+    assert manager.list_sessions()[0]["key"] == "telegram:1"
+
+    manager.store.compact("telegram:1")
+    assert _lines(path) == [{"role": "user", "content": "hi"}]
+
+    session.add_message("assistant", "after crash")
+    manager.save(session)
+    assert [r["content"] for r in _lines(path)] == ["hi", "after crash"]
+
+
+def test_tail_window_and_paging(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    manager = SessionManager(tmp_path, SessionsConfig(fsync="never", resident_messages=10))
+    session = manager.get_or_create("web:a")
+    for i in range(25):
+        session.add_message("user", f"m{i}")
+    manager.save(session)
+    assert [m["content"] for m in session.messages] == [f"m{i}" for i in range(15, 25)]
+
+    loaded = SessionManager(tmp_path, manager.config).get_or_create("web:a")
+    assert [m["content"] for m in loaded.messages] == [f"m{i}" for i in range(15, 25)]
+    assert manager.load_older(session, 12) == 12
+    assert manager.load_older(session, 12) == 3
+    assert [m["content"] for m in session.messages] == [f"m{i}" for i in range(25)]
+    assert manager.load_older(session, 1) == 0
+
+
+def test_cache_is_lru_bounded(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    manager = SessionManager(tmp_path, SessionsConfig(fsync="never", cache_max_sessions=2))
+    for key in ("web:a", "web:b"):
+        session = manager.get_or_create(key)
+        session.add_message("user", key)
+        manager.save(session)
+    manager.get_or_create("web:a")
+    manager.get_or_create("web:c")
+
+    assert list(manager._cache) == ["web:a", "web:c"]
+    assert manager.get_or_create("web:b").messages[0]["content"] == "web:b"
+
+
+def test_subscribers_see_appends_and_clears(manager: SessionManager) -> None:
+    changes = []
+    manager.subscribe(changes.append)
+    session = manager.get_or_create("web:a")
+    session.add_message("user", "hi")
+    manager.save(session)
+    manager.save(session)
+    session.clear()
+    manager.save(session)
+    manager.delete("web:a")
+
+    assert [(c.key, [m["content"] for m in c.messages], c.cleared) for c in changes] == [
+        ("web:a", ["hi"], False),
+        ("web:a", [], True),
+        ("web:a", [], True),
+    ]
+
+
+def test_sqlite_backend(tmp_path: Path) -> None:
+    config = SessionsConfig(backend="sqlite", sqlite_path=str(tmp_path / "s.db"), resident_messages=5)
+    manager = SessionManager(tmp_path, config)
+    for key in ("web:a_b", "telegram:1", "web:c"):
+        session = manager.get_or_create(key)
+        for i in range(8):
+            session.add_message("user", f"{key} {i}")
+        manager.save(session)
+    session = manager.get_or_create("web:c")
+    session.clear()
+    session.add_message("user", "fresh")
+    manager.save(session)
+    manager.close()
+
+    manager = SessionManager(tmp_path, config)
+    assert [s["key"] for s in manager.list_sessions(limit=2)] == ["web:c", "telegram:1"]
+    assert [s["key"] for s in manager.list_sessions(limit=2, offset=2)] == ["web:a_b"]
+    assert [m["content"] for m in manager.get_or_create("web:c").messages] == ["fresh"]
+    session = manager.get_or_create("web:a_b")
+    assert len(session.messages) == 5
+    assert manager.load_older(session, 10) == 3
+    assert session.messages[0]["content"] == "web:a_b 0"
+    manager.close()
+
+
+def test_migrate_jsonl_to_sqlite(manager: SessionManager, tmp_path: Path) -> None:
+    legacy = manager.store._get_session_path("telegram:1")
+    legacy.write_text(
+        json.dumps({"_type": "metadata", "updated_at": "2025-01-01T00:00:00", "metadata": {"a": 1}}) + "\n"
+        + json.dumps({"role": "user", "content": "old"}) + "\n"
+    )
+    session = manager.get_or_create("web:a_b")
+    session.add_message("user", "gone")
+    manager.save(session)
+    session.clear()
+    session.add_message("user", "kept")
+    manager.save(session)
+
+    dst = SqliteSessionStore(tmp_path / "s.db")
+    assert migrate_sessions(manager.store, dst, batch_size=1) == 2
+    assert migrate_sessions(manager.store, dst) == 2  # Re-running replaces, never duplicates
+    assert dst.read_tail("web:a_b", 0, 10) == ([session.messages[0]], False)
+    assert dst.read_tail("telegram:1", 0, 10) == ([{"role": "user", "content": "old"}], False)
+    assert dst.read_meta("telegram:1")["metadata"] == {"a": 1}
+    dst.close()
+
+
+def test_unknown_backend_and_fsync_policy_are_rejected_by_config() -> None:
+    with pytest.raises(ValidationError):
+        SessionsConfig.model_validate({"backend": "redis"})
+    with pytest.raises(ValidationError):
+        SessionsConfig.model_validate({"fsync": "sometimes"})
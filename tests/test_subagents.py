@@ -0,0 +1,220 @@
+import asyncio
+import json
+from typing import Any
+
+import pytest
+
+from nanobot.agent.subagent import SubagentManager
+from nanobot.agent.tools.subagents import SubagentsTool
+from nanobot.bus.events import SubagentProgress
+from nanobot.bus.queue import MessageBus
+from nanobot.config.schema import SubagentsConfig
+from nanobot.providers.base import LLMProvider, LLMResponse
+
+
+class _Slow(LLMProvider):
+    def __init__(self, delay: float = 0.1):
+        super().__init__()
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        return LLMResponse(content="done")
+
+    def get_default_model(self) -> str:
+        return "mock"
+
+
+def _manager(tmp_path, provider: LLMProvider, **config: Any) -> SubagentManager:
+    return SubagentManager(
+        provider=provider,
+        workspace=tmp_path,
+        bus=MessageBus(),
+        config=SubagentsConfig(**config),
+        state_dir=tmp_path / "state",
+    )
+
+
+async def _drain(manager: SubagentManager) -> None:
+    for _ in range(200):
+        if not manager.get_running_count() and not manager.status()["queued"]:
+            return
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_global_and_per_origin_caps(tmp_path) -> None:
+    provider = _Slow()
+    manager = _manager(tmp_path, provider, max_concurrent=3, max_per_origin=2)
+
+    replies = [await manager.spawn("task", origin_chat_id="a") for _ in range(3)]
+    replies += [await manager.spawn("task", origin_chat_id="b") for _ in range(2)]
+    assert ["started" in r for r in replies] == [True, True, False, True, False]
+
+    status = manager.status()
+    assert status["running"] == 3 and status["queued"] == 2
+    await _drain(manager)
+
+    assert provider.peak == 3
+    assert all(r.status == "done" for r in manager.list_runs())
+    assert manager.bus.inbound_size == 5  # One announcement each
+
+
+@pytest.mark.asyncio
+async def test_full_queue_refuses_spawn(tmp_path) -> None:
+    manager = _manager(tmp_path, _Slow(), max_concurrent=1, max_queued=1)
+    await manager.spawn("first")
+    await manager.spawn("second")
+    assert (await manager.spawn("third")).startswith("Error")
+    await _drain(manager)
+
+
+@pytest.mark.asyncio
+async def test_cancel_through_tool_is_scoped_to_origin(tmp_path) -> None:
+    manager = _manager(tmp_path, _Slow(delay=5), max_concurrent=1)
+    await manager.spawn("running", origin_chat_id="a")
+    await manager.spawn("queued", origin_chat_id="a")
+    running, queued = sorted(manager.list_runs(), key=lambda r: r.created_at)
+
+    tool = SubagentsTool(manager)
+    tool.set_context("cli", "b")
+    assert (await tool.execute("cancel", task_id=running.id)).startswith("Error")
+    assert await tool.execute("list") == "No subagents in this session."
+
+    tool.set_context("cli", "a")
+    assert "running" in await tool.execute("list")
+    await tool.execute("cancel", task_id=queued.id)
+    await tool.execute("cancel", task_id=running.id)
+    await _drain(manager)
+
+    assert running.status == queued.status == "cancelled"
+    assert manager.bus.inbound_size == 0  # Cancelled runs are not announced
+
+
+@pytest.mark.asyncio
+async def test_progress_events_status_file_and_cli_cancel(tmp_path) -> None:
+    manager = _manager(tmp_path, _Slow(delay=5), progress_interval_s=0.05)
+    events: list[SubagentProgress] = []
+
+    async def on_progress(event: SubagentProgress) -> None:
+        events.append(event)
+
+    manager.bus.subscribe_progress("cli", on_progress)
+    await manager.spawn("long task", label="long")
+    await asyncio.sleep(0.2)
+    assert events and events[0].label == "long" and events[0].status == "running"
+
+    status = json.loads((tmp_path / "state" / "status.json").read_text())
+    task_id = status["subagents"][0]["id"]
+    assert status["running"] == 1
+
+    (tmp_path / "state" / "cancel").mkdir()
+    (tmp_path / "state" / "cancel" / task_id).touch()
+    await _drain(manager)
+    await asyncio.sleep(0.05)
+
+    assert manager.list_runs()[0].status == "cancelled"
+    status = json.loads((tmp_path / "state" / "status.json").read_text())
+    assert status["subagents"][0]["status"] == "cancelled"
+
+
+class _PerTask(LLMProvider):
+    """Answers each task after the delay given in its text ("sleep 0.1", "fail")."""
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        task = messages[-1]["content"]
+        if task == "fail":
+            return LLMResponse(content="boom", finish_reason="error")
+        await asyncio.sleep(float(task.split()[1]))
+        return LLMResponse(content=f"result of {task}")
+
+    def get_default_model(self) -> str:
+        return "mock"
+
+
+@pytest.mark.asyncio
+async def test_group_is_announced_once_with_all_results(tmp_path) -> None:
+    manager = _manager(tmp_path, _PerTask())
+    reply = await manager.spawn_group(["sleep 0.01", "sleep 0.05", "fail"], label="research")
+    assert "group id" in reply
+    await _drain(manager)
+    await asyncio.sleep(0.01)
+
+    assert manager.bus.inbound_size == 1
+    announcement = (await manager.bus.consume_inbound()).content
+    assert "'research' finished: 2 of 3" in announcement
+    assert "result of sleep 0.01" in announcement and "result of sleep 0.05" in announcement
+    assert "(failed)" in announcement
+
+    group_id = next(iter(manager._groups))
+    full = manager.get_result(group_id, origin="cli:direct")
+    assert "result of sleep 0.05" in full
+    assert manager.get_result(group_id, origin="cli:other") is None
+
+
+@pytest.mark.asyncio
+async def test_group_quorum_and_deadline_cancel_the_rest(tmp_path) -> None:
+    manager = _manager(tmp_path, _PerTask(), max_concurrent=10, max_per_origin=10)
+    await manager.spawn_group(["sleep 0.01", "sleep 0.02", "sleep 5"], quorum=2)
+    await manager.spawn_group(["sleep 0.01", "sleep 5"], deadline_s=0.1, origin_chat_id="b")
+    await _drain(manager)
+    await asyncio.sleep(0.01)
+
+    assert manager.bus.inbound_size == 2
+    contents = [(await manager.bus.consume_inbound()).content for _ in range(2)]
+    assert "2 of 3 tasks succeeded" in contents[0]
+    assert "deadline of 0.1s reached" in contents[1]
+    assert all("not finished, cancelled" in c for c in contents)
+    assert [r.status for r in manager.list_runs() if "5" in r.task] == ["cancelled", "cancelled"]
+
+
+@pytest.mark.asyncio
+async def test_prune_keeps_members_of_open_groups(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr("nanobot.agent.subagent._MAX_FINISHED", 1)
+    manager = _manager(tmp_path, _PerTask(), max_concurrent=10, max_per_origin=10)
+    await manager.spawn_group(["sleep 0.01", "sleep 0.1"], label="research")
+    for _ in range(3):
+        await manager.spawn("sleep 0.03", origin_chat_id="b")
+    await _drain(manager)
+    await asyncio.sleep(0.01)
+
+    contents = [(await manager.bus.consume_inbound()).content for _ in range(4)]
+    announcement = next(c for c in contents if "'research'" in c)
+    assert "finished: 2 of 2" in announcement
+    assert "result of sleep 0.01" in announcement
+    assert not manager._announcements
+
+@pytest.mark.asyncio
+async def test_results_outlive_the_manager(tmp_path) -> None:
+    manager = _manager(tmp_path, _PerTask())
+    await manager.spawn("sleep 0.01", origin_chat_id="a")
+    await _drain(manager)
+    task_id = manager.list_runs()[0].id
+
+    restarted = _manager(tmp_path, _PerTask())
+    tool = SubagentsTool(restarted)
+    tool.set_context("cli", "a")
+    assert await tool.execute("result", task_id=task_id) == "result of sleep 0.01"
+    tool.set_context("cli", "b")
+    assert (await tool.execute("result", task_id=task_id)).startswith("Error")
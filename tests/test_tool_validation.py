@@ -1,7 +1,12 @@
+import asyncio
+import time
+from pathlib import Path
 from typing import Any
 
 from nanobot.agent.tools.base import Tool
+from nanobot.agent.tools.filesystem import ListDirTool, ReadFileTool, WriteFileTool
 from nanobot.agent.tools.registry import ToolRegistry
+from nanobot.agent.tools.shell import ExecTool
 
 
 class SampleTool(Tool):
@@ -86,3 +91,139 @@ async def test_registry_returns_validation_error() -> None:
     reg.register(SampleTool())
     result = await reg.execute("sample", {"query": "hi"})
     assert "Invalid parameters" in result
+
+
+class _SleepTool(Tool):
+    def __init__(self, name: str, log: list[str], serialize: bool = False):
+        self._name = name
+        self._log = log
+        self._serialize = serialize
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def description(self) -> str:
+        return "sleep tool"
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {"type": "object", "properties": {"tag": {"type": "string"}}, "required": ["tag"]}
+
+    def concurrency_key(self, params: dict[str, Any]) -> str | None:
+        return self._name if self._serialize else None
+
+    async def execute(self, tag: str, **kwargs: Any) -> str:
+        self._log.append(f"start {tag}")
+        await asyncio.sleep(0.1)
+        self._log.append(f"end {tag}")
+        return tag
+
+
+async def test_execute_batch_runs_independent_calls_concurrently() -> None:
+    log: list[str] = []
+    reg = ToolRegistry()
+    reg.register(_SleepTool("fetch", log))
+    start = time.monotonic()
+    results = await reg.execute_batch([("fetch", {"tag": str(i)}) for i in range(3)])
+    assert results == ["0", "1", "2"]
+    assert time.monotonic() - start < 0.25
+
+
+async def test_execute_batch_serializes_same_key_in_order() -> None:
+    log: list[str] = []
+    reg = ToolRegistry()
+    reg.register(_SleepTool("write", log, serialize=True))
+    results = await reg.execute_batch([("write", {"tag": "a"}), ("write", {"tag": "b"})])
+    assert results == ["a", "b"]
+    assert log == ["start a", "end a", "start b", "end b"]
+
+
+async def test_execute_batch_orders_write_before_exec(tmp_path: Path) -> None:
+    reg = ToolRegistry()
+    reg.register(WriteFileTool())
+    reg.register(ReadFileTool())
+    reg.register(ExecTool(working_dir=str(tmp_path)))
+    script = tmp_path / "script.sh"
+    results = await reg.execute_batch([
+        ("write_file", {"path": str(script), "content": "sleep 0.1; echo written"}),
+        ("exec", {"command": f"sh {script}"}),
+        ("read_file", {"path": str(script)}),
+    ])
+    assert results[1].strip() == "written"
+    assert results[2] == "sleep 0.1; echo written"
+
+
+async def test_execute_batch_orders_read_after_exec_write(tmp_path: Path) -> None:
+    reg = ToolRegistry()
+    reg.register(ReadFileTool())
+    reg.register(ExecTool(working_dir=str(tmp_path)))
+    target = tmp_path / "out.txt"
+    target.write_text("old")
+    results = await reg.execute_batch([
+        ("exec", {"command": f"sleep 0.1; printf new > {target}"}),
+        ("read_file", {"path": str(target)}),
+    ])
+    assert results[1] == "new"
+
+
+async def test_execute_batch_lists_dir_after_writes_into_it(tmp_path: Path) -> None:
+    reg = ToolRegistry()
+    reg.register(WriteFileTool())
+    reg.register(ListDirTool())
+    reg.register(ExecTool(working_dir=str(tmp_path)))
+    results = await reg.execute_batch([
+        ("exec", {"command": f"sleep 0.1; mkdir {tmp_path / 'made'}"}),
+        ("write_file", {"path": str(tmp_path / "a" / "x.txt"), "content": "x"}),
+        ("list_dir", {"path": str(tmp_path)}),
+        ("list_dir", {"path": str(tmp_path / "a")}),
+    ])
+    assert "made" in results[2] and "a" in results[2]
+    assert "x.txt" in results[3]
+
+
+def test_conflicts_reads_share_writes_serialize() -> None:
+    path = ("path:/a", True)
+    write = ("path:/a", False)
+    other_write = ("path:/b", False)
+    exec_call = ("path:*", False)
+    assert not ToolRegistry._conflicts(path, path)
+    assert ToolRegistry._conflicts(path, write)
+    assert not ToolRegistry._conflicts(write, other_write)
+    assert ToolRegistry._conflicts(write, exec_call)
+    assert ToolRegistry._conflicts(exec_call, exec_call)
+    assert ToolRegistry._conflicts(path, exec_call)
+    assert not ToolRegistry._conflicts(path, ("path:*", True))
+
+
+def test_registry_caches_definitions_until_tools_change() -> None:
+    reg = ToolRegistry()
+    reg.register(SampleTool())
+    first = reg.get_definitions()
+    assert reg.get_definitions() is first
+
+    reg.register(_SleepTool("fetch", []))
+    second = reg.get_definitions()
+    assert second is not first
+    assert [d["function"]["name"] for d in second] == ["sample", "fetch"]
+
+    reg.unregister("fetch")
+    assert [d["function"]["name"] for d in reg.get_definitions()] == ["sample"]
+
+
+def test_validator_is_compiled_once_at_registration() -> None:
+    calls = []
+
+    class CountingTool(SampleTool):
+        @property
+        def parameters(self) -> dict[str, Any]:
+            calls.append(1)
+            return super().parameters
+
+    tool = CountingTool()
+    ToolRegistry().register(tool)
+    assert len(calls) == 1
+    for _ in range(3):
+        assert tool.validate_params({"query": "hi", "count": 2, "meta": {"tag": "t", "flags": ["a"]}}) == []
+    assert len(calls) == 1
@@ -11,6 +11,7 @@ from nanobot.bus.queue import MessageBus
 from nanobot.channels.web import WebChannel
 from nanobot.config.schema import WebConfig
 from nanobot.providers.base import LLMProvider, LLMResponse
+from nanobot.session.manager import SessionManager
 
 
 class _MockProvider(LLMProvider):
@@ -42,12 +43,25 @@ async def test_web_channel_roundtrip_and_history(monkeypatch: pytest.MonkeyPatch
     workspace.mkdir(parents=True, exist_ok=True)
 
     bus = MessageBus()
+    sessions = SessionManager(workspace)
     web = WebChannel(
         WebConfig(enabled=True, host="127.0.0.1", port=0),
         bus,
         workspace=workspace,
+        sessions=sessions,
     )
-    agent = AgentLoop(bus=bus, provider=_MockProvider(), workspace=workspace, model="mock")
+    agent = AgentLoop(
+        bus=bus, provider=_MockProvider(), workspace=workspace, model="mock", sessions=sessions
+    )
+    loads = 0
+    load = sessions._load
+
+    def counting_load(key: str):
+        nonlocal loads
+        loads += 1
+        return load(key)
+
+    monkeypatch.setattr(sessions, "_load", counting_load)
 
     async def dispatch_outbound() -> None:
         try:
@@ -76,21 +90,44 @@ async def test_web_channel_roundtrip_and_history(monkeypatch: pytest.MonkeyPatch
             await ws.send(json.dumps({"type": "message", "content": "hello"}))
 
             assistant = None
+            deltas: list[str] = []
             for _ in range(10):
                 data = json.loads(await asyncio.wait_for(ws.recv(), timeout=10))
+                if data.get("type") == "delta":
+                    deltas.append(data["content"])
                 if data.get("type") == "message" and data.get("role") == "assistant":
                     assistant = data
                     break
             assert assistant is not None
             assert assistant["content"] == "echo: hello"
+            # Deltas are delivered asynchronously; pick up any that trail the final message.
+            try:
+                while True:
+                    data = json.loads(await asyncio.wait_for(ws.recv(), timeout=0.2))
+                    if data.get("type") == "delta":
+                        deltas.append(data["content"])
+            except asyncio.TimeoutError:
+                pass
+            assert "".join(deltas) == "echo: hello"
+            assert len(assistant["streams"]) == 1
 
-        # 2) Reconnect; server should provide updated history from disk.
+        # 2) Reconnect; history comes from the shared store without re-reading the file.
         async with websockets.connect(uri, proxy=None) as ws:
             history2 = json.loads(await asyncio.wait_for(ws.recv(), timeout=5))
             assert history2["type"] == "history"
             msgs = history2["messages"]
             assert any(m["role"] == "user" and m["content"] == "hello" for m in msgs)
             assert any(m["role"] == "assistant" and m["content"] == "echo: hello" for m in msgs)
+        assert loads == 1
+
+        # 3) Clearing in one tab pushes the empty history to the other tabs.
+        async with websockets.connect(uri, proxy=None) as ws1, websockets.connect(uri, proxy=None) as ws2:
+            for ws in (ws1, ws2):
+                await asyncio.wait_for(ws.recv(), timeout=5)
+            await ws1.send(json.dumps({"type": "clear"}))
+            history3 = json.loads(await asyncio.wait_for(ws2.recv(), timeout=5))
+            assert history3 == {"type": "history", "session": session_id, "messages": []}
+        assert agent.sessions.get_or_create(f"web:{session_id}").messages == []
     finally:
         agent.stop()
         await web.stop()